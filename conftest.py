@@ -5,6 +5,6 @@ pytest配置文件
 import os
 import sys
 
-# 将项目根目录添加到Python路径
+# 将项目根目录添加到Python路径，测试与main.py一样通过src包导入（如src.analyzers）
 project_root = os.path.dirname(os.path.abspath(__file__))
-sys.path.insert(0, os.path.join(project_root, 'src')) 
\ No newline at end of file
+sys.path.insert(0, project_root)
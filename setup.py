@@ -11,6 +11,7 @@ setup(
         'pandas',
         'python-dotenv',
         'plotly',
-        'tushare'
+        'tushare',
+        'pyarrow'
     ],
 ) 
\ No newline at end of file
@@ -3,6 +3,8 @@
 包含各种技术分析工具和指标分析逻辑
 """
 
-from .technical_indicators import analyze_indicators
+from .technical_indicators import (analyze_indicators, analyze_indicators_codes, format_indicator_results,
+                                   analyze_indicators_batch, screen_indicators)
 
-__all__ = ['analyze_indicators'] 
\ No newline at end of file
+__all__ = ['analyze_indicators', 'analyze_indicators_codes', 'format_indicator_results',
+           'analyze_indicators_batch', 'screen_indicators'] 
\ No newline at end of file
@@ -0,0 +1,703 @@
+"""
+K线形态判断的数值内核
+安装了numba时各判断函数编译为本地代码，整条形态识别流程在analyze_window中一次完成；
+未安装时退化为普通Python函数，识别结果一致
+"""
+
+from typing import NamedTuple, Tuple
+import numpy as np
+
+from ._njit import njit, NUMBA_AVAILABLE, EAGER_JIT
+
+
+class CandleBars(NamedTuple):
+    """
+    K线序列及其派生特征（按字段分列存放的ndarray）
+    """
+    open: np.ndarray
+    high: np.ndarray
+    low: np.ndarray
+    close: np.ndarray
+    bull: np.ndarray    # 阳线
+    bear: np.ndarray    # 阴线
+    body: np.ndarray    # 实体长度
+    mid: np.ndarray     # 实体中点
+    range: np.ndarray   # 振幅（最高价-最低价）
+    inside: np.ndarray  # 与前一天构成内包（首日为False）
+    outside: np.ndarray  # 与前一天构成外包（首日为False）
+
+
+# 形态编号：0-7为单日形态，8-19两日，20-32三日，33-34四日，35-36五日；
+# 同一类形态内的编号顺序即同优先级时的选取顺序
+DOJI, LONG_LEGGED_DOJI, GRAVESTONE_DOJI, SPINNING_TOP, HAMMER, INVERTED_HAMMER, HANGING_MAN, SHOOTING_STAR = range(8)
+(BULLISH_ENGULFING, BEARISH_ENGULFING, BULLISH_HARAMI, BEARISH_HARAMI, PIERCING_LINE, DARK_CLOUD_COVER,
+ TWEEZER_BOTTOM, TWEEZER_TOP, GAP_UP, GAP_DOWN, FLAT_TOP, FLAT_BOTTOM) = range(8, 20)
+(MORNING_STAR, EVENING_STAR, THREE_WHITE_SOLDIERS, THREE_BLACK_CROWS, BULLISH_THREE_INSIDE, BEARISH_THREE_INSIDE,
+ BULLISH_THREE_OUTSIDE, BEARISH_THREE_OUTSIDE, THREE_MOUNTAINS, THREE_RIVERS, THREE_STARS,
+ BULLISH_ISLAND_REVERSAL, BEARISH_ISLAND_REVERSAL) = range(20, 33)
+BULLISH_THREE_LINE_STRIKE, BEARISH_THREE_LINE_STRIKE = range(33, 35)
+RISING_THREE_METHODS, FALLING_THREE_METHODS = range(35, 37)
+N_PATTERNS = 37
+
+# 每类形态的编号区间[起, 止)，下标即形态天数-1
+PATTERN_GROUP_BOUNDS = np.array([0, 8, 20, 33, 35, 37], dtype=np.int64)
+
+# 各形态的方向（1看涨、-1看跌、0中性），按编号排列
+PATTERN_DIRECTIONS = np.array([
+    0, 0, -1, 0, 1, 1, -1, -1,
+    1, -1, 1, -1, 1, -1, 1, -1, 1, -1, -1, 1,
+    1, -1, 1, -1, 1, -1, 1, -1, -1, 1, 1, 1, -1,
+    1, -1,
+    1, -1,
+], dtype=np.int64)
+
+# 各多日形态的优先级，每类形态只保留优先级最高的一个；单日形态全部保留，不参与比较
+PATTERN_PRIORITIES = np.array([
+    0, 0, 0, 0, 0, 0, 0, 0,
+    5, 5, 4, 4, 4, 4, 3, 3, 3, 3, 2, 2,
+    5, 5, 4, 4, 3, 3, 3, 3, 4, 4, 3, 5, 5,
+    4, 4,
+    5, 5,
+], dtype=np.int64)
+
+# 每类形态内按优先级从高到低排列的检查顺序，同优先级保持编号顺序（稳定排序）
+PATTERN_CHECK_ORDER = np.concatenate([
+    start + np.argsort(-PATTERN_PRIORITIES[start:stop], kind='stable')
+    for start, stop in zip(PATTERN_GROUP_BOUNDS[:-1], PATTERN_GROUP_BOUNDS[1:])
+]).astype(np.int64)
+
+# 单日形态最多8个，多日形态每类最多1个
+MAX_PATTERNS = 12
+
+
+@njit(cache=True)
+def build_candle_bars(open_price: np.ndarray, high: np.ndarray, low: np.ndarray, close: np.ndarray) -> CandleBars:
+    """
+    由OHLC数组一次性计算多日形态判断共用的派生特征
+    """
+    inside = np.zeros(len(high), dtype=np.bool_)
+    outside = np.zeros(len(high), dtype=np.bool_)
+    inside[1:] = (high[1:] < high[:-1]) & (low[1:] > low[:-1])
+    outside[1:] = (high[1:] > high[:-1]) & (low[1:] < low[:-1])
+    return CandleBars(
+        open_price, high, low, close,
+        close > open_price,
+        close < open_price,
+        np.abs(close - open_price),
+        (open_price + close) / 2,
+        high - low,
+        inside,
+        outside
+    )
+
+
+@njit(cache=True)
+def is_doji(open_price: float, close_price: float, high: float, low: float) -> bool:
+    """
+    判断是否为十字星形态
+    """
+    body = abs(open_price - close_price)
+    upper_shadow = high - max(open_price, close_price)
+    lower_shadow = min(open_price, close_price) - low
+    total_range = high - low
+
+    return body <= total_range * 0.1 and upper_shadow > body and lower_shadow > body
+
+
+@njit(cache=True)
+def is_hammer(open_price: float, close_price: float, high: float, low: float) -> bool:
+    """
+    判断是否为锤子线形态
+    """
+    body = abs(open_price - close_price)
+    upper_shadow = high - max(open_price, close_price)
+    lower_shadow = min(open_price, close_price) - low
+    total_range = high - low
+
+    return (lower_shadow >= body * 2 and
+            upper_shadow <= body * 0.1 and
+            body >= total_range * 0.1)
+
+
+@njit(cache=True)
+def is_shooting_star(open_price: float, close_price: float, high: float, low: float) -> bool:
+    """
+    判断是否为流星线形态
+    """
+    body = abs(open_price - close_price)
+    upper_shadow = high - max(open_price, close_price)
+    lower_shadow = min(open_price, close_price) - low
+    total_range = high - low
+
+    return (upper_shadow >= body * 2 and
+            lower_shadow <= body * 0.1 and
+            body >= total_range * 0.1)
+
+
+@njit(cache=True)
+def is_long_legged_doji(open_price: float, close_price: float, high: float, low: float) -> bool:
+    """
+    判断是否为长腿十字星形态
+    """
+    body = abs(open_price - close_price)
+    upper_shadow = high - max(open_price, close_price)
+    lower_shadow = min(open_price, close_price) - low
+    total_range = high - low
+
+    return (body <= total_range * 0.1 and
+            upper_shadow >= total_range * 0.3 and
+            lower_shadow >= total_range * 0.3)
+
+
+@njit(cache=True)
+def is_gravestone_doji(open_price: float, close_price: float, high: float, low: float) -> bool:
+    """
+    判断是否为墓碑十字星形态
+    """
+    body = abs(open_price - close_price)
+    upper_shadow = high - max(open_price, close_price)
+    lower_shadow = min(open_price, close_price) - low
+    total_range = high - low
+
+    return (body <= total_range * 0.1 and
+            upper_shadow >= total_range * 0.6 and
+            lower_shadow <= total_range * 0.1)
+
+
+@njit(cache=True)
+def is_spinning_top(open_price: float, close_price: float, high: float, low: float) -> bool:
+    """
+    判断是否为纺锤线形态
+    """
+    body = abs(open_price - close_price)
+    upper_shadow = high - max(open_price, close_price)
+    lower_shadow = min(open_price, close_price) - low
+    total_range = high - low
+
+    return (body <= total_range * 0.3 and
+            upper_shadow >= body and
+            lower_shadow >= body and
+            abs(upper_shadow - lower_shadow) <= total_range * 0.1)
+
+
+@njit(cache=True)
+def is_inverted_hammer(open_price: float, close_price: float, high: float, low: float) -> bool:
+    """
+    判断是否为倒锤子线形态
+    """
+    body = abs(open_price - close_price)
+    upper_shadow = high - max(open_price, close_price)
+    lower_shadow = min(open_price, close_price) - low
+    total_range = high - low
+
+    return (upper_shadow >= body * 2 and
+            lower_shadow <= body * 0.1 and
+            body >= total_range * 0.1)
+
+
+@njit(cache=True)
+def is_hanging_man(open_price: float, close_price: float, high: float, low: float) -> bool:
+    """
+    判断是否为吊颈线形态
+    """
+    body = abs(open_price - close_price)
+    upper_shadow = high - max(open_price, close_price)
+    lower_shadow = min(open_price, close_price) - low
+    total_range = high - low
+
+    return (lower_shadow >= body * 2 and
+            upper_shadow <= body * 0.1 and
+            body >= total_range * 0.1 and
+            close_price < open_price)  # 必须是阴线
+
+
+@njit(cache=True)
+def is_inside_bar(h1: float, l1: float, h2: float, l2: float) -> bool:
+    """
+    判断是否为内包形态
+    """
+    return (h2 < h1 and  # 第二天最高价低于第一天最高价
+            l2 > l1)     # 第二天最低价高于第一天最低价
+
+
+@njit(cache=True)
+def is_outside_bar(h1: float, l1: float, h2: float, l2: float) -> bool:
+    """
+    判断是否为外包形态
+    """
+    return (h2 > h1 and  # 第二天最高价高于第一天最高价
+            l2 < l1)     # 第二天最低价低于第一天最低价
+
+
+@njit(cache=True)
+def is_bullish_engulfing(bars: CandleBars) -> bool:
+    """
+    判断是否为看涨吞没形态（取序列最后两天）
+    """
+    return (bars.bear[-2] and  # 第一天阴线
+            bars.bull[-1] and  # 第二天阳线
+            bars.open[-1] < bars.close[-2] and  # 第二天开盘价低于第一天收盘价
+            bars.close[-1] > bars.open[-2])     # 第二天收盘价高于第一天开盘价
+
+
+@njit(cache=True)
+def is_bearish_engulfing(bars: CandleBars) -> bool:
+    """
+    判断是否为看跌吞没形态（取序列最后两天）
+    """
+    return (bars.bull[-2] and  # 第一天阳线
+            bars.bear[-1] and  # 第二天阴线
+            bars.open[-1] > bars.close[-2] and  # 第二天开盘价高于第一天收盘价
+            bars.close[-1] < bars.open[-2])     # 第二天收盘价低于第一天开盘价
+
+
+@njit(cache=True)
+def is_harami(bars: CandleBars, bullish: bool = True) -> bool:
+    """
+    判断是否为孕线形态（看涨/看跌），取序列最后两天
+
+    参数:
+        bars: K线及其派生特征
+        bullish: True为看涨孕线，False为看跌孕线
+    """
+    if bullish:
+        return (bars.bear[-2] and  # 第一天阴线
+                bars.bull[-1] and  # 第二天阳线
+                bars.open[-1] > bars.close[-2] and  # 第二天实体在第一天实体内
+                bars.close[-1] < bars.open[-2] and
+                bars.body[-1] < bars.body[-2] * 0.5)  # 第二天实体小于第一天的一半
+    else:
+        return (bars.bull[-2] and  # 第一天阳线
+                bars.bear[-1] and  # 第二天阴线
+                bars.open[-1] < bars.close[-2] and  # 第二天实体在第一天实体内
+                bars.close[-1] > bars.open[-2] and
+                bars.body[-1] < bars.body[-2] * 0.5)  # 第二天实体小于第一天的一半
+
+
+@njit(cache=True)
+def is_tweezer(bars: CandleBars, bullish: bool = True) -> bool:
+    """
+    判断是否为镊子底/顶形态（取序列最后两天）
+    """
+    price_diff_threshold = bars.range[-2] * 0.001  # 允许0.1%的误差
+
+    if bullish:  # 镊子底
+        return (bars.bear[-2] and  # 第一天阴线
+                bars.bull[-1] and  # 第二天阳线
+                abs(bars.low[-2] - bars.low[-1]) <= price_diff_threshold)  # 两天低点相同
+    else:  # 镊子顶
+        return (bars.bull[-2] and  # 第一天阳线
+                bars.bear[-1] and  # 第二天阴线
+                abs(bars.high[-2] - bars.high[-1]) <= price_diff_threshold)  # 两天高点相同
+
+
+@njit(cache=True)
+def is_piercing_line(bars: CandleBars) -> bool:
+    """
+    判断是否为刺透形态（取序列最后两天）
+    """
+    return (bars.bear[-2] and  # 第一天阴线
+            bars.bull[-1] and  # 第二天阳线
+            bars.open[-1] < bars.close[-2] and  # 第二天开盘价低于第一天收盘价
+            bars.close[-1] > bars.mid[-2])  # 第二天收盘价高于第一天实体中点
+
+
+@njit(cache=True)
+def is_dark_cloud_cover(bars: CandleBars) -> bool:
+    """
+    判断是否为乌云盖顶形态（取序列最后两天）
+    """
+    return (bars.bull[-2] and  # 第一天阳线
+            bars.bear[-1] and  # 第二天阴线
+            bars.open[-1] > bars.close[-2] and  # 第二天开盘价高于第一天收盘价
+            bars.close[-1] < bars.mid[-2])  # 第二天收盘价低于第一天实体中点
+
+
+@njit(cache=True)
+def is_gap(bars: CandleBars, bullish: bool = True) -> bool:
+    """
+    判断是否为跳空缺口形态（取序列最后两天）
+    """
+    if bullish:
+        return bars.low[-1] > bars.high[-2]  # 向上跳空
+    else:
+        return bars.high[-1] < bars.low[-2]  # 向下跳空
+
+
+@njit(cache=True)
+def is_flat_top_bottom(bars: CandleBars, is_top: bool = True) -> bool:
+    """
+    判断是否为平头顶/底形态（取序列最后两天）
+    """
+    price_diff_threshold = bars.range[-2] * 0.001  # 允许0.1%的误差
+
+    if is_top:
+        return abs(bars.high[-2] - bars.high[-1]) <= price_diff_threshold  # 平头顶
+    else:
+        return abs(bars.low[-2] - bars.low[-1]) <= price_diff_threshold   # 平头底
+
+
+@njit(cache=True)
+def is_morning_star(bars: CandleBars) -> bool:
+    """
+    判断是否为启明星形态（取序列最后三天）
+    """
+    if len(bars.open) < 3:
+        return False
+
+    return (bars.bear[-3] and                               # 第一天阴线
+            bars.body[-2] < bars.range[-2] * 0.3 and        # 第二天十字星
+            bars.bull[-1] and                               # 第三天阳线
+            bars.high[-2] < bars.close[-3] and              # 第二天价格跳空低开
+            bars.close[-1] > bars.mid[-3])                  # 第三天收盘价回升超过第一天实体一半
+
+
+@njit(cache=True)
+def is_evening_star(bars: CandleBars) -> bool:
+    """
+    判断是否为黄昏星形态（取序列最后三天）
+    """
+    if len(bars.open) < 3:
+        return False
+
+    return (bars.bull[-3] and                               # 第一天阳线
+            bars.body[-2] < bars.range[-2] * 0.3 and        # 第二天十字星
+            bars.bear[-1] and                               # 第三天阴线
+            bars.low[-2] > bars.close[-3] and               # 第二天价格跳空高开
+            bars.close[-1] < bars.mid[-3])                  # 第三天收盘价下跌超过第一天实体一半
+
+
+@njit(cache=True)
+def is_three_white_soldiers(bars: CandleBars) -> bool:
+    """
+    判断是否为三白兵形态（取序列最后三天）
+    """
+    if len(bars.open) < 3:
+        return False
+
+    # 检查三天都是阳线，且每天收盘价、开盘价都比前一天高；逐项比较标量，不生成切片临时数组
+    o, c = bars.open, bars.close
+    return bool(bars.bull[-3] and bars.bull[-2] and bars.bull[-1] and
+                c[-2] > c[-3] and c[-1] > c[-2] and
+                o[-2] > o[-3] and o[-1] > o[-2])
+
+
+@njit(cache=True)
+def is_three_black_crows(bars: CandleBars) -> bool:
+    """
+    判断是否为三黑鸦形态（取序列最后三天）
+    """
+    if len(bars.open) < 3:
+        return False
+
+    # 检查三天都是阴线，且每天收盘价、开盘价都比前一天低；逐项比较标量，不生成切片临时数组
+    o, c = bars.open, bars.close
+    return bool(bars.bear[-3] and bars.bear[-2] and bars.bear[-1] and
+                c[-2] < c[-3] and c[-1] < c[-2] and
+                o[-2] < o[-3] and o[-1] < o[-2])
+
+
+@njit(cache=True)
+def is_three_inside(bars: CandleBars) -> Tuple[bool, bool]:
+    """
+    判断是否为三内形态（看涨/看跌），取序列最后三天
+    返回: (是否看涨三内, 是否看跌三内)
+    """
+    if len(bars.open) < 3:
+        return False, False
+
+    h, l, c = bars.high, bars.low, bars.close
+    bullish = (bars.inside[-2] and  # 前两天形成内包
+               bars.bear[-3] and  # 第一天阴线
+               bars.bull[-1] and  # 第三天阳线
+               c[-1] > h[-2])     # 第三天突破上方
+
+    bearish = (bars.inside[-2] and  # 前两天形成内包
+               bars.bull[-3] and  # 第一天阳线
+               bars.bear[-1] and  # 第三天阴线
+               c[-1] < l[-2])     # 第三天突破下方
+
+    return bullish, bearish
+
+
+@njit(cache=True)
+def is_three_outside(bars: CandleBars) -> Tuple[bool, bool]:
+    """
+    判断是否为三外形态（看涨/看跌），取序列最后三天
+    返回: (是否看涨三外, 是否看跌三外)
+    """
+    if len(bars.open) < 3:
+        return False, False
+
+    h, l, c = bars.high, bars.low, bars.close
+    bullish = (bars.outside[-2] and  # 前两天形成外包
+               bars.bear[-3] and  # 第一天阴线
+               bars.bull[-2] and  # 第二天阳线
+               bars.bull[-1] and  # 第三天阳线
+               c[-1] > h[-2])     # 第三天创新高
+
+    bearish = (bars.outside[-2] and  # 前两天形成外包
+               bars.bull[-3] and  # 第一天阳线
+               bars.bear[-2] and  # 第二天阴线
+               bars.bear[-1] and  # 第三天阴线
+               c[-1] < l[-2])     # 第三天创新低
+
+    return bullish, bearish
+
+
+@njit(cache=True)
+def is_three_mountains(bars: CandleBars) -> bool:
+    """
+    判断是否为三山形态（看跌反转），取序列最后三天
+    """
+    if len(bars.open) < 3:
+        return False
+
+    h1, h2, h3 = bars.high[-3], bars.high[-2], bars.high[-1]
+    return (h2 > h1 and
+            h2 > h3 and
+            abs(h1 - h3) <= bars.range[-3] * 0.1)
+
+
+@njit(cache=True)
+def is_three_rivers(bars: CandleBars) -> bool:
+    """
+    判断是否为三川形态（看涨反转），取序列最后三天
+    """
+    if len(bars.open) < 3:
+        return False
+
+    l1, l2, l3 = bars.low[-3], bars.low[-2], bars.low[-1]
+    return (l2 < l1 and
+            l2 < l3 and
+            abs(l1 - l3) <= bars.range[-3] * 0.1)
+
+
+@njit(cache=True)
+def is_three_stars(bars: CandleBars) -> bool:
+    """
+    判断是否为三星形态，取序列最后三天
+    """
+    if len(bars.open) < 3:
+        return False
+
+    # 检查是否都是十字星，实体与振幅取自预先计算的派生特征，任一天不满足即返回
+    o, h, l, c = bars.open, bars.high, bars.low, bars.close
+    for i in (-3, -2, -1):
+        upper_shadow = h[i] - max(o[i], c[i])
+        lower_shadow = min(o[i], c[i]) - l[i]
+        if not (bars.body[i] <= bars.range[i] * 0.1 and upper_shadow > bars.body[i] and lower_shadow > bars.body[i]):
+            return False
+    return True
+
+
+@njit(cache=True)
+def is_island_reversal(bars: CandleBars, bullish: bool = True) -> bool:
+    """
+    判断是否为岛型反转形态，取序列最后三天
+    """
+    if len(bars.open) < 3:
+        return False
+
+    h, l = bars.high, bars.low
+    if bullish:
+        return (l[-2] > h[-3] and  # 第一个跳空（向上）
+                h[-1] < l[-2])     # 第二个跳空（向下）
+    else:
+        return (h[-2] < l[-3] and  # 第一个跳空（向下）
+                l[-1] > h[-2])     # 第二个跳空（向上）
+
+
+@njit(cache=True)
+def is_three_line_strike(bars: CandleBars) -> Tuple[bool, bool]:
+    """
+    判断是否为三线打击形态（看涨/看跌），取序列最后四天
+    返回: (是否看涨三线打击, 是否看跌三线打击)
+    """
+    if len(bars.open) < 4:
+        return False, False
+
+    # 前三天阳线记+1、阴线记-1（平盘或缺失记0），一次遍历即可区分三连阴与三连阳
+    colors = 0
+    for i in range(-4, -1):
+        colors += int(bars.bull[i]) - int(bars.bear[i])
+
+    if colors == -3:  # 前三天都是阴线
+        # 看涨三线打击
+        return (bars.bull[-1] and  # 第四天是阳线
+                bars.close[-1] > bars.open[-4]), False  # 第四天收盘价高于第一天开盘价
+    elif colors == 3:  # 前三天都是阳线
+        # 看跌三线打击
+        return False, (bars.bear[-1] and  # 第四天是阴线
+                       bars.close[-1] < bars.open[-4])  # 第四天收盘价低于第一天开盘价
+
+    return False, False
+
+
+@njit(cache=True)
+def is_rising_three_methods(bars: CandleBars) -> bool:
+    """
+    判断是否为上升三法形态（取序列最后五天）
+    """
+    if len(bars.open) < 5:
+        return False
+
+    return bool(bars.bull[-5] and  # 第一天大阳线
+                bars.bull[-1] and  # 最后一天大阳线
+                bars.close[-1] > bars.close[-5] and  # 突破新高
+                bars.bear[-4:-1].all() and  # 中间三天是小阴线
+                (bars.low[-4:-1] > bars.open[-5]).all())  # 中间三天的最低价高于第一天开盘价
+
+
+@njit(cache=True)
+def is_falling_three_methods(bars: CandleBars) -> bool:
+    """
+    判断是否为下降三法形态（取序列最后五天）
+    """
+    if len(bars.open) < 5:
+        return False
+
+    return bool(bars.bear[-5] and  # 第一天大阴线
+                bars.bear[-1] and  # 最后一天大阴线
+                bars.close[-1] < bars.close[-5] and  # 突破新低
+                bars.bull[-4:-1].all() and  # 中间三天是小阳线
+                (bars.high[-4:-1] < bars.open[-5]).all())  # 中间三天的最高价低于第一天开盘价
+
+
+@njit(cache=True)
+def scan_all_patterns(open_price: np.ndarray, high: np.ndarray, low: np.ndarray, close: np.ndarray) -> int:
+    """
+    一次判断全部形态，返回按形态编号置位的位掩码（第i位为1表示编号为i的形态成立）
+
+    各形态逐个调用对应的is_*判断函数，阴阳、实体、振幅、内外包等多日形态共用的特征只在build_candle_bars中计算一次；
+    数据天数不足某类形态时跳过该类及更长的形态
+    """
+    bars = build_candle_bars(open_price, high, low, close)
+    n = len(open_price)
+    mask = 0
+
+    # 单日形态（最新一天）
+    o, c, h, l = open_price[-1], close[-1], high[-1], low[-1]
+    mask |= is_doji(o, c, h, l) << DOJI
+    mask |= is_long_legged_doji(o, c, h, l) << LONG_LEGGED_DOJI
+    mask |= is_gravestone_doji(o, c, h, l) << GRAVESTONE_DOJI
+    mask |= is_spinning_top(o, c, h, l) << SPINNING_TOP
+    mask |= is_hammer(o, c, h, l) << HAMMER
+    mask |= is_inverted_hammer(o, c, h, l) << INVERTED_HAMMER
+    mask |= is_hanging_man(o, c, h, l) << HANGING_MAN
+    mask |= is_shooting_star(o, c, h, l) << SHOOTING_STAR
+    if n < 2:
+        return mask
+
+    # 两日形态
+    mask |= is_bullish_engulfing(bars) << BULLISH_ENGULFING
+    mask |= is_bearish_engulfing(bars) << BEARISH_ENGULFING
+    mask |= is_harami(bars, True) << BULLISH_HARAMI
+    mask |= is_harami(bars, False) << BEARISH_HARAMI
+    mask |= is_piercing_line(bars) << PIERCING_LINE
+    mask |= is_dark_cloud_cover(bars) << DARK_CLOUD_COVER
+    mask |= is_tweezer(bars, True) << TWEEZER_BOTTOM
+    mask |= is_tweezer(bars, False) << TWEEZER_TOP
+    mask |= is_gap(bars, True) << GAP_UP
+    mask |= is_gap(bars, False) << GAP_DOWN
+    mask |= is_flat_top_bottom(bars, True) << FLAT_TOP
+    mask |= is_flat_top_bottom(bars, False) << FLAT_BOTTOM
+    if n < 3:
+        return mask
+
+    # 三日形态
+    bullish_inside, bearish_inside = is_three_inside(bars)
+    bullish_outside, bearish_outside = is_three_outside(bars)
+    mask |= is_morning_star(bars) << MORNING_STAR
+    mask |= is_evening_star(bars) << EVENING_STAR
+    mask |= is_three_white_soldiers(bars) << THREE_WHITE_SOLDIERS
+    mask |= is_three_black_crows(bars) << THREE_BLACK_CROWS
+    mask |= bullish_inside << BULLISH_THREE_INSIDE
+    mask |= bearish_inside << BEARISH_THREE_INSIDE
+    mask |= bullish_outside << BULLISH_THREE_OUTSIDE
+    mask |= bearish_outside << BEARISH_THREE_OUTSIDE
+    mask |= is_three_mountains(bars) << THREE_MOUNTAINS
+    mask |= is_three_rivers(bars) << THREE_RIVERS
+    mask |= is_three_stars(bars) << THREE_STARS
+    mask |= is_island_reversal(bars, True) << BULLISH_ISLAND_REVERSAL
+    mask |= is_island_reversal(bars, False) << BEARISH_ISLAND_REVERSAL
+    if n < 4:
+        return mask
+
+    # 四日形态
+    bullish_strike, bearish_strike = is_three_line_strike(bars)
+    mask |= bullish_strike << BULLISH_THREE_LINE_STRIKE
+    mask |= bearish_strike << BEARISH_THREE_LINE_STRIKE
+    if n < 5:
+        return mask
+
+    # 五日形态
+    mask |= is_rising_three_methods(bars) << RISING_THREE_METHODS
+    mask |= is_falling_three_methods(bars) << FALLING_THREE_METHODS
+    return mask
+
+
+@njit(cache=True)
+def analyze_window(open_price: np.ndarray, high: np.ndarray, low: np.ndarray,
+                   close: np.ndarray) -> Tuple[np.ndarray, int, int, int]:
+    """
+    对最近5天K线完成全部形态识别
+
+    由scan_all_patterns一次得到全部形态的位掩码；单日形态全部保留，两日至五日形态
+    每类按PATTERN_CHECK_ORDER取第一个成立的，即优先级最高（同优先级取编号靠前）的一个
+
+    参数:
+        open_price, high, low, close: 最近5天的OHLC数组，按时间升序排列
+
+    返回:
+        (命中的形态编号数组, 总权重, 看涨计数, 看跌计数)，权重即形态天数
+    """
+    mask = scan_all_patterns(open_price, high, low, close)
+    pattern_ids = np.empty(MAX_PATTERNS, dtype=np.int64)
+    n_patterns = 0
+    total_weight = 0
+    bullish_count = 0
+    bearish_count = 0
+
+    for pattern_id in range(PATTERN_GROUP_BOUNDS[1]):
+        if mask >> pattern_id & 1:
+            pattern_ids[n_patterns] = pattern_id
+            n_patterns += 1
+            total_weight += 1
+            if PATTERN_DIRECTIONS[pattern_id] > 0:
+                bullish_count += 1
+            elif PATTERN_DIRECTIONS[pattern_id] < 0:
+                bearish_count += 1
+
+    for days in range(2, 6):
+        # 按优先级从高到低查看，第一个成立的形态即为该类结果
+        best = -1
+        for k in range(PATTERN_GROUP_BOUNDS[days - 1], PATTERN_GROUP_BOUNDS[days]):
+            if mask >> PATTERN_CHECK_ORDER[k] & 1:
+                best = PATTERN_CHECK_ORDER[k]
+                break
+        if best >= 0:
+            pattern_ids[n_patterns] = best
+            n_patterns += 1
+            total_weight += days
+            if PATTERN_DIRECTIONS[best] > 0:
+                bullish_count += days
+            else:
+                bearish_count += days
+
+    return pattern_ids[:n_patterns], total_weight, bullish_count, bearish_count
+
+
+def warmup() -> None:
+    """
+    预先编译K线形态数值内核，未安装numba时不做任何事
+    """
+    if not NUMBA_AVAILABLE:
+        return
+    ohlc = np.ones((4, 5))
+    analyze_window(ohlc[0], ohlc[1], ohlc[2], ohlc[3])
+
+
+# 设置环境变量EAGER_JIT=1时在导入阶段完成编译，否则在首次调用时编译
+if EAGER_JIT:
+    warmup()
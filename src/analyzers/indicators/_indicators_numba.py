@@ -0,0 +1,346 @@
+"""
+指标分析共用的数值内核
+包括忽略NaN的均值与标准差、趋势斜率、局部极值背离、MACD各维度、RSI短期信号、均线交叉判断等逐个标量处理的逻辑；
+安装了numba时编译为本地代码，未安装时按普通Python函数运行，结果一致
+"""
+
+from typing import Tuple
+import numpy as np
+from numpy.lib.stride_tricks import sliding_window_view
+
+from ._njit import njit, NUMBA_AVAILABLE, EAGER_JIT
+
+
+# 背离编码：顶背离、底背离、无背离
+DIVERGENCE_TOP, DIVERGENCE_BOTTOM, DIVERGENCE_NONE = range(3)
+
+# MACD长期趋势编码，对应macd_analyzer._LONG_TREND_LABELS
+MACD_LONG_STRONG_UP, MACD_LONG_UP_WEAKENING, MACD_LONG_STRONG_DOWN, MACD_LONG_DOWN_WEAKENING = range(4)
+MACD_LONG_CONSOLIDATION = 4
+
+# MACD中期趋势编码，对应macd_analyzer._MEDIUM_TREND_LABELS
+MACD_MEDIUM_SIDEWAYS, MACD_MEDIUM_UP, MACD_MEDIUM_WEAK_UP, MACD_MEDIUM_DOWN, MACD_MEDIUM_WEAK_DOWN = range(5)
+
+# MACD强度编码，对应macd_analyzer._STRENGTH_LABELS
+MACD_VERY_STRONG, MACD_VERY_WEAK, MACD_STRONG, MACD_WEAK, MACD_NORMAL = range(5)
+
+# MACD短期信号编码，对应macd_analyzer._SHORT_SIGNAL_LABELS
+MACD_GOLDEN_CROSS, MACD_DEATH_CROSS = range(2)
+MACD_RED_EXPANDING, MACD_RED_SHRINKING, MACD_GREEN_EXPANDING, MACD_GREEN_SHRINKING = range(2, 6)
+MACD_NO_SIGNAL = 6
+
+# RSI短期信号编码，对应rsi_analyzer._SHORT_SIGNAL_LABELS
+RSI_CROSS_UP, RSI_CROSS_DOWN = range(2)
+RSI_ENTER_OVERBOUGHT, RSI_ENTER_OVERSOLD, RSI_LEAVE_OVERBOUGHT, RSI_LEAVE_OVERSOLD = range(2, 6)
+RSI_NO_SIGNAL = 6
+
+# 均线交叉标志位：金叉、死叉，以及当天差值绝对值超过前一天1.5倍的强势交叉
+MA_CROSS_GOLDEN = 1
+MA_CROSS_DEATH = 2
+MA_CROSS_STRONG = 4
+
+
+@njit(cache=True, error_model='numpy')
+def nan_mean_std(values: np.ndarray) -> Tuple[float, float]:
+    """
+    跳过NaN计算均值与样本标准差（ddof=1），与pandas的mean()、std()一致
+    """
+    total = 0.0
+    count = 0
+    for x in values:
+        if not np.isnan(x):
+            total += x
+            count += 1
+    if count == 0:
+        return np.nan, np.nan
+    mean = total / count
+    if count < 2:
+        return mean, np.nan
+
+    squares = 0.0
+    for x in values:
+        if not np.isnan(x):
+            squares += (x - mean) ** 2
+    return mean, np.sqrt(squares / (count - 1))
+
+
+@njit(cache=True)
+def trend_slope(values: np.ndarray) -> float:
+    """
+    计算序列的趋势方向（线性回归斜率）
+
+    x取0..n-1时斜率为 Σ(x-x̄)·y / Σ(x-x̄)²，分母等于n(n²-1)/12；
+    x-x̄关于中点正负对称，先对对称位置的y作差再加权，常数序列的斜率恰好为0
+    """
+    n = len(values)
+    if n < 2:
+        return 0.0
+    center = (n - 1) / 2.0
+    total = 0.0
+    for i in range(n // 2):
+        total += (i - center) * (values[i] - values[n - 1 - i])
+    return total * 12.0 / (n * (n * n - 1))
+
+
+# _last_two_extremes4返回数组的各行：价格高点、价格低点、指标高点、指标低点
+_PRICE_HIGH, _PRICE_LOW, _INDICATOR_HIGH, _INDICATOR_LOW = range(4)
+
+
+@njit(cache=True)
+def _record_extreme(values: np.ndarray, i: int, high_row: int, extremes: np.ndarray, counts: np.ndarray) -> None:
+    """
+    判断values[i]是否为严格高于（低于）左右相邻点的局部高（低）点，
+    是则记入extremes对应行的下一个空位（该行已有两个时不再记录）
+    """
+    x = values[i]
+    if counts[high_row] < 2 and x > values[i - 1] and x > values[i + 1]:
+        extremes[high_row, counts[high_row]] = x
+        counts[high_row] += 1
+    low_row = high_row + 1
+    if counts[low_row] < 2 and x < values[i - 1] and x < values[i + 1]:
+        extremes[low_row, counts[low_row]] = x
+        counts[low_row] += 1
+
+
+@njit(cache=True)
+def _last_two_extremes4_scan(close: np.ndarray, indicator: np.ndarray) -> np.ndarray:
+    """
+    一次从右向左的遍历同时查找价格与指标（两者为同一窗口、长度相同）的局部高点与低点，四类极值各找到两个即停止
+
+    返回形状为(4, 2)的数组，各行依次为价格高点、价格低点、指标高点、指标低点，
+    每行为 (最后一个极值, 倒数第二个极值)，不足时对应位置为NaN
+    """
+    extremes = np.full((4, 2), np.nan)
+    counts = np.zeros(4, dtype=np.int64)
+    for i in range(len(close) - 2, 0, -1):
+        _record_extreme(close, i, _PRICE_HIGH, extremes, counts)
+        _record_extreme(indicator, i, _INDICATOR_HIGH, extremes, counts)
+        if counts.min() == 2:
+            break
+    return extremes
+
+
+def _last_two_extremes4_numpy(close: np.ndarray, indicator: np.ndarray) -> np.ndarray:
+    """
+    未安装numba时_last_two_extremes4_scan的NumPy实现，返回值相同
+
+    解释器中逐点扫描的耗时随无极值的区间长度增长（单边趋势时需扫完整个窗口），
+    这里用sliding_window_view取每个内部点与左右相邻点，整段一次比较出局部高点与低点，耗时与走势无关
+    """
+    extremes = np.full((4, 2), np.nan)
+    if len(close) < 3:
+        return extremes
+    for high_row, values in ((_PRICE_HIGH, close), (_INDICATOR_HIGH, indicator)):
+        window = sliding_window_view(values, 3)
+        left, mid, right = window[:, 0], window[:, 1], window[:, 2]
+        highs = mid[(mid > left) & (mid > right)][-2:][::-1]
+        lows = mid[(mid < left) & (mid < right)][-2:][::-1]
+        extremes[high_row, :len(highs)] = highs
+        extremes[high_row + 1, :len(lows)] = lows
+    return extremes
+
+
+# 安装了numba时用编译后的逐点扫描（找齐即停止），未安装时用整段比较的NumPy实现
+_last_two_extremes4 = _last_two_extremes4_scan if NUMBA_AVAILABLE else _last_two_extremes4_numpy
+
+
+@njit(cache=True)
+def extremes_divergence_code(close: np.ndarray, indicator: np.ndarray) -> int:
+    """
+    比较价格与指标最近两个局部高点（低点）：价格创新高而指标未创新高为顶背离，反之为底背离
+
+    极值不足两个时对应位置为NaN，与NaN的比较恒为False，不会判为背离
+    """
+    extremes = _last_two_extremes4(close, indicator)
+    price_high, prev_price_high = extremes[_PRICE_HIGH, 0], extremes[_PRICE_HIGH, 1]
+    indicator_high, prev_indicator_high = extremes[_INDICATOR_HIGH, 0], extremes[_INDICATOR_HIGH, 1]
+    if price_high > prev_price_high and indicator_high < prev_indicator_high:
+        return DIVERGENCE_TOP
+
+    price_low, prev_price_low = extremes[_PRICE_LOW, 0], extremes[_PRICE_LOW, 1]
+    indicator_low, prev_indicator_low = extremes[_INDICATOR_LOW, 0], extremes[_INDICATOR_LOW, 1]
+    if price_low < prev_price_low and indicator_low > prev_indicator_low:
+        return DIVERGENCE_BOTTOM
+
+    return DIVERGENCE_NONE
+
+
+@njit(cache=True)
+def macd_long_trend_code(dif: np.ndarray, dea: np.ndarray, hist: np.ndarray) -> int:
+    """
+    按DIF、DEA的趋势方向与MACD柱状量的累计值（跳过NaN）判断长期趋势
+    """
+    dif_trend = trend_slope(dif)
+    dea_trend = trend_slope(dea)
+    hist_sum = 0.0
+    for x in hist:
+        if not np.isnan(x):
+            hist_sum += x
+
+    if dif_trend > 0 and dea_trend > 0:
+        return MACD_LONG_STRONG_UP if hist_sum > 0 else MACD_LONG_UP_WEAKENING
+    elif dif_trend < 0 and dea_trend < 0:
+        return MACD_LONG_STRONG_DOWN if hist_sum < 0 else MACD_LONG_DOWN_WEAKENING
+    return MACD_LONG_CONSOLIDATION
+
+
+@njit(cache=True)
+def macd_medium_trend_code(hist: np.ndarray) -> int:
+    """
+    按MACD柱状量的趋势斜率判断中期趋势
+    """
+    slope = trend_slope(hist)
+    if abs(slope) < 0.1:
+        return MACD_MEDIUM_SIDEWAYS
+    elif slope > 0:
+        return MACD_MEDIUM_UP if slope > 0.3 else MACD_MEDIUM_WEAK_UP
+    else:
+        return MACD_MEDIUM_DOWN if slope < -0.3 else MACD_MEDIUM_WEAK_DOWN
+
+
+@njit(cache=True, error_model='numpy')
+def macd_strength_code(hist: np.ndarray) -> int:
+    """
+    按最新MACD柱状量的绝对值相对窗口标准差（样本标准差，跳过NaN）的倍数判断强度
+    """
+    latest = hist[-1]
+    _, std = nan_mean_std(hist)
+    current_strength = abs(latest)
+    if current_strength > 2 * std:
+        return MACD_VERY_STRONG if latest > 0 else MACD_VERY_WEAK
+    elif current_strength > std:
+        return MACD_STRONG if latest > 0 else MACD_WEAK
+    return MACD_NORMAL
+
+
+@njit(cache=True)
+def macd_short_signal_code(dif: np.ndarray, dea: np.ndarray, hist: np.ndarray) -> int:
+    """
+    按最近两天的DIF、DEA与MACD柱状值判断短期信号：先看金叉死叉，再看柱状放大缩小
+    """
+    # 判断金叉死叉
+    if dif[-1] > dea[-1] and dif[-2] <= dea[-2]:
+        return MACD_GOLDEN_CROSS
+    elif dif[-1] < dea[-1] and dif[-2] >= dea[-2]:
+        return MACD_DEATH_CROSS
+
+    # 判断MACD柱状的变化
+    if hist[-1] > 0 and hist[-1] > hist[-2]:
+        return MACD_RED_EXPANDING
+    elif hist[-1] > 0 and hist[-1] < hist[-2]:
+        return MACD_RED_SHRINKING
+    elif hist[-1] < 0 and hist[-1] < hist[-2]:
+        return MACD_GREEN_EXPANDING
+    elif hist[-1] < 0 and hist[-1] > hist[-2]:
+        return MACD_GREEN_SHRINKING
+
+    return MACD_NO_SIGNAL
+
+
+@njit(cache=True)
+def rsi_short_signal_code(rsi_6: np.ndarray, rsi_12: np.ndarray) -> int:
+    """
+    按最近两天的RSI6、RSI12判断短期信号：先看快慢线交叉，再看RSI6进出超买（80）超卖（20）区间
+    """
+    latest_fast, prev_fast = rsi_6[-1], rsi_6[-2]
+    latest_slow, prev_slow = rsi_12[-1], rsi_12[-2]
+
+    # 判断RSI交叉情况
+    if latest_fast > latest_slow and prev_fast <= prev_slow:
+        return RSI_CROSS_UP
+    elif latest_fast < latest_slow and prev_fast >= prev_slow:
+        return RSI_CROSS_DOWN
+
+    # 判断超买超卖区间突破
+    if latest_fast > 80 and prev_fast <= 80:
+        return RSI_ENTER_OVERBOUGHT
+    elif latest_fast < 20 and prev_fast >= 20:
+        return RSI_ENTER_OVERSOLD
+    elif latest_fast < 80 and prev_fast >= 80:
+        return RSI_LEAVE_OVERBOUGHT
+    elif latest_fast > 20 and prev_fast <= 20:
+        return RSI_LEAVE_OVERSOLD
+
+    return RSI_NO_SIGNAL
+
+
+@njit(cache=True)
+def _pair_cross_code(prev_row: np.ndarray, last_row: np.ndarray, short: int, long: int) -> int:
+    """
+    判断一对均线在最近两天是否交叉：差值（短期减长期）由负转正为金叉，由正转负为死叉
+    """
+    yesterday_diff = prev_row[short] - prev_row[long]
+    today_diff = last_row[short] - last_row[long]
+    if today_diff > 0 and yesterday_diff < 0:
+        code = MA_CROSS_GOLDEN
+    elif today_diff < 0 and yesterday_diff > 0:
+        code = MA_CROSS_DEATH
+    else:
+        return 0
+    if abs(today_diff) > abs(yesterday_diff) * 1.5:
+        code |= MA_CROSS_STRONG
+    return code
+
+
+@njit(cache=True)
+def ma_cross_codes(prev_row: np.ndarray, last_row: np.ndarray) -> np.ndarray:
+    """
+    判断固定四对均线的交叉，返回按对排列的标志位数组（0为无交叉）
+
+    行内列号与ma_system_analyzer._MA_COLUMNS一致：0、1、2、3依次为5、10、20、30日均线；
+    四对均线写成直线代码，不做循环
+    """
+    codes = np.empty(4, dtype=np.int64)
+    codes[0] = _pair_cross_code(prev_row, last_row, 0, 1)
+    codes[1] = _pair_cross_code(prev_row, last_row, 0, 2)
+    codes[2] = _pair_cross_code(prev_row, last_row, 1, 2)
+    codes[3] = _pair_cross_code(prev_row, last_row, 2, 3)
+    return codes
+
+
+@njit(cache=True, error_model='numpy')
+def macd_codes(dif: np.ndarray, dea: np.ndarray, hist: np.ndarray, close: np.ndarray,
+               n_long: int, n_medium: int, n_short: int) -> Tuple[int, int, int, int, int]:
+    """
+    一次调用算出MACD各维度编码：(长期趋势, 中期趋势, 短期信号, 背离, 强度)
+
+    长/中/短期窗口都是序列的尾部，按长度取视图，不复制数据；
+    长期窗口用于长期趋势和背离，中期窗口用于中期趋势和强度，短期窗口用于短期信号
+    """
+    n = len(hist)
+    long_start = n - n_long
+    medium_start = n - n_medium
+    short_start = n - n_short
+    long_hist = hist[long_start:]
+    medium_hist = hist[medium_start:]
+    return (macd_long_trend_code(dif[long_start:], dea[long_start:], long_hist),
+            macd_medium_trend_code(medium_hist),
+            macd_short_signal_code(dif[short_start:], dea[short_start:], hist[short_start:]),
+            extremes_divergence_code(close[long_start:], long_hist),
+            macd_strength_code(medium_hist))
+
+
+def warmup() -> None:
+    """
+    预先编译本模块的数值内核，未安装numba时不做任何事
+    """
+    if not NUMBA_AVAILABLE:
+        return
+    # pandas的to_numpy()返回只读数组，按只读数组编译才能与分析时的签名一致
+    values = np.ones(5)
+    values.flags.writeable = False
+    trend_slope(values)
+    macd_short_signal_code(values, values, values)
+    macd_long_trend_code(values, values, values)
+    macd_medium_trend_code(values)
+    macd_strength_code(values)
+    extremes_divergence_code(values, values)
+    macd_codes(values, values, values, values, 5, 5, 5)
+    nan_mean_std(values)
+    ma_cross_codes(values, values)
+    rsi_short_signal_code(values, values)
+
+
+# 设置环境变量EAGER_JIT=1时在导入阶段完成编译，否则在首次调用时编译
+if EAGER_JIT:
+    warmup()
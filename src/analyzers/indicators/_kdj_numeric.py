@@ -0,0 +1,204 @@
+"""
+KDJ指标判断的数值内核
+各函数接收K、D、J三条float64数组，返回判断结果的整数编码，由kdj_analyzer映射为中文标签；
+安装了numba时编译为本地代码，未安装时按普通Python函数运行，结果一致
+"""
+
+from typing import Tuple
+import numpy as np
+
+from ._njit import njit, NUMBA_AVAILABLE, EAGER_JIT
+from ._indicators_numba import nan_mean_std, DIVERGENCE_TOP, DIVERGENCE_BOTTOM, DIVERGENCE_NONE
+
+
+# 趋势编码，对应kdj_analyzer._TREND_LABELS
+TREND_STRONG_OVERBOUGHT, TREND_OVERBOUGHT, TREND_STRONG_OVERSOLD, TREND_OVERSOLD = range(4)
+TREND_BULLISH_MOMENTUM, TREND_BULLISH, TREND_BEARISH_MOMENTUM, TREND_BEARISH = range(4, 8)
+TREND_CONSOLIDATION, TREND_OSCILLATION = range(8, 10)
+
+# 交叉形态编码，对应kdj_analyzer._CROSS_LABELS
+CROSS_GOLDEN_CONFIRMED, CROSS_GOLDEN, CROSS_DEATH_CONFIRMED, CROSS_DEATH, CROSS_CRITICAL, CROSS_NONE = range(6)
+
+# 强度编码，对应kdj_analyzer._STRENGTH_LABELS
+STRENGTH_EXTREME, STRENGTH_STRONG, STRENGTH_MODERATE, STRENGTH_WEAK = range(4)
+
+# 三线排列编码，对应kdj_analyzer._PATTERN_LABELS
+PATTERN_BULLISH, PATTERN_BEARISH, PATTERN_PARALLEL, PATTERN_DIVERGING = range(4)
+
+
+@njit(cache=True, error_model='numpy')
+def kdj_stats(k: np.ndarray, d: np.ndarray, j: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    算出K、D、J三列的均值与样本标准差，返回 (means, stds)，两个数组均按K、D、J排列
+
+    三列在同一个循环里累加（先求和、再求离差平方和），共遍历窗口两次；
+    逐列的累加顺序与nan_mean_std相同，结果一致
+    """
+    columns = (k, d, j)
+    totals = np.zeros(3)
+    counts = np.zeros(3, dtype=np.int64)
+    for i in range(len(k)):
+        for c in range(3):
+            x = columns[c][i]
+            if not np.isnan(x):
+                totals[c] += x
+                counts[c] += 1
+
+    means = np.full(3, np.nan)
+    for c in range(3):
+        if counts[c] > 0:
+            means[c] = totals[c] / counts[c]
+
+    squares = np.zeros(3)
+    for i in range(len(k)):
+        for c in range(3):
+            x = columns[c][i]
+            if not np.isnan(x):
+                squares[c] += (x - means[c]) ** 2
+
+    stds = np.full(3, np.nan)
+    for c in range(3):
+        if counts[c] > 1:
+            stds[c] = np.sqrt(squares[c] / (counts[c] - 1))
+    return means, stds
+
+
+@njit(cache=True)
+def centered_extremes(values: np.ndarray, center: int) -> Tuple[float, float]:
+    """
+    一次遍历取以center为中心、宽度为5的窗口内的最大值与最小值
+
+    与rolling(window=5, center=True)在该位置的结果一致：窗口超出序列范围或含NaN时为NaN，
+    因此最新一天（右侧不足2天）恒为NaN
+    """
+    if center < 2 or center + 3 > len(values):
+        return np.nan, np.nan
+    high = -np.inf
+    low = np.inf
+    for i in range(center - 2, center + 3):
+        x = values[i]
+        if np.isnan(x):
+            return np.nan, np.nan
+        if x > high:
+            high = x
+        if x < low:
+            low = x
+    return high, low
+
+
+@njit(cache=True)
+def divergence_code(close: np.ndarray, kdj_k: np.ndarray) -> int:
+    """
+    比较最新一天与往前第5天两个位置的5日居中极值，判断价格与K值的顶背离、底背离
+    """
+    last = len(close) - 1
+    prev = len(close) - 5
+    price_high, price_low = centered_extremes(close, last)
+    prev_price_high, prev_price_low = centered_extremes(close, prev)
+    kdj_high, kdj_low = centered_extremes(kdj_k, last)
+    prev_kdj_high, prev_kdj_low = centered_extremes(kdj_k, prev)
+
+    if price_high > prev_price_high and kdj_high < prev_kdj_high:
+        return DIVERGENCE_TOP
+    elif price_low < prev_price_low and kdj_low > prev_kdj_low:
+        return DIVERGENCE_BOTTOM
+    return DIVERGENCE_NONE
+
+
+@njit(cache=True, error_model='numpy')
+def trend_code(k: np.ndarray, d: np.ndarray, j: np.ndarray, k_mean: float, k_std: float) -> int:
+    """
+    判断KDJ趋势：超买超卖优先，其次看K值相对均值±1倍标准差的位置与三线斜率
+    """
+    n = len(k)
+
+    # 计算KDJ趋势斜率
+    k_slope = (k[-1] - k[0]) / n
+    d_slope = (d[-1] - d[0]) / n
+    j_slope = (j[-1] - j[0]) / n
+
+    # 判断超买超卖
+    if j[-1] > 100:
+        return TREND_STRONG_OVERBOUGHT if j[-1] > 110 else TREND_OVERBOUGHT
+    elif j[-1] < 0:
+        return TREND_STRONG_OVERSOLD if j[-1] < -10 else TREND_OVERSOLD
+    elif k[-1] > k_mean + k_std:
+        if k_slope > 0 and d_slope > 0 and j_slope > 0:
+            return TREND_BULLISH_MOMENTUM
+        return TREND_BULLISH
+    elif k[-1] < k_mean - k_std:
+        if k_slope < 0 and d_slope < 0 and j_slope < 0:
+            return TREND_BEARISH_MOMENTUM
+        return TREND_BEARISH
+    elif abs(k_slope) < 0.1 and abs(d_slope) < 0.1:
+        return TREND_CONSOLIDATION
+    return TREND_OSCILLATION
+
+
+@njit(cache=True)
+def cross_code(k: np.ndarray, d: np.ndarray, j: np.ndarray) -> int:
+    """
+    判断最近两天K、D线的交叉形态
+    """
+    if k[-1] > d[-1] and k[-2] <= d[-2]:
+        return CROSS_GOLDEN_CONFIRMED if j[-1] > k[-1] else CROSS_GOLDEN
+    elif k[-1] < d[-1] and k[-2] >= d[-2]:
+        return CROSS_DEATH_CONFIRMED if j[-1] < k[-1] else CROSS_DEATH
+    elif abs(k[-1] - d[-1]) < 1:
+        return CROSS_CRITICAL
+    return CROSS_NONE
+
+
+@njit(cache=True, error_model='numpy')
+def strength_code(k: np.ndarray, d: np.ndarray, j: np.ndarray, means: np.ndarray, stds: np.ndarray) -> int:
+    """
+    按最新K、D、J值偏离各自均值的标准差倍数（三者平均）判断强度，means/stds取自kdj_stats
+    """
+    k_dev = abs(k[-1] - means[0]) / stds[0]
+    d_dev = abs(d[-1] - means[1]) / stds[1]
+    j_dev = abs(j[-1] - means[2]) / stds[2]
+
+    avg_dev = (k_dev + d_dev + j_dev) / 3
+    if avg_dev > 2:
+        return STRENGTH_EXTREME
+    elif avg_dev > 1.5:
+        return STRENGTH_STRONG
+    elif avg_dev > 1:
+        return STRENGTH_MODERATE
+    return STRENGTH_WEAK
+
+
+@njit(cache=True)
+def pattern_code(k: np.ndarray, d: np.ndarray, j: np.ndarray) -> int:
+    """
+    判断最新一天三线的排列关系
+    """
+    if j[-1] > k[-1] > d[-1]:
+        return PATTERN_BULLISH
+    elif j[-1] < k[-1] < d[-1]:
+        return PATTERN_BEARISH
+    elif abs(k[-1] - d[-1]) < 2:
+        return PATTERN_PARALLEL
+    return PATTERN_DIVERGING
+
+
+def warmup() -> None:
+    """
+    预先编译KDJ数值内核，未安装numba时不做任何事
+    """
+    if not NUMBA_AVAILABLE:
+        return
+    # pandas的to_numpy()返回只读数组，按只读数组编译才能与分析时的签名一致
+    values = np.ones(5)
+    values.flags.writeable = False
+    means, stds = kdj_stats(values, values, values)
+    trend_code(values, values, values, means[0], stds[0])
+    cross_code(values, values, values)
+    strength_code(values, values, values, means, stds)
+    pattern_code(values, values, values)
+    divergence_code(values, values)
+
+
+# 设置环境变量EAGER_JIT=1时在导入阶段完成编译，否则在首次调用时编译
+if EAGER_JIT:
+    warmup()
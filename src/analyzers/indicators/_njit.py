@@ -0,0 +1,43 @@
+"""
+Numba JIT兼容层
+安装了numba时使用njit将数值内核编译为本地代码；
+未安装时退化为原样返回函数的装饰器，分析结果保持一致，只是运行在解释器中
+"""
+import os
+
+# 各数值内核默认在首次调用时编译（有cache=True的磁盘缓存时只是加载）；
+# 设置环境变量EAGER_JIT=1时各模块在导入阶段调用warmup()完成编译，把首次分析的编译延迟提前到启动阶段
+EAGER_JIT = os.environ.get('EAGER_JIT') == '1'
+
+try:
+    from numba import njit as _numba_njit, prange
+    NUMBA_AVAILABLE = True
+
+    # numba的磁盘缓存按源文件存放，缓存内容中记录了被调用内核所在模块的完整名称；
+    # 本包通过src.analyzers以外的路径导入时（如把src加入sys.path后的analyzers），
+    # 两种路径会读到对方写入的缓存并因找不到对应模块而导入失败，因此只在src.analyzers下使用磁盘缓存
+    _CACHE_ENABLED = __name__.startswith('src.')
+
+    def njit(*args, **kwargs):
+        """
+        numba.njit，非src.analyzers导入路径下关闭cache
+        """
+        if not _CACHE_ENABLED:
+            kwargs['cache'] = False
+        return _numba_njit(*args, **kwargs)
+except ImportError:
+    NUMBA_AVAILABLE = False
+    prange = range
+
+    def njit(*args, **kwargs):
+        """
+        numba.njit的替身，同时支持 @njit 与 @njit(...) 两种写法
+        """
+        if len(args) == 1 and callable(args[0]) and not kwargs:
+            return args[0]
+
+        def decorator(func):
+            return func
+        return decorator
+
+__all__ = ['njit', 'prange', 'NUMBA_AVAILABLE', 'EAGER_JIT']
@@ -2,24 +2,163 @@
 布林带(BOLL)指标分析模块
 分析布林带的趋势和信号，提供全面的技术分析
 """
-from typing import Dict, Any, List, Tuple
+import os
+from typing import Dict, Any, NamedTuple, Optional
+from concurrent.futures import ProcessPoolExecutor
+from dataclasses import dataclass
 import pandas as pd
 import numpy as np
-from enum import Enum
-
-class TrendStrength(Enum):
-    VERY_STRONG = "很强"
-    STRONG = "强"
-    MODERATE = "中等"
-    WEAK = "弱"
-    VERY_WEAK = "很弱"
-
-class BollSignal(Enum):
-    STRONG_BUY = "强烈买入"
-    BUY = "买入"
-    HOLD = "持有"
-    SELL = "卖出"
-    STRONG_SELL = "强烈卖出"
+from numpy.lib.stride_tricks import sliding_window_view
+from enum import IntEnum
+from functools import lru_cache
+from ._njit import njit, prange, NUMBA_AVAILABLE, EAGER_JIT
+from ._indicators_numba import trend_slope
+
+class _BollColumns(NamedTuple):
+    """
+    布林带分析所需的列数组
+    """
+    close: np.ndarray
+    upper: np.ndarray
+    mid: np.ndarray
+    lower: np.ndarray
+
+class LongTermTrend(IntEnum):
+    STRONG_UP = 0
+    UP = 1
+    STRONG_DOWN = 2
+    DOWN = 3
+    HIGH_RANGE = 4
+    LOW_RANGE = 5
+    MID_RANGE = 6
+
+class MediumTermTrend(IntEnum):
+    NARROW_RANGE = 0
+    WIDE_RANGE = 1
+    FAST_UP = 2
+    SLOW_UP = 3
+    FAST_DOWN = 4
+    SLOW_DOWN = 5
+
+class ShortTermSignal(IntEnum):
+    BREAK_UPPER = 0
+    BREAK_LOWER = 1
+    BACK_BELOW_UPPER = 2
+    BACK_ABOVE_LOWER = 3
+    CROSS_ABOVE_MID = 4
+    CROSS_BELOW_MID = 5
+    IN_RANGE = 6
+
+class BandwidthLevel(IntEnum):
+    VERY_WIDE = 0
+    WIDE = 1
+    MODERATE = 2
+    NARROW = 3
+
+class BandwidthTrend(IntEnum):
+    EXPANDING = 0
+    CONTRACTING = 1
+    STEADY = 2
+
+class BollPattern(IntEnum):
+    UPPER_EXPANSION = 0
+    LOWER_EXPANSION = 1
+    UPPER_CONTRACTION = 2
+    LOWER_CONTRACTION = 3
+    MID_BALANCE = 4
+    NORMAL = 5
+
+class BollStrength(IntEnum):
+    VERY_STRONG = 0
+    VERY_WEAK = 1
+    STRONG = 2
+    WEAK = 3
+    SLIGHTLY_STRONG = 4
+    SLIGHTLY_WEAK = 5
+    NEUTRAL = 6
+
+@dataclass(frozen=True)
+class BollResult:
+    """
+    单只股票的布林带分析结果
+    
+    使用__slots__固定字段，批量扫描大量股票时比逐只构造字典更省内存；
+    需要文字描述时通过format_boll_result转换
+    """
+    __slots__ = (
+        'upper', 'mid', 'lower', 'long_term_trend', 'medium_term_trend', 'short_term_signal',
+        'bandwidth_level', 'bandwidth_trend', 'pattern', 'strength', 'signal'
+    )
+    upper: float
+    mid: float
+    lower: float
+    long_term_trend: LongTermTrend
+    medium_term_trend: MediumTermTrend
+    short_term_signal: ShortTermSignal
+    bandwidth_level: BandwidthLevel
+    bandwidth_trend: BandwidthTrend
+    pattern: BollPattern
+    strength: BollStrength
+    signal: str
+
+# 各维度编码对应的文字描述，编码值即为下标；数值内核直接返回这些编码
+_LONG_TERM_TRENDS = (
+    "强势上涨（40天）", "上涨趋势（40天）", "强势下跌（40天）", "下跌趋势（40天）",
+    "高位震荡（40天）", "低位震荡（40天）", "中位震荡（40天）"
+)
+_MEDIUM_TERM_TRENDS = ("窄幅震荡", "宽幅震荡", "快速上升", "缓慢上升", "快速下降", "缓慢下降")
+_SHORT_TERM_SIGNALS = (
+    "突破上轨", "突破下轨", "回落至上轨下方", "反弹至下轨上方", "突破中轨", "跌破中轨", "区间运行"
+)
+_BANDWIDTH_LEVELS = ("带宽过大", "带宽较大", "带宽适中", "带宽收窄")
+_BANDWIDTH_TRENDS = ("扩大", "收窄", "平稳")
+_BANDWIDTH_STATES = tuple(
+    f"{level}（{trend}）" for level in _BANDWIDTH_LEVELS for trend in _BANDWIDTH_TRENDS
+)
+_PATTERNS = ("上轨扩张", "下轨扩张", "上轨收敛", "下轨收敛", "中轨平衡", "常态运行")
+_STRENGTHS = ("极强", "极弱", "较强", "较弱", "偏强", "偏弱", "中性")
+
+# 批量分析使用的时间窗口，与technical_indicators中的划分保持一致
+_LONG_WINDOW = 40
+_MEDIUM_WINDOW = 20
+_SHORT_WINDOW = 10
+
+# 未安装numba时，股票数超过该值才启用进程池，避免进程启动开销超过计算本身
+_PARALLEL_MIN_TICKERS = 256
+
+# 收盘价与轨道的关系编码：低于、等于、高于、无法比较（存在NaN）
+_BELOW, _EQUAL, _ABOVE, _UNORDERED = 0, 1, 2, 3
+
+def _build_short_term_table() -> np.ndarray:
+    """
+    预先计算短期信号的状态转移表
+    
+    今日/昨日收盘价分别相对上轨、下轨、中轨的关系共6项，每项2位拼成下标，
+    表中的值按原有判断顺序给出短期信号编码
+    """
+    table = np.empty(4 ** 6, dtype=np.int64)
+    for index in range(4 ** 6):
+        now_u, prev_u, now_l, prev_l, now_m, prev_m = ((index >> shift) & 3 for shift in (10, 8, 6, 4, 2, 0))
+        # 判断突破情况
+        if now_u == _ABOVE and prev_u in (_BELOW, _EQUAL):
+            code = ShortTermSignal.BREAK_UPPER
+        elif now_l == _BELOW and prev_l in (_EQUAL, _ABOVE):
+            code = ShortTermSignal.BREAK_LOWER
+        elif now_u == _BELOW and prev_u in (_EQUAL, _ABOVE):
+            code = ShortTermSignal.BACK_BELOW_UPPER
+        elif now_l == _ABOVE and prev_l in (_BELOW, _EQUAL):
+            code = ShortTermSignal.BACK_ABOVE_LOWER
+        # 判断中轨穿越
+        elif now_m == _ABOVE and prev_m in (_BELOW, _EQUAL):
+            code = ShortTermSignal.CROSS_ABOVE_MID
+        elif now_m == _BELOW and prev_m in (_EQUAL, _ABOVE):
+            code = ShortTermSignal.CROSS_BELOW_MID
+        else:
+            code = ShortTermSignal.IN_RANGE
+        table[index] = code
+    return table
+
+_SHORT_TERM_TABLE = _build_short_term_table()
 
 def analyze_boll(df: pd.DataFrame, long_term: pd.DataFrame, medium_term: pd.DataFrame, short_term: pd.DataFrame) -> Dict[str, Any]:
     """
@@ -34,251 +173,511 @@ def analyze_boll(df: pd.DataFrame, long_term: pd.DataFrame, medium_term: pd.Data
     返回:
         Dict[str, Any]: 布林带综合分析结果
     """
-    latest = df.iloc[-1]
+    return format_boll_result(analyze_boll_codes(df, long_term, medium_term, short_term))
+
+def analyze_boll_codes(df: pd.DataFrame, long_term: pd.DataFrame, medium_term: pd.DataFrame, short_term: pd.DataFrame) -> BollResult:
+    """
+    分析布林带指标数据，各维度以编码而非文字描述返回
     
-    # 收集各维度分析结果
-    signals = {}
+    参数与analyze_boll相同；需要展示时再通过format_boll_result转换为文字
     
-    # 1. 分析长期趋势（40天）
-    signals['long_term_trend'] = _analyze_long_term_trend(long_term)
+    返回:
+        BollResult: 最新轨道值、各维度编码及综合信号
+    """
+    # 长/中/短期窗口都是df的尾部，四列只从df提取一次，各窗口在内核中按长度切片
+    columns = _extract(df)
+    long_code, medium_code, short_code, bandwidth_code, pattern_code, strength_code = _boll_kernel(
+        columns.close, columns.upper, columns.mid, columns.lower,
+        len(long_term), len(medium_term), len(short_term)
+    )
+    level, trend = divmod(bandwidth_code, 3)
+    return BollResult(
+        columns.upper[-1], columns.mid[-1], columns.lower[-1],
+        LongTermTrend(long_code), MediumTermTrend(medium_code), ShortTermSignal(short_code),
+        BandwidthLevel(level), BandwidthTrend(trend), BollPattern(pattern_code), BollStrength(strength_code),
+        _generate_composite_signal(long_code, medium_code, short_code, level, trend, pattern_code, strength_code)
+    )
+
+def format_boll_result(result: BollResult) -> Dict[str, Any]:
+    """
+    将布林带分析结果的各维度编码转换为文字描述
     
-    # 2. 分析中期趋势（20天）
-    signals['medium_term_trend'] = _analyze_medium_term_trend(medium_term)
+    参数:
+        result (BollResult): analyze_boll_codes的返回结果
+        
+    返回:
+        Dict[str, Any]: 与analyze_boll相同的结果字典
+    """
+    return {
+        'UPPER': result.upper,
+        'MID': result.mid,
+        'LOWER': result.lower,
+        'long_term_trend': _LONG_TERM_TRENDS[result.long_term_trend],
+        'medium_term_trend': _MEDIUM_TERM_TRENDS[result.medium_term_trend],
+        'short_term_signal': _SHORT_TERM_SIGNALS[result.short_term_signal],
+        'bandwidth': _BANDWIDTH_STATES[result.bandwidth_level * 3 + result.bandwidth_trend],
+        'pattern': _PATTERNS[result.pattern],
+        'strength': _STRENGTHS[result.strength],
+        'signal': result.signal
+    }
+
+def analyze_boll_batch(df_long: pd.DataFrame, ticker_col: str = 'ts_code', date_col: str = 'trade_date',
+                       dtype: Any = np.float64) -> pd.DataFrame:
+    """
+    横截面批量分析多只股票的布林带指标
     
-    # 3. 分析短期信号（10天）
-    signals['short_term_signal'] = _analyze_short_term_signal(short_term)
+    与逐只调用analyze_boll的结果一致（长/中/短期窗口分别取每只股票最近40/20/10个交易日），
+    但带宽、价格位置、斜率等全部按列向量化计算，一次调用覆盖所有股票
     
-    # 4. 分析带宽
-    signals['bandwidth'] = _analyze_bandwidth(medium_term)
+    参数:
+        df_long (pd.DataFrame): 长表数据，每行为一只股票一个交易日，
+            需包含 close、boll_upper、boll_mid、boll_lower 列
+        ticker_col (str): 股票代码列名
+        date_col (str): 交易日期列名
+        dtype: 中间计算使用的浮点类型，全市场扫描时可传np.float32以减半内存带宽；
+            阈值判断在float32精度下基本一致，但恰好落在阈值附近的股票可能与analyze_boll结果不同
+        
+    返回:
+        pd.DataFrame: 以股票代码为索引，每行为该股票的布林带综合分析结果
+    """
+    data = df_long.sort_values([ticker_col, date_col], kind='stable')
+    tickers = data[ticker_col].to_numpy()
+    close = data['close'].to_numpy(dtype=dtype)
+    upper = data['boll_upper'].to_numpy(dtype=dtype)
+    mid = data['boll_mid'].to_numpy(dtype=dtype)
+    lower = data['boll_lower'].to_numpy(dtype=dtype)
+    
+    # 排序后同一股票的数据连续存放，按分组边界做reduceat归约
+    is_start = np.ones(len(tickers), dtype=bool)
+    is_start[1:] = tickers[1:] != tickers[:-1]
+    starts = np.flatnonzero(is_start)
+    ends = np.append(starts[1:], len(tickers))
+    sizes = ends - starts
+    group_id = np.cumsum(is_start) - 1
+    # 距最新交易日的偏移，0为最新一天
+    rank = ends[group_id] - 1 - np.arange(len(tickers))
+    
+    last = ends - 1
+    prev = np.maximum(ends - 2, starts)
+    
+    with np.errstate(divide='ignore', invalid='ignore'):
+        # 上下轨重合（停牌、一字板等）时价格位置按居中处理，中轨为0时带宽记为0，缺失值仍保持NaN
+        bandwidth = np.divide(upper - lower, mid, out=np.zeros_like(mid), where=mid != 0) * 100.0
+        channel = upper - lower
+        position = np.divide(close - lower, channel, out=np.full_like(close, 0.5), where=channel != 0)
+        
+        # 1. 长期趋势（40天）
+        mid_trend = _window_slope(mid, rank, sizes, group_id, starts, _LONG_WINDOW)
+        in_long = (rank < _LONG_WINDOW) & ~np.isnan(position)
+        avg_position = (np.add.reduceat(np.where(in_long, position, 0.0), starts)
+                        / np.add.reduceat(in_long.astype(np.int64), starts))
+        long_code = np.select(
+            [(mid_trend > 0) & (avg_position > 0.7), mid_trend > 0,
+             (mid_trend < 0) & (avg_position < 0.3), mid_trend < 0,
+             avg_position > 0.6, avg_position < 0.4],
+            [0, 1, 2, 3, 4, 5], 6
+        )
+        
+        # 2. 中期趋势（20天）
+        bandwidth_trend = _window_slope(bandwidth, rank, sizes, group_id, starts, _MEDIUM_WINDOW)
+        mid_slope = _window_slope(mid, rank, sizes, group_id, starts, _MEDIUM_WINDOW)
+        flat = np.abs(mid_slope) < 0.1
+        medium_code = np.select(
+            [flat & (np.abs(bandwidth_trend) < 0.1), flat,
+             mid_slope > 0.3, mid_slope > 0, mid_slope < -0.3],
+            [0, 1, 2, 3, 4], 5
+        )
+        
+        # 3. 短期信号（10天）
+        c, cp = close[last], close[prev]
+        u, up = upper[last], upper[prev]
+        m, mp = mid[last], mid[prev]
+        l, lp = lower[last], lower[prev]
+        short_code = _SHORT_TERM_TABLE[
+            _relation(c, u) << 10 | _relation(cp, up) << 8
+            | _relation(c, l) << 6 | _relation(cp, lp) << 4
+            | _relation(c, m) << 2 | _relation(cp, mp)
+        ]
+        
+        # 4. 带宽：最近5天带宽是否单调扩大/收窄
+        # 每只股票只取最后5天的滑动窗口视图做差分，前端补NaN保证窗口不越界
+        padded = np.concatenate((np.full(4, np.nan, dtype=bandwidth.dtype), bandwidth))
+        steps = np.diff(sliding_window_view(padded, 5)[last], axis=1)
+        # 第j个差分的后一天距最新交易日3-j天，需落在该股票的中期窗口内
+        medium_size = np.minimum(sizes, _MEDIUM_WINDOW)
+        valid = np.arange(3, -1, -1) < (medium_size - 1)[:, None]
+        rising = ~(valid & ~(steps >= 0)).any(axis=1)
+        falling = ~(valid & ~(steps <= 0)).any(axis=1)
+        trend = np.where(rising, 0, np.where(falling, 1, 2))
+        current = bandwidth[last]
+        level = np.select([current > 4, current > 3, current > 2], [0, 1, 2], 3)
+        
+        # 5. 布林带形态
+        latest_position = position[last]
+        pattern_trend = _window_slope(bandwidth, rank, sizes, group_id, starts, _SHORT_WINDOW)
+        pattern_code = np.select(
+            [(latest_position > 0.8) & (pattern_trend > 0), (latest_position < 0.2) & (pattern_trend > 0),
+             (latest_position > 0.8) & (pattern_trend < 0), (latest_position < 0.2) & (pattern_trend < 0),
+             np.abs(latest_position - 0.5) < 0.1],
+            [0, 1, 2, 3, 4], 5
+        )
+        
+        # 6. 趋势强度
+        above_mid = c > m
+        very = (current > 4) | (latest_position > 0.9) | (latest_position < 0.1)
+        fairly = (current > 3) | (latest_position > 0.8) | (latest_position < 0.2)
+        slightly = (current > 2) | (latest_position > 0.7) | (latest_position < 0.3)
+        strength_code = np.select(
+            [very & above_mid, very, fairly & above_mid, fairly, slightly & above_mid, slightly],
+            [0, 1, 2, 3, 4, 5], 6
+        )
+    
+    # 最新轨道值直接取原始列，不受中间计算精度影响
+    result = pd.DataFrame({
+        'UPPER': data['boll_upper'].to_numpy()[last],
+        'MID': data['boll_mid'].to_numpy()[last],
+        'LOWER': data['boll_lower'].to_numpy()[last],
+        'long_term_trend': np.asarray(_LONG_TERM_TRENDS, dtype=object)[long_code],
+        'medium_term_trend': np.asarray(_MEDIUM_TERM_TRENDS, dtype=object)[medium_code],
+        'short_term_signal': np.asarray(_SHORT_TERM_SIGNALS, dtype=object)[short_code],
+        'bandwidth': np.asarray(_BANDWIDTH_STATES, dtype=object)[level * 3 + trend],
+        'pattern': np.asarray(_PATTERNS, dtype=object)[pattern_code],
+        'strength': np.asarray(_STRENGTHS, dtype=object)[strength_code],
+    }, index=pd.Index(tickers[starts], name=ticker_col))
+    
+    # 综合信号基于各维度编码生成
+    result['signal'] = [
+        _generate_composite_signal(*row)
+        for row in zip(long_code.tolist(), medium_code.tolist(), short_code.tolist(),
+                       level.tolist(), trend.tolist(), pattern_code.tolist(), strength_code.tolist())
+    ]
+    return result
+
+def analyze_boll_batch_parallel(prices: np.ndarray, max_workers: Optional[int] = None) -> np.ndarray:
+    """
+    多核并行分析多只股票的布林带指标
     
-    # 5. 分析布林带形态
-    signals['pattern'] = _analyze_boll_pattern(short_term)
+    安装了numba时在编译后的内核中用prange按股票并行；未安装时按股票分块交给进程池处理
     
-    # 6. 分析趋势强度
-    signals['strength'] = _analyze_strength(medium_term)
+    参数:
+        prices (np.ndarray): 形状为(股票数, 交易日数, 4)的数组，最后一维依次为
+            close、boll_upper、boll_mid、boll_lower，交易日按时间升序且各股票对齐
+        max_workers (Optional[int]): 未安装numba时进程池的进程数，默认为CPU核数
+        
+    返回:
+        np.ndarray: 形状为(股票数, 6)的编码数组，各列依次为长期趋势、中期趋势、短期信号、
+            带宽状态（带宽等级 * 3 + 带宽趋势）、形态、强度
+    """
+    if NUMBA_AVAILABLE or len(prices) < _PARALLEL_MIN_TICKERS:
+        return _boll_codes(prices, _LONG_WINDOW, _MEDIUM_WINDOW, _SHORT_WINDOW)
+    
+    workers = max_workers or os.cpu_count() or 1
+    chunks = np.array_split(prices, workers)
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        results = pool.map(
+            _boll_codes, chunks,
+            [_LONG_WINDOW] * len(chunks), [_MEDIUM_WINDOW] * len(chunks), [_SHORT_WINDOW] * len(chunks)
+        )
+        return np.concatenate(list(results))
+
+@njit(cache=True, parallel=True)
+def _boll_codes(prices, n_long, n_medium, n_short):
+    """
+    逐只股票调用布林带内核，numba下按股票并行
+    """
+    n_tickers = prices.shape[0]
+    codes = np.empty((n_tickers, 6), dtype=np.int64)
+    for i in prange(n_tickers):
+        long_code, medium_code, short_code, bandwidth_code, pattern_code, strength_code = _boll_kernel(
+            prices[i, :, 0], prices[i, :, 1], prices[i, :, 2], prices[i, :, 3], n_long, n_medium, n_short
+        )
+        codes[i, 0] = long_code
+        codes[i, 1] = medium_code
+        codes[i, 2] = short_code
+        codes[i, 3] = bandwidth_code
+        codes[i, 4] = pattern_code
+        codes[i, 5] = strength_code
+    return codes
+
+def _window_slope(values: np.ndarray, rank: np.ndarray, sizes: np.ndarray, group_id: np.ndarray,
+                  starts: np.ndarray, window: int) -> np.ndarray:
+    """
+    按股票分组计算最近window个交易日的线性回归斜率（闭式解），与trend_slope一致：
+    先对关于窗口中点对称的两天作差再加权，常数序列的斜率恰好为0；窗口内存在NaN时结果为NaN，不足两天时为0
+    """
+    n = np.minimum(sizes, window)
+    n_row = n[group_id]
+    # 窗口内的下标（0为最早一天），只取前一半与其对称位置配对
+    i = n_row - 1 - rank
+    paired = (i >= 0) & (i < n_row // 2)
+    mirror = np.where(paired, np.arange(len(values)) + (n_row - 1 - 2 * i), 0)
+    x_centered = (i - (n_row - 1) / 2.0).astype(values.dtype, copy=False)
+    weighted = np.where(paired, x_centered * (values - values[mirror]), 0.0)
+    n = n.astype(values.dtype)
+    denominator = n * (n * n - 1)
+    return np.divide(np.add.reduceat(weighted, starts) * 12.0, denominator,
+                     out=np.zeros_like(denominator), where=denominator != 0)
+
+def _extract(df: pd.DataFrame) -> _BollColumns:
+    """
+    一次性提取布林带分析所需的列数组
+    """
+    return _BollColumns(
+        df['close'].to_numpy(dtype=np.float64),
+        df['boll_upper'].to_numpy(dtype=np.float64),
+        df['boll_mid'].to_numpy(dtype=np.float64),
+        df['boll_lower'].to_numpy(dtype=np.float64)
+    )
+
+@njit(cache=True, nogil=True, error_model='numpy')
+def _boll_kernel(close, upper, mid, lower, n_long, n_medium, n_short):
+    """
+    布林带数值分析内核
     
-    # 7. 生成综合信号
-    signals['signal'] = _generate_composite_signal(signals)
+    参数:
+        close, upper, mid, lower: 完整数据的收盘价与上/中/下轨
+        n_long, n_medium, n_short: 长/中/短期窗口长度，各窗口均为完整数据的尾部
+        
+    返回:
+        (长期趋势, 中期趋势, 短期信号, 带宽状态, 形态, 强度) 六个维度的编码
+    """
+    close_l, upper_l, mid_l, lower_l = close[-n_long:], upper[-n_long:], mid[-n_long:], lower[-n_long:]
+    close_m, upper_m, mid_m, lower_m = close[-n_medium:], upper[-n_medium:], mid[-n_medium:], lower[-n_medium:]
     
-    return {
-        'UPPER': latest['boll_upper'],
-        'MID': latest['boll_mid'],
-        'LOWER': latest['boll_lower'],
-        'long_term_trend': signals['long_term_trend'],
-        'medium_term_trend': signals['medium_term_trend'],
-        'short_term_signal': signals['short_term_signal'],
-        'bandwidth': signals['bandwidth'],
-        'pattern': signals['pattern'],
-        'strength': signals['strength'],
-        'signal': signals['signal']
-    }
+    # 中期窗口的带宽序列只计算一次，带宽、形态与强度分析共用
+    bandwidth = np.empty(mid_m.shape[0])
+    for i in range(mid_m.shape[0]):
+        bandwidth[i] = _bandwidth(upper_m[i], mid_m[i], lower_m[i])
+    
+    # 1. 长期趋势（40天）
+    long_code = _long_term_code(close_l, upper_l, mid_l, lower_l)
+    
+    # 2. 中期趋势（20天）
+    medium_code = _medium_term_code(mid_m, bandwidth)
+    
+    # 3. 短期信号（10天）
+    short_code = _short_term_code(close_m, upper_m, mid_m, lower_m)
+    
+    # 4. 带宽
+    bandwidth_code = _bandwidth_code(bandwidth)
+    
+    # 5. 布林带形态
+    pattern_code = _pattern_code(close_m[-1], upper_m[-1], lower_m[-1], bandwidth[-n_short:])
+    
+    # 6. 趋势强度
+    strength_code = _strength_code(close_m[-1], upper_m[-1], mid_m[-1], lower_m[-1], bandwidth[-1])
+    
+    return long_code, medium_code, short_code, bandwidth_code, pattern_code, strength_code
 
-def _analyze_long_term_trend(data: pd.DataFrame) -> str:
+@njit(cache=True, error_model='numpy')
+def _long_term_code(close, upper, mid, lower):
     """
     分析布林带长期趋势（40天）
     """
     # 计算中轨趋势
-    mid_trend = _calculate_trend_direction(data['boll_mid'])
-    
-    # 计算价格相对于布林带的位置
-    position_ratio = (data['close'] - data['boll_lower']) / (data['boll_upper'] - data['boll_lower'])
-    avg_position = position_ratio.mean()
+    mid_trend = trend_slope(mid)
+    
+    # 计算价格相对于布林带的平均位置（与pandas的mean一致，忽略NaN）
+    total = 0.0
+    count = 0
+    for i in range(close.shape[0]):
+        position = _position(close[i], upper[i], lower[i])
+        if not np.isnan(position):
+            total += position
+            count += 1
+    avg_position = total / count if count > 0 else np.nan
     
     if mid_trend > 0:
-        if avg_position > 0.7:
-            return "强势上涨（40天）"
-        else:
-            return "上涨趋势（40天）"
+        return 0 if avg_position > 0.7 else 1
     elif mid_trend < 0:
-        if avg_position < 0.3:
-            return "强势下跌（40天）"
-        else:
-            return "下跌趋势（40天）"
+        return 2 if avg_position < 0.3 else 3
+    elif avg_position > 0.6:
+        return 4
+    elif avg_position < 0.4:
+        return 5
     else:
-        if avg_position > 0.6:
-            return "高位震荡（40天）"
-        elif avg_position < 0.4:
-            return "低位震荡（40天）"
-        else:
-            return "中位震荡（40天）"
+        return 6
 
-def _analyze_medium_term_trend(data: pd.DataFrame) -> str:
+@njit(cache=True, error_model='numpy')
+def _medium_term_code(mid, bandwidth):
     """
     分析布林带中期趋势（20天）
     """
-    # 计算带宽变化趋势
-    bandwidth = (data['boll_upper'] - data['boll_lower']) / data['boll_mid'] * 100
-    bandwidth_trend = _calculate_trend_slope(bandwidth)
-    
-    # 计算中轨斜率
-    mid_slope = _calculate_trend_slope(data['boll_mid'])
+    # 计算带宽变化趋势与中轨斜率
+    bandwidth_trend = trend_slope(bandwidth)
+    mid_slope = trend_slope(mid)
     
     if abs(mid_slope) < 0.1:
-        if abs(bandwidth_trend) < 0.1:
-            return "窄幅震荡"
-        else:
-            return "宽幅震荡"
+        return 0 if abs(bandwidth_trend) < 0.1 else 1
     elif mid_slope > 0:
-        if mid_slope > 0.3:
-            return "快速上升"
-        else:
-            return "缓慢上升"
+        return 2 if mid_slope > 0.3 else 3
     else:
-        if mid_slope < -0.3:
-            return "快速下降"
-        else:
-            return "缓慢下降"
+        return 4 if mid_slope < -0.3 else 5
 
-def _analyze_short_term_signal(data: pd.DataFrame) -> str:
+@njit(cache=True)
+def _short_term_code(close, upper, mid, lower):
     """
     分析布林带短期信号（10天）
     """
-    latest = data.iloc[-1]
-    prev = data.iloc[-2]
-    
-    # 判断突破情况
-    if latest['close'] > latest['boll_upper'] and prev['close'] <= prev['boll_upper']:
-        return "突破上轨"
-    elif latest['close'] < latest['boll_lower'] and prev['close'] >= prev['boll_lower']:
-        return "突破下轨"
-    elif latest['close'] < latest['boll_upper'] and prev['close'] >= prev['boll_upper']:
-        return "回落至上轨下方"
-    elif latest['close'] > latest['boll_lower'] and prev['close'] <= prev['boll_lower']:
-        return "反弹至下轨上方"
-    
-    # 判断中轨穿越
-    if latest['close'] > latest['boll_mid'] and prev['close'] <= prev['boll_mid']:
-        return "突破中轨"
-    elif latest['close'] < latest['boll_mid'] and prev['close'] >= prev['boll_mid']:
-        return "跌破中轨"
-    
-    return "区间运行"
+    index = (_relation(close[-1], upper[-1]) << 10 | _relation(close[-2], upper[-2]) << 8
+             | _relation(close[-1], lower[-1]) << 6 | _relation(close[-2], lower[-2]) << 4
+             | _relation(close[-1], mid[-1]) << 2 | _relation(close[-2], mid[-2]))
+    return _SHORT_TERM_TABLE[index]
 
-def _analyze_bandwidth(data: pd.DataFrame) -> str:
+@njit(cache=True)
+def _relation(a, b):
     """
-    分析布林带带宽
+    价格与轨道的关系编码，标量和数组均适用：0低于、1等于、2高于、3存在NaN
     """
-    latest = data.iloc[-1]
-    recent = data.tail(5)
-    
-    # 计算带宽
-    bandwidth = (latest['boll_upper'] - latest['boll_lower']) / latest['boll_mid'] * 100
-    
-    # 计算带宽变化趋势
-    bandwidths = (recent['boll_upper'] - recent['boll_lower']) / recent['boll_mid'] * 100
-    bandwidth_trend = '扩大' if bandwidths.is_monotonic_increasing else '收窄' if bandwidths.is_monotonic_decreasing else '平稳'
-    
-    if bandwidth > 4:
-        return f"带宽过大（{bandwidth_trend}）"
-    elif bandwidth > 3:
-        return f"带宽较大（{bandwidth_trend}）"
-    elif bandwidth > 2:
-        return f"带宽适中（{bandwidth_trend}）"
+    return 2 * (a > b) + (a == b) + 3 * ((a != a) | (b != b))
+
+@njit(cache=True)
+def _bandwidth_code(bandwidth):
+    """
+    分析布林带带宽，编码为 带宽等级 * 3 + 最近5天带宽变化趋势
+    """
+    current = bandwidth[-1]
+    
+    # 最近5天带宽是否单调扩大/收窄：一次遍历4个差分，同时累积非降、非升两个标志，不分配差分数组
+    rising = True
+    falling = True
+    for i in range(max(len(bandwidth) - 4, 1), len(bandwidth)):
+        step = bandwidth[i] - bandwidth[i - 1]
+        rising &= step >= 0
+        falling &= step <= 0
+    if rising:
+        trend = 0
+    elif falling:
+        trend = 1
+    else:
+        trend = 2
+    
+    if current > 4:
+        level = 0
+    elif current > 3:
+        level = 1
+    elif current > 2:
+        level = 2
     else:
-        return f"带宽收窄（{bandwidth_trend}）"
+        level = 3
+    return level * 3 + trend
 
-def _analyze_boll_pattern(data: pd.DataFrame) -> str:
+@njit(cache=True, error_model='numpy')
+def _pattern_code(close, upper, lower, bandwidth):
     """
     分析布林带形态特征
     """
-    latest = data.iloc[-1]
-    
-    # 计算价格位置
-    position = (latest['close'] - latest['boll_lower']) / (latest['boll_upper'] - latest['boll_lower'])
-    
-    # 计算带宽趋势
-    bandwidths = (data['boll_upper'] - data['boll_lower']) / data['boll_mid'] * 100
-    bandwidth_trend = _calculate_trend_direction(bandwidths)
+    # 计算价格位置与带宽趋势
+    position = _position(close, upper, lower)
+    bandwidth_trend = trend_slope(bandwidth)
     
     if position > 0.8 and bandwidth_trend > 0:
-        return "上轨扩张"
+        return 0
     elif position < 0.2 and bandwidth_trend > 0:
-        return "下轨扩张"
+        return 1
     elif position > 0.8 and bandwidth_trend < 0:
-        return "上轨收敛"
+        return 2
     elif position < 0.2 and bandwidth_trend < 0:
-        return "下轨收敛"
+        return 3
     elif abs(position - 0.5) < 0.1:
-        return "中轨平衡"
+        return 4
     else:
-        return "常态运行"
+        return 5
 
-def _analyze_strength(data: pd.DataFrame) -> str:
+@njit(cache=True, error_model='numpy')
+def _strength_code(close, upper, mid, lower, bandwidth):
     """
-    分析布林带强度
+    分析布林带强度，bandwidth为最新一天的带宽（取自内核中预先算好的带宽序列）
     """
-    latest = data.iloc[-1]
-    
-    # 计算标准差
-    std = data['close'].std()
-    
-    # 计算当前带宽
-    bandwidth = (latest['boll_upper'] - latest['boll_lower']) / latest['boll_mid'] * 100
-    
-    # 计算价格位置
-    position = (latest['close'] - latest['boll_lower']) / (latest['boll_upper'] - latest['boll_lower'])
+    # 计算当前价格位置
+    position = _position(close, upper, lower)
+    above_mid = close > mid
     
     if bandwidth > 4 or position > 0.9 or position < 0.1:
-        return "极强" if latest['close'] > latest['boll_mid'] else "极弱"
+        return 0 if above_mid else 1
     elif bandwidth > 3 or position > 0.8 or position < 0.2:
-        return "较强" if latest['close'] > latest['boll_mid'] else "较弱"
+        return 2 if above_mid else 3
     elif bandwidth > 2 or position > 0.7 or position < 0.3:
-        return "偏强" if latest['close'] > latest['boll_mid'] else "偏弱"
+        return 4 if above_mid else 5
     else:
-        return "中性"
+        return 6
 
-def _generate_composite_signal(analysis: Dict[str, str]) -> str:
+@njit(cache=True)
+def _position(close, upper, lower):
     """
-    生成布林带综合信号
+    价格在布林带中的相对位置，上下轨重合时视为居中
+    """
+    channel = upper - lower
+    if channel == 0:
+        return 0.5
+    return (close - lower) / channel
+
+@njit(cache=True)
+def _bandwidth(upper, mid, lower):
+    """
+    布林带带宽（占中轨的百分比），中轨为0时记为0
+    """
+    if mid == 0:
+        return 0.0
+    return (upper - lower) / mid * 100.0
+
+# 综合信号中各类趋势对应的编码集合
+_WIDE_BANDWIDTH_LEVELS = frozenset({BandwidthLevel.VERY_WIDE, BandwidthLevel.WIDE})
+_UP_LONG_TERM_TRENDS = frozenset({LongTermTrend.STRONG_UP, LongTermTrend.UP})
+_DOWN_LONG_TERM_TRENDS = frozenset({LongTermTrend.STRONG_DOWN, LongTermTrend.DOWN})
+_UP_MEDIUM_TERM_TRENDS = frozenset({MediumTermTrend.FAST_UP, MediumTermTrend.SLOW_UP})
+_DOWN_MEDIUM_TERM_TRENDS = frozenset({MediumTermTrend.FAST_DOWN, MediumTermTrend.SLOW_DOWN})
+
+@lru_cache(maxsize=1024)
+def _generate_composite_signal(long_term: int, medium_term: int, short_term: int,
+                               bandwidth_level: int, bandwidth_trend: int, pattern: int, strength: int) -> str:
     """
-    # 获取各维度分析结果
-    long_term = analysis['long_term_trend']
-    medium_term = analysis['medium_term_trend']
-    short_term = analysis['short_term_signal']
-    bandwidth = analysis['bandwidth']
-    pattern = analysis['pattern']
-    strength = analysis['strength']
+    生成布林带综合信号
     
+    各维度均为编码，判断只做整数比较；组合数量有限，相同组合直接命中缓存
+    """
     # 生成综合信号
     signal_parts = []
     
     # 添加带宽信号
-    if "过大" in bandwidth or "较大" in bandwidth:
+    if bandwidth_level in _WIDE_BANDWIDTH_LEVELS:
         signal_parts.append("波动加剧")
-    elif "收窄" in bandwidth:
+    elif bandwidth_level == BandwidthLevel.NARROW or bandwidth_trend == BandwidthTrend.CONTRACTING:
         signal_parts.append("蓄势待发")
     
     # 添加趋势信号
-    if "上涨" in long_term or "上升" in medium_term:
-        if "突破上轨" in short_term or "上轨扩张" in pattern:
+    if long_term in _UP_LONG_TERM_TRENDS or medium_term in _UP_MEDIUM_TERM_TRENDS:
+        if short_term == ShortTermSignal.BREAK_UPPER or pattern == BollPattern.UPPER_EXPANSION:
             signal_parts.append("多头趋势增强")
-        elif "回落" in short_term:
+        elif short_term == ShortTermSignal.BACK_BELOW_UPPER:
             signal_parts.append("多头趋势减弱")
-    elif "下跌" in long_term or "下降" in medium_term:
-        if "突破下轨" in short_term or "下轨扩张" in pattern:
+    elif long_term in _DOWN_LONG_TERM_TRENDS or medium_term in _DOWN_MEDIUM_TERM_TRENDS:
+        if short_term == ShortTermSignal.BREAK_LOWER or pattern == BollPattern.LOWER_EXPANSION:
             signal_parts.append("空头趋势增强")
-        elif "反弹" in short_term:
+        elif short_term == ShortTermSignal.BACK_ABOVE_LOWER:
             signal_parts.append("空头趋势减弱")
     else:
         signal_parts.append("震荡整理")
     
     # 添加强度描述
-    signal_parts.append(f"（{strength}）")
+    signal_parts.append(f"（{_STRENGTHS[strength]}）")
     
     return "，".join(signal_parts)
 
-def _calculate_trend_direction(series: pd.Series) -> float:
+def warmup() -> None:
     """
-    计算序列的趋势方向
+    预先编译布林带数值内核
+    
+    numba首次调用时才会编译，短回测或开发时频繁重载会感受到明显的首次延迟；
+    在导入或启动阶段调用一次即可把编译开销提前。未安装numba时不做任何事
     """
-    x = np.arange(len(series))
-    slope, _ = np.polyfit(x, series, 1)
-    return slope
+    if not NUMBA_AVAILABLE:
+        return
+    # 通过DataFrame走一遍实际调用路径，保证编译出的签名（如pandas返回只读数组）与分析时一致
+    close = np.ones(_LONG_WINDOW)
+    frame = pd.DataFrame({'close': close, 'boll_upper': close * 1.1, 'boll_mid': close, 'boll_lower': close * 0.9})
+    analyze_boll_codes(frame, frame, frame.tail(_MEDIUM_WINDOW), frame.tail(_SHORT_WINDOW))
 
-def _calculate_trend_slope(series: pd.Series) -> float:
-    """
-    计算序列的斜率
-    """
-    x = np.arange(len(series))
-    slope, _ = np.polyfit(x, series, 1)
-    return slope 
\ No newline at end of file
+# 设置环境变量EAGER_JIT=1（或原有的BOLL_EAGER_JIT=1）时在导入阶段完成编译，否则在首次调用时编译
+if EAGER_JIT or os.environ.get('BOLL_EAGER_JIT') == '1':
+    warmup()
@@ -1,35 +1,111 @@
 """
 K线形态分析模块
 用于分析短期（5天）K线组合形态，结合成交量等指标提供交易信号
+形态判断的数值内核位于_candlestick_numba模块，本模块负责把形态编号转换为中文结果
 """
 
-from typing import Dict, Any, List, Tuple
+import sys
+import warnings
+from typing import Dict, Any, List, NamedTuple, Tuple
 import pandas as pd
 import numpy as np
 
+from ._candlestick_numba import analyze_window
+from ._candlestick_numba import (
+    DOJI, LONG_LEGGED_DOJI, GRAVESTONE_DOJI, SPINNING_TOP, HAMMER, INVERTED_HAMMER, HANGING_MAN, SHOOTING_STAR,
+    BULLISH_ENGULFING, BEARISH_ENGULFING, BULLISH_HARAMI, BEARISH_HARAMI, PIERCING_LINE, DARK_CLOUD_COVER,
+    TWEEZER_BOTTOM, TWEEZER_TOP, GAP_UP, GAP_DOWN, FLAT_TOP, FLAT_BOTTOM,
+    MORNING_STAR, EVENING_STAR, THREE_WHITE_SOLDIERS, THREE_BLACK_CROWS, BULLISH_THREE_INSIDE, BEARISH_THREE_INSIDE,
+    BULLISH_THREE_OUTSIDE, BEARISH_THREE_OUTSIDE, THREE_MOUNTAINS, THREE_RIVERS, THREE_STARS,
+    BULLISH_ISLAND_REVERSAL, BEARISH_ISLAND_REVERSAL, BULLISH_THREE_LINE_STRIKE, BEARISH_THREE_LINE_STRIKE,
+    RISING_THREE_METHODS, FALLING_THREE_METHODS,
+    N_PATTERNS, MAX_PATTERNS, PATTERN_GROUP_BOUNDS, PATTERN_DIRECTIONS, PATTERN_PRIORITIES
+)
 
-def analyze_candlesticks(df: pd.DataFrame, 
-                        long_term: pd.DataFrame,
-                        medium_term: pd.DataFrame, 
-                        short_term: pd.DataFrame) -> Dict[str, Any]:
+
+# 按旧签名调用analyze_candlesticks时是否发出DeprecationWarning
+WARN_DEPRECATED_SIGNATURE = True
+
+# 形态类型与名称在模块加载时驻留，结果中的字符串都复用这些对象
+TYPE_1D, TYPE_2D, TYPE_3D, TYPE_4D, TYPE_5D = map(sys.intern, ("今日形态", "两日形态", "三日形态", "四日形态", "五日形态"))
+
+# 形态编号对应的名称与类型，编号定义见_candlestick_numba
+PATTERN_NAMES = tuple(map(sys.intern, (
+    "十字星", "长腿十字星", "墓碑十字星", "纺锤线", "锤子线", "倒锤子线", "吊颈线", "流星线",
+    "看涨吞没形态", "看跌吞没形态", "看涨孕线形态", "看跌孕线形态", "刺透形态", "乌云盖顶形态",
+    "镊子底形态", "镊子顶形态", "向上跳空缺口", "向下跳空缺口", "平头顶形态", "平头底形态",
+    "启明星形态", "黄昏星形态", "三白兵形态", "三黑鸦形态", "看涨三内形态", "看跌三内形态",
+    "看涨三外形态", "看跌三外形态", "三山形态", "三川形态", "三星形态", "看涨岛型反转", "看跌岛型反转",
+    "看涨三线打击形态", "看跌三线打击形态",
+    "上升三法形态", "下降三法形态",
+)))
+PATTERN_TYPES = (TYPE_1D,) * 8 + (TYPE_2D,) * 12 + (TYPE_3D,) * 13 + (TYPE_4D,) * 2 + (TYPE_5D,) * 2
+
+
+
+class CandlestickPattern(NamedTuple):
+    """
+    识别到的单个K线形态
+    """
+    type: str       # 形态类型，如"今日形态"
+    pattern: str    # 形态名称，如"十字星"
+
+
+class CandlestickResult(NamedTuple):
+    """
+    K线形态分析结果，比结果字典占用更少内存，适合批量扫描时大量保存
+    """
+    patterns: Tuple[CandlestickPattern, ...]    # 所有识别到的形态
+    strength: str                               # 星级评分
+    suggestion: str                             # 交易建议
+    
+    def to_dict(self) -> Dict[str, Any]:
+        """
+        转换为与analyze_candlestick_patterns一致的结果字典，用于序列化等需要字典的场合
+        """
+        return {
+            "patterns": [{"type": item.type, "pattern": item.pattern} for item in self.patterns],
+            "strength": self.strength,
+            "suggestion": self.suggestion
+        }
+
+
+# 各形态的结果条目模板，生成结果时复制一份，键的哈希值随之复制而无需重新计算
+_PATTERN_ENTRIES = tuple({"type": pattern_type, "pattern": pattern}
+                         for pattern_type, pattern in zip(PATTERN_TYPES, PATTERN_NAMES))
+
+# 各形态的不可变记录，所有结果共享同一批对象
+_PATTERN_RECORDS = tuple(CandlestickPattern(pattern_type, pattern)
+                         for pattern_type, pattern in zip(PATTERN_TYPES, PATTERN_NAMES))
+
+
+def analyze_candlesticks(short_term: pd.DataFrame, *args, **kwargs) -> Dict[str, Any]:
     """
     综合分析K线形态
     
     参数:
-        df: 完整的历史数据
-        long_term: 40天数据
-        medium_term: 20天数据
-        short_term: 10天数据
+        short_term: 短期数据（至少5天），按时间升序排列
         
     返回:
         Dict包含分析结果
+    
+    兼容旧签名analyze_candlesticks(df, long_term, medium_term, short_term)：
+    多传入的位置参数中取最后一个作为短期数据，其余数据不参与分析
     """
+    if args or kwargs:
+        if WARN_DEPRECATED_SIGNATURE:
+            warnings.warn(
+                "analyze_candlesticks(df, long_term, medium_term, short_term)已弃用，"
+                "请改为analyze_candlesticks(short_term)",
+                DeprecationWarning, stacklevel=2
+            )
+        if args:
+            short_term = args[-1]
+    
     # 主要使用最近的数据进行分析
     return analyze_candlestick_patterns(short_term)
 
 
-
-
 def analyze_candlestick_patterns(df: pd.DataFrame) -> Dict[str, Any]:
     """
     分析K线形态，返回形态列表、星级评分和交易建议
@@ -40,577 +116,216 @@ def analyze_candlestick_patterns(df: pd.DataFrame) -> Dict[str, Any]:
     返回:
         包含分析结果的字典，包括形态列表、星级评分和交易建议
     """
-    if len(df) < 5:
+    # 逐列取最近5天的视图后一次组装为ndarray，不经过tail()或按列选取构造新的DataFrame
+    ohlc = np.array([df[column].to_numpy()[-5:] for column in ('open', 'high', 'low', 'close')], dtype=np.float64)
+    return analyze_candlesticks_np(ohlc.T)
+
+
+def analyze_candlesticks_np(ohlc: np.ndarray) -> Dict[str, Any]:
+    """
+    基于ndarray分析K线形态，结果与analyze_candlestick_patterns一致
+    
+    参数:
+        ohlc: 形状为(T, 4)或(T, 5)的数组，各列依次为开盘、最高、最低、收盘价（及成交量，不参与判断），
+            按时间升序排列
+        
+    返回:
+        包含分析结果的字典，包括形态列表、星级评分和交易建议
+    """
+    if len(ohlc) < 5:
         return {
             "error": "数据不足，需要至少5天的数据",
             "status": "error"
         }
     
-    # 获取最近5天的数据
-    recent_data = df.tail(5)
-    latest_day = recent_data.iloc[-1]
-    
-    # 初始化结果字典
-    result = {
-        "patterns": [],     # 所有识别到的形态
-        "strength": "",     # 星级评分
-        "suggestion": ""    # 交易建议
-    }
-    
-    # 用于计算强度的计数器
-    pattern_weights = {
-        "今日形态": 1,
-        "两日形态": 2,
-        "三日形态": 3,
-        "四日形态": 4,
-        "五日形态": 5
-    }
-    total_weight = 0
-    
-    # 用于判断趋势的计数器
-    bullish_count = 0
-    bearish_count = 0
-    
-    # 分析单日形态（今日）
-    latest_open = latest_day['open']
-    latest_close = latest_day['close']
-    latest_high = latest_day['high']
-    latest_low = latest_day['low']
-    
-    # 检查单日形态
-    if is_doji(latest_open, latest_close, latest_high, latest_low):
-        result["patterns"].append({"type": "今日形态", "pattern": "十字星"})
-        total_weight += pattern_weights["今日形态"]
-    
-    if is_long_legged_doji(latest_open, latest_close, latest_high, latest_low):
-        result["patterns"].append({"type": "今日形态", "pattern": "长腿十字星"})
-        total_weight += pattern_weights["今日形态"]
-    
-    if is_gravestone_doji(latest_open, latest_close, latest_high, latest_low):
-        result["patterns"].append({"type": "今日形态", "pattern": "墓碑十字星"})
-        total_weight += pattern_weights["今日形态"]
-        bearish_count += 1
-    
-    if is_spinning_top(latest_open, latest_close, latest_high, latest_low):
-        result["patterns"].append({"type": "今日形态", "pattern": "纺锤线"})
-        total_weight += pattern_weights["今日形态"]
-    
-    if is_hammer(latest_open, latest_close, latest_high, latest_low):
-        result["patterns"].append({"type": "今日形态", "pattern": "锤子线"})
-        total_weight += pattern_weights["今日形态"]
-        bullish_count += 1
-    
-    if is_inverted_hammer(latest_open, latest_close, latest_high, latest_low):
-        result["patterns"].append({"type": "今日形态", "pattern": "倒锤子线"})
-        total_weight += pattern_weights["今日形态"]
-        bullish_count += 1
-    
-    if is_hanging_man(latest_open, latest_close, latest_high, latest_low):
-        result["patterns"].append({"type": "今日形态", "pattern": "吊颈线"})
-        total_weight += pattern_weights["今日形态"]
-        bearish_count += 1
-    
-    if is_shooting_star(latest_open, latest_close, latest_high, latest_low):
-        result["patterns"].append({"type": "今日形态", "pattern": "流星线"})
-        total_weight += pattern_weights["今日形态"]
-        bearish_count += 1
-    
-    # 分析两日形态
-    if len(recent_data) >= 2:
-        prev_day = recent_data.iloc[-2]
-        
-        # 创建一个列表来存储所有可能的两日形态及其优先级
-        two_day_patterns = []
-        
-        # 检查所有可能的两日形态并设置优先级
-        if is_bullish_engulfing(prev_day, latest_day):
-            two_day_patterns.append({
-                "type": "两日形态",
-                "pattern": "看涨吞没形态",
-                "priority": 5,
-                "is_bullish": True
-            })
-        
-        if is_bearish_engulfing(prev_day, latest_day):
-            two_day_patterns.append({
-                "type": "两日形态",
-                "pattern": "看跌吞没形态",
-                "priority": 5,
-                "is_bullish": False
-            })
-        
-        if is_harami(prev_day, latest_day, True):
-            two_day_patterns.append({
-                "type": "两日形态",
-                "pattern": "看涨孕线形态",
-                "priority": 4,
-                "is_bullish": True
-            })
-        
-        if is_harami(prev_day, latest_day, False):
-            two_day_patterns.append({
-                "type": "两日形态",
-                "pattern": "看跌孕线形态",
-                "priority": 4,
-                "is_bullish": False
-            })
-        
-        if is_piercing_line(prev_day, latest_day):
-            two_day_patterns.append({
-                "type": "两日形态",
-                "pattern": "刺透形态",
-                "priority": 4,
-                "is_bullish": True
-            })
-        
-        if is_dark_cloud_cover(prev_day, latest_day):
-            two_day_patterns.append({
-                "type": "两日形态",
-                "pattern": "乌云盖顶形态",
-                "priority": 4,
-                "is_bullish": False
-            })
-        
-        if is_tweezer(prev_day, latest_day, True):
-            two_day_patterns.append({
-                "type": "两日形态",
-                "pattern": "镊子底形态",
-                "priority": 3,
-                "is_bullish": True
-            })
-        
-        if is_tweezer(prev_day, latest_day, False):
-            two_day_patterns.append({
-                "type": "两日形态",
-                "pattern": "镊子顶形态",
-                "priority": 3,
-                "is_bullish": False
-            })
-        
-        if is_gap(prev_day, latest_day, True):
-            two_day_patterns.append({
-                "type": "两日形态",
-                "pattern": "向上跳空缺口",
-                "priority": 3,
-                "is_bullish": True
-            })
-        
-        if is_gap(prev_day, latest_day, False):
-            two_day_patterns.append({
-                "type": "两日形态",
-                "pattern": "向下跳空缺口",
-                "priority": 3,
-                "is_bullish": False
-            })
-        
-        if is_flat_top_bottom(prev_day, latest_day, True):
-            two_day_patterns.append({
-                "type": "两日形态",
-                "pattern": "平头顶形态",
-                "priority": 2,
-                "is_bullish": False
-            })
-        
-        if is_flat_top_bottom(prev_day, latest_day, False):
-            two_day_patterns.append({
-                "type": "两日形态",
-                "pattern": "平头底形态",
-                "priority": 2,
-                "is_bullish": True
-            })
-        
-        # 如果存在两日形态，选择优先级最高的一个
-        if two_day_patterns:
-            # 按优先级排序
-            two_day_patterns.sort(key=lambda x: x["priority"], reverse=True)
-            selected_pattern = two_day_patterns[0]
-            
-            # 添加选中的形态
-            result["patterns"].append({
-                "type": selected_pattern["type"],
-                "pattern": selected_pattern["pattern"]
-            })
-            total_weight += pattern_weights["两日形态"]
-            if selected_pattern["is_bullish"]:
-                bullish_count += 2
-            else:
-                bearish_count += 2
-    
-    # 分析三日形态
-    if len(recent_data) >= 3:
-        three_days = recent_data.iloc[-3:]
-        three_day_patterns = []
-        
-        # 检查所有可能的三日形态并设置优先级
-        if is_morning_star(three_days):
-            three_day_patterns.append({
-                "type": "三日形态",
-                "pattern": "启明星形态",
-                "priority": 5,
-                "is_bullish": True
-            })
-        
-        if is_evening_star(three_days):
-            three_day_patterns.append({
-                "type": "三日形态",
-                "pattern": "黄昏星形态",
-                "priority": 5,
-                "is_bullish": False
-            })
-        
-        if is_three_white_soldiers(three_days):
-            three_day_patterns.append({
-                "type": "三日形态",
-                "pattern": "三白兵形态",
-                "priority": 4,
-                "is_bullish": True
-            })
-        
-        if is_three_black_crows(three_days):
-            three_day_patterns.append({
-                "type": "三日形态",
-                "pattern": "三黑鸦形态",
-                "priority": 4,
-                "is_bullish": False
-            })
-        
-        bullish_three_inside, bearish_three_inside = is_three_inside(three_days)
-        if bullish_three_inside:
-            three_day_patterns.append({
-                "type": "三日形态",
-                "pattern": "看涨三内形态",
-                "priority": 3,
-                "is_bullish": True
-            })
-        if bearish_three_inside:
-            three_day_patterns.append({
-                "type": "三日形态",
-                "pattern": "看跌三内形态",
-                "priority": 3,
-                "is_bullish": False
-            })
-        
-        bullish_three_outside, bearish_three_outside = is_three_outside(three_days)
-        if bullish_three_outside:
-            three_day_patterns.append({
-                "type": "三日形态",
-                "pattern": "看涨三外形态",
-                "priority": 3,
-                "is_bullish": True
-            })
-        if bearish_three_outside:
-            three_day_patterns.append({
-                "type": "三日形态",
-                "pattern": "看跌三外形态",
-                "priority": 3,
-                "is_bullish": False
-            })
-        
-        if is_three_mountains(three_days):
-            three_day_patterns.append({
-                "type": "三日形态",
-                "pattern": "三山形态",
-                "priority": 4,
-                "is_bullish": False
-            })
-        
-        if is_three_rivers(three_days):
-            three_day_patterns.append({
-                "type": "三日形态",
-                "pattern": "三川形态",
-                "priority": 4,
-                "is_bullish": True
-            })
-        
-        if is_three_stars(three_days):
-            three_day_patterns.append({
-                "type": "三日形态",
-                "pattern": "三星形态",
-                "priority": 3,
-                "is_bullish": True
-            })
-        
-        if is_island_reversal(three_days, True):
-            three_day_patterns.append({
-                "type": "三日形态",
-                "pattern": "看涨岛型反转",
-                "priority": 5,
-                "is_bullish": True
-            })
-        
-        if is_island_reversal(three_days, False):
-            three_day_patterns.append({
-                "type": "三日形态",
-                "pattern": "看跌岛型反转",
-                "priority": 5,
-                "is_bullish": False
-            })
-        
-        # 如果存在三日形态，选择优先级最高的一个
-        if three_day_patterns:
-            # 按优先级排序
-            three_day_patterns.sort(key=lambda x: x["priority"], reverse=True)
-            selected_pattern = three_day_patterns[0]
-            
-            # 添加选中的形态
-            result["patterns"].append({
-                "type": selected_pattern["type"],
-                "pattern": selected_pattern["pattern"]
-            })
-            total_weight += pattern_weights["三日形态"]
-            if selected_pattern["is_bullish"]:
-                bullish_count += 3
-            else:
-                bearish_count += 3
-    
-    # 分析四日形态
-    if len(recent_data) >= 4:
-        four_days = recent_data.iloc[-4:]
-        four_day_patterns = []
-        
-        bullish_three_line_strike, bearish_three_line_strike = is_three_line_strike(four_days)
-        if bullish_three_line_strike:
-            four_day_patterns.append({
-                "type": "四日形态",
-                "pattern": "看涨三线打击形态",
-                "priority": 4,
-                "is_bullish": True
-            })
-        if bearish_three_line_strike:
-            four_day_patterns.append({
-                "type": "四日形态",
-                "pattern": "看跌三线打击形态",
-                "priority": 4,
-                "is_bullish": False
-            })
-        
-        # 如果存在四日形态，选择优先级最高的一个
-        if four_day_patterns:
-            # 按优先级排序
-            four_day_patterns.sort(key=lambda x: x["priority"], reverse=True)
-            selected_pattern = four_day_patterns[0]
-            
-            # 添加选中的形态
-            result["patterns"].append({
-                "type": selected_pattern["type"],
-                "pattern": selected_pattern["pattern"]
-            })
-            total_weight += pattern_weights["四日形态"]
-            if selected_pattern["is_bullish"]:
-                bullish_count += 4
-            else:
-                bearish_count += 4
+    # 取最近5天按列转置为连续数组，交给数值内核一次完成全部形态识别
+    window = np.array(ohlc[-5:, :4].T, dtype=np.float64)
+    pattern_ids, total_weight, bullish_count, bearish_count = analyze_window(window[0], window[1], window[2], window[3])
     
-    # 分析五日形态
-    if len(recent_data) >= 5:
-        five_day_patterns = []
-        
-        if is_rising_three_methods(recent_data):
-            five_day_patterns.append({
-                "type": "五日形态",
-                "pattern": "上升三法形态",
-                "priority": 5,
-                "is_bullish": True
-            })
-        
-        if is_falling_three_methods(recent_data):
-            five_day_patterns.append({
-                "type": "五日形态",
-                "pattern": "下降三法形态",
-                "priority": 5,
-                "is_bullish": False
-            })
-        
-        # 如果存在五日形态，选择优先级最高的一个
-        if five_day_patterns:
-            # 按优先级排序
-            five_day_patterns.sort(key=lambda x: x["priority"], reverse=True)
-            selected_pattern = five_day_patterns[0]
-            
-            # 添加选中的形态
-            result["patterns"].append({
-                "type": selected_pattern["type"],
-                "pattern": selected_pattern["pattern"]
-            })
-            total_weight += pattern_weights["五日形态"]
-            if selected_pattern["is_bullish"]:
-                bullish_count += 5
-            else:
-                bearish_count += 5
-    
-    # 计算星级
-    if len(result["patterns"]) > 0:
-        # 根据形态数量和权重计算强度
-        strength = min(5, total_weight / len(result["patterns"]))
-        result["strength"] = convert_to_stars(strength)
-        
-        # 生成交易建议
-        if bullish_count > bearish_count:
-            if strength >= 4:
-                result["suggestion"] = "强烈看涨信号"
-            else:
-                result["suggestion"] = "看涨信号"
-        elif bearish_count > bullish_count:
-            if strength >= 4:
-                result["suggestion"] = "强烈看跌信号"
-            else:
-                result["suggestion"] = "看跌信号"
-        else:
-            result["suggestion"] = "市场震荡"
-    else:
-        result["strength"] = "☆☆☆☆☆"
-        result["suggestion"] = "无明显信号"
-    
-    return result
-
+    return _build_result(pattern_ids.tolist(), total_weight, bullish_count, bearish_count)
 
 
-def is_doji(open_price: float, close_price: float, high: float, low: float) -> bool:
-    """
-    判断是否为十字星形态
+def analyze_candlestick_patterns_batch(ohlc: np.ndarray, dtype: Any = np.float64) -> List[CandlestickResult]:
     """
-    body = abs(open_price - close_price)
-    upper_shadow = high - max(open_price, close_price)
-    lower_shadow = min(open_price, close_price) - low
-    total_range = high - low
+    横截面批量分析多只股票的K线形态
     
-    return body <= total_range * 0.1 and upper_shadow > body and lower_shadow > body
-
-def is_hammer(open_price: float, close_price: float, high: float, low: float) -> bool:
-    """
-    判断是否为锤子线形态
-    """
-    body = abs(open_price - close_price)
-    upper_shadow = high - max(open_price, close_price)
-    lower_shadow = min(open_price, close_price) - low
-    total_range = high - low
-    
-    return (lower_shadow >= body * 2 and 
-            upper_shadow <= body * 0.1 and 
-            body >= total_range * 0.1)
-
-def is_shooting_star(open_price: float, close_price: float, high: float, low: float) -> bool:
-    """
-    判断是否为流星线形态
-    """
-    body = abs(open_price - close_price)
-    upper_shadow = high - max(open_price, close_price)
-    lower_shadow = min(open_price, close_price) - low
-    total_range = high - low
+    与逐只调用analyze_candlestick_patterns的结果一致，但全部形态判断按股票维度向量化，
+    一次调用覆盖所有股票，只在最后整理结果时逐只循环。结果为CandlestickResult，
+    需要字典时调用其to_dict()
     
-    return (upper_shadow >= body * 2 and 
-            lower_shadow <= body * 0.1 and 
-            body >= total_range * 0.1)
-
-def is_bullish_engulfing(day1: pd.Series, day2: pd.Series) -> bool:
-    """
-    判断是否为看涨吞没形态
-    """
-    return (day1['close'] < day1['open'] and  # 第一天阴线
-            day2['close'] > day2['open'] and  # 第二天阳线
-            day2['open'] < day1['close'] and  # 第二天开盘价低于第一天收盘价
-            day2['close'] > day1['open'])     # 第二天收盘价高于第一天开盘价
-
-def is_bearish_engulfing(day1: pd.Series, day2: pd.Series) -> bool:
-    """
-    判断是否为看跌吞没形态
-    """
-    return (day1['close'] > day1['open'] and  # 第一天阳线
-            day2['close'] < day2['open'] and  # 第二天阴线
-            day2['open'] > day1['close'] and  # 第二天开盘价高于第一天收盘价
-            day2['close'] < day1['open'])     # 第二天收盘价低于第一天开盘价
-
-def is_morning_star(days: pd.DataFrame) -> bool:
-    """
-    判断是否为启明星形态
-    """
-    if len(days) < 3:
-        return False
+    参数:
+        ohlc: 形状为(N, T, 4)的数组，最后一维依次为开盘、最高、最低、收盘价，按时间升序排列，
+            T至少为5，只使用每只股票最近5天
+        dtype: 中间计算使用的浮点类型，全市场扫描时可传np.float32以减半内存带宽；
+            恰好落在阈值附近的股票可能与analyze_candlestick_patterns结果不同
         
-    day1, day2, day3 = days.iloc[0], days.iloc[1], days.iloc[2]
-    
-    return (day1['close'] < day1['open'] and                     # 第一天阴线
-            abs(day2['close'] - day2['open']) < (day2['high'] - day2['low']) * 0.3 and  # 第二天十字星
-            day3['close'] > day3['open'] and                     # 第三天阳线
-            day2['high'] < day1['close'] and                     # 第二天价格跳空低开
-            day3['close'] > (day1['open'] + day1['close']) / 2)  # 第三天收盘价回升超过第一天实体一半
+    返回:
+        与输入顺序一致的分析结果列表
+    """
+    ohlc = np.asarray(ohlc)
+    if ohlc.ndim != 3 or ohlc.shape[2] != 4:
+        raise ValueError("ohlc的形状应为(N, T, 4)")
+    if ohlc.shape[1] < 5:
+        raise ValueError("数据不足，需要至少5天的数据")
+    
+    window = ohlc[:, -5:, :].astype(dtype, copy=False)
+    hits = _batch_hits(window[:, :, 0], window[:, :, 1], window[:, :, 2], window[:, :, 3])
+    
+    # 单日形态全部保留
+    single_day = hits[:, :8]
+    total_weight = single_day.sum(axis=1)
+    bullish_count = (single_day & (PATTERN_DIRECTIONS[:8] > 0)).sum(axis=1)
+    bearish_count = (single_day & (PATTERN_DIRECTIONS[:8] < 0)).sum(axis=1)
+    
+    # 多日形态每类取优先级最高的一个，argmax在同优先级时取编号靠前者
+    selected = []
+    for days in range(2, 6):
+        start, stop = PATTERN_GROUP_BOUNDS[days - 1], PATTERN_GROUP_BOUNDS[days]
+        scores = np.where(hits[:, start:stop], PATTERN_PRIORITIES[start:stop], 0)
+        best = start + scores.argmax(axis=1)
+        found = scores.max(axis=1) > 0
+        bullish = found & (PATTERN_DIRECTIONS[best] > 0)
+        total_weight = total_weight + found * days
+        bullish_count = bullish_count + bullish * days
+        bearish_count = bearish_count + (found & ~bullish) * days
+        selected.append(np.where(found, best, -1))
+    
+    # 每只股票最多MAX_PATTERNS个形态，按固定容量排成矩阵：未命中的位置为-1，稳定排序移到行尾
+    pattern_ids = np.full((len(window), MAX_PATTERNS), -1, dtype=np.int64)
+    pattern_ids[:, :8] = np.where(single_day, np.arange(8), -1)
+    pattern_ids[:, 8:] = np.stack(selected, axis=1)
+    pattern_ids = np.take_along_axis(pattern_ids, np.argsort(pattern_ids < 0, axis=1, kind='stable'), axis=1)
+    n_patterns = (pattern_ids >= 0).sum(axis=1)
+    
+    results = [None] * len(pattern_ids)
+    for i, (row, count, weight, bullish, bearish) in enumerate(zip(
+            pattern_ids.tolist(), n_patterns.tolist(), total_weight.tolist(),
+            bullish_count.tolist(), bearish_count.tolist())):
+        strength, suggestion = _rate_patterns(count, weight, bullish, bearish)
+        results[i] = CandlestickResult(
+            tuple([_PATTERN_RECORDS[pattern_id] for pattern_id in row[:count]]), strength, suggestion)
+    return results
+
+
+def _build_result(pattern_ids: List[int], total_weight: int, bullish_count: int, bearish_count: int) -> Dict[str, Any]:
+    """
+    由命中的形态编号和计数生成形态列表、星级评分和交易建议
+    """
+    strength, suggestion = _rate_patterns(len(pattern_ids), total_weight, bullish_count, bearish_count)
+    return {
+        "patterns": [_PATTERN_ENTRIES[pattern_id].copy() for pattern_id in pattern_ids],  # 所有识别到的形态
+        "strength": strength,       # 星级评分
+        "suggestion": suggestion    # 交易建议
+    }
 
-def is_evening_star(days: pd.DataFrame) -> bool:
-    """
-    判断是否为黄昏星形态
-    """
-    if len(days) < 3:
-        return False
-        
-    day1, day2, day3 = days.iloc[0], days.iloc[1], days.iloc[2]
-    
-    return (day1['close'] > day1['open'] and                     # 第一天阳线
-            abs(day2['close'] - day2['open']) < (day2['high'] - day2['low']) * 0.3 and  # 第二天十字星
-            day3['close'] < day3['open'] and                     # 第三天阴线
-            day2['low'] > day1['close'] and                      # 第二天价格跳空高开
-            day3['close'] < (day1['open'] + day1['close']) / 2)  # 第三天收盘价下跌超过第一天实体一半
 
-def is_three_white_soldiers(days: pd.DataFrame) -> bool:
+def _rate_patterns(n_patterns: int, total_weight: int, bullish_count: int, bearish_count: int) -> Tuple[str, str]:
     """
-    判断是否为三白兵形态
+    根据形态数量、总权重和看涨/看跌计数计算星级评分和交易建议
     """
-    if len(days) < 3:
-        return False
+    if n_patterns == 0:
+        return "☆☆☆☆☆", "无明显信号"
     
-    # 检查三天都是阳线，且每天收盘价都比前一天高
-    return all(days.iloc[i]['close'] > days.iloc[i]['open'] and  # 当天是阳线
-               (i == 0 or days.iloc[i]['close'] > days.iloc[i-1]['close']) and  # 收盘价上升
-               (i == 0 or days.iloc[i]['open'] > days.iloc[i-1]['open'])  # 开盘价上升
-               for i in range(3))
-
-def is_three_black_crows(days: pd.DataFrame) -> bool:
-    """
-    判断是否为三黑鸦形态
-    """
-    if len(days) < 3:
-        return False
+    # 根据形态数量和权重计算强度
+    strength = min(5, total_weight / n_patterns)
     
-    # 检查三天都是阴线，且每天收盘价都比前一天低
-    return all(days.iloc[i]['close'] < days.iloc[i]['open'] and  # 当天是阴线
-               (i == 0 or days.iloc[i]['close'] < days.iloc[i-1]['close']) and  # 收盘价下降
-               (i == 0 or days.iloc[i]['open'] < days.iloc[i-1]['open'])  # 开盘价下降
-               for i in range(3))
+    # 生成交易建议
+    if bullish_count > bearish_count:
+        suggestion = "强烈看涨信号" if strength >= 4 else "看涨信号"
+    elif bearish_count > bullish_count:
+        suggestion = "强烈看跌信号" if strength >= 4 else "看跌信号"
+    else:
+        suggestion = "市场震荡"
+    return convert_to_stars(strength), suggestion
+
+
+def _batch_hits(o: np.ndarray, h: np.ndarray, l: np.ndarray, c: np.ndarray) -> np.ndarray:
+    """
+    对形状为(N, 5)的OHLC数组判断全部形态，返回(N, N_PATTERNS)的命中矩阵
+    
+    各条件与_candlestick_numba中的is_*判断函数逐项对应，修改形态规则时两处需同步（由测试逐行对照scan_all_patterns）；
+    上下沿按Python内置max/min的语义取值，保证含缺失值时的结果与逐只分析一致
+    """
+    bull = c > o
+    bear = c < o
+    body = np.abs(c - o)
+    rng = h - l
+    mid = (o + c) / 2
+    upper_shadow = h - np.where(c > o, c, o)
+    lower_shadow = np.where(c < o, c, o) - l
+    doji = (body <= rng * 0.1) & (upper_shadow > body) & (lower_shadow > body)
+    
+    hits = np.zeros((len(o), N_PATTERNS), dtype=bool)
+    
+    # 单日形态（最新一天）
+    b, u, lw, r = body[:, -1], upper_shadow[:, -1], lower_shadow[:, -1], rng[:, -1]
+    small_body = b <= r * 0.1
+    long_lower = (lw >= b * 2) & (u <= b * 0.1) & (b >= r * 0.1)
+    long_upper = (u >= b * 2) & (lw <= b * 0.1) & (b >= r * 0.1)
+    hits[:, DOJI] = doji[:, -1]
+    hits[:, LONG_LEGGED_DOJI] = small_body & (u >= r * 0.3) & (lw >= r * 0.3)
+    hits[:, GRAVESTONE_DOJI] = small_body & (u >= r * 0.6) & (lw <= r * 0.1)
+    hits[:, SPINNING_TOP] = (b <= r * 0.3) & (u >= b) & (lw >= b) & (np.abs(u - lw) <= r * 0.1)
+    hits[:, HAMMER] = long_lower
+    hits[:, INVERTED_HAMMER] = long_upper
+    hits[:, HANGING_MAN] = long_lower & bear[:, -1]
+    hits[:, SHOOTING_STAR] = long_upper
+    
+    # 两日形态
+    bear_bull = bear[:, -2] & bull[:, -1]
+    bull_bear = bull[:, -2] & bear[:, -1]
+    threshold = rng[:, -2] * 0.001
+    hits[:, BULLISH_ENGULFING] = bear_bull & (o[:, -1] < c[:, -2]) & (c[:, -1] > o[:, -2])
+    hits[:, BEARISH_ENGULFING] = bull_bear & (o[:, -1] > c[:, -2]) & (c[:, -1] < o[:, -2])
+    hits[:, BULLISH_HARAMI] = (bear_bull & (o[:, -1] > c[:, -2]) & (c[:, -1] < o[:, -2])
+                               & (body[:, -1] < body[:, -2] * 0.5))
+    hits[:, BEARISH_HARAMI] = (bull_bear & (o[:, -1] < c[:, -2]) & (c[:, -1] > o[:, -2])
+                               & (body[:, -1] < body[:, -2] * 0.5))
+    hits[:, PIERCING_LINE] = bear_bull & (o[:, -1] < c[:, -2]) & (c[:, -1] > mid[:, -2])
+    hits[:, DARK_CLOUD_COVER] = bull_bear & (o[:, -1] > c[:, -2]) & (c[:, -1] < mid[:, -2])
+    hits[:, TWEEZER_BOTTOM] = bear_bull & (np.abs(l[:, -2] - l[:, -1]) <= threshold)
+    hits[:, TWEEZER_TOP] = bull_bear & (np.abs(h[:, -2] - h[:, -1]) <= threshold)
+    hits[:, GAP_UP] = l[:, -1] > h[:, -2]
+    hits[:, GAP_DOWN] = h[:, -1] < l[:, -2]
+    hits[:, FLAT_TOP] = np.abs(h[:, -2] - h[:, -1]) <= threshold
+    hits[:, FLAT_BOTTOM] = np.abs(l[:, -2] - l[:, -1]) <= threshold
+    
+    # 三日形态
+    small_middle = body[:, -2] < rng[:, -2] * 0.3
+    inside = (h[:, -2] < h[:, -3]) & (l[:, -2] > l[:, -3])
+    outside = (h[:, -2] > h[:, -3]) & (l[:, -2] < l[:, -3])
+    hits[:, MORNING_STAR] = (bear[:, -3] & small_middle & bull[:, -1] & (h[:, -2] < c[:, -3])
+                             & (c[:, -1] > mid[:, -3]))
+    hits[:, EVENING_STAR] = (bull[:, -3] & small_middle & bear[:, -1] & (l[:, -2] > c[:, -3])
+                             & (c[:, -1] < mid[:, -3]))
+    hits[:, THREE_WHITE_SOLDIERS] = (bull[:, -3:].all(axis=1) & (c[:, -2:] > c[:, -3:-1]).all(axis=1)
+                                     & (o[:, -2:] > o[:, -3:-1]).all(axis=1))
+    hits[:, THREE_BLACK_CROWS] = (bear[:, -3:].all(axis=1) & (c[:, -2:] < c[:, -3:-1]).all(axis=1)
+                                  & (o[:, -2:] < o[:, -3:-1]).all(axis=1))
+    hits[:, BULLISH_THREE_INSIDE] = inside & bear[:, -3] & bull[:, -1] & (c[:, -1] > h[:, -2])
+    hits[:, BEARISH_THREE_INSIDE] = inside & bull[:, -3] & bear[:, -1] & (c[:, -1] < l[:, -2])
+    hits[:, BULLISH_THREE_OUTSIDE] = outside & bear[:, -3] & bull[:, -2] & bull[:, -1] & (c[:, -1] > h[:, -2])
+    hits[:, BEARISH_THREE_OUTSIDE] = outside & bull[:, -3] & bear[:, -2] & bear[:, -1] & (c[:, -1] < l[:, -2])
+    hits[:, THREE_MOUNTAINS] = ((h[:, -2] > h[:, -3]) & (h[:, -2] > h[:, -1])
+                                & (np.abs(h[:, -3] - h[:, -1]) <= rng[:, -3] * 0.1))
+    hits[:, THREE_RIVERS] = ((l[:, -2] < l[:, -3]) & (l[:, -2] < l[:, -1])
+                             & (np.abs(l[:, -3] - l[:, -1]) <= rng[:, -3] * 0.1))
+    hits[:, THREE_STARS] = doji[:, -3:].all(axis=1)
+    hits[:, BULLISH_ISLAND_REVERSAL] = (l[:, -2] > h[:, -3]) & (h[:, -1] < l[:, -2])
+    hits[:, BEARISH_ISLAND_REVERSAL] = (h[:, -2] < l[:, -3]) & (l[:, -1] > h[:, -2])
+    
+    # 四日形态：前三天阳线记+1、阴线记-1，合计为-3即三连阴，为3即三连阳
+    colors = (bull[:, -4:-1].astype(np.int8) - bear[:, -4:-1]).sum(axis=1)
+    hits[:, BULLISH_THREE_LINE_STRIKE] = (colors == -3) & bull[:, -1] & (c[:, -1] > o[:, -4])
+    hits[:, BEARISH_THREE_LINE_STRIKE] = (colors == 3) & bear[:, -1] & (c[:, -1] < o[:, -4])
+    
+    # 五日形态
+    hits[:, RISING_THREE_METHODS] = (bull[:, -5] & bull[:, -1] & (c[:, -1] > c[:, -5]) & bear[:, -4:-1].all(axis=1)
+                                     & (l[:, -4:-1] > o[:, -5:-4]).all(axis=1))
+    hits[:, FALLING_THREE_METHODS] = (bear[:, -5] & bear[:, -1] & (c[:, -1] < c[:, -5]) & bull[:, -4:-1].all(axis=1)
+                                      & (h[:, -4:-1] < o[:, -5:-4]).all(axis=1))
+    return hits
 
-def is_rising_three_methods(days: pd.DataFrame) -> bool:
-    """
-    判断是否为上升三法形态
-    """
-    if len(days) < 5:
-        return False
-    
-    day1, day5 = days.iloc[0], days.iloc[4]
-    middle_days = days.iloc[1:4]
-    
-    return (day1['close'] > day1['open'] and  # 第一天大阳线
-            day5['close'] > day5['open'] and  # 最后一天大阳线
-            day5['close'] > day1['close'] and  # 突破新高
-            all(middle_days.iloc[i]['close'] < middle_days.iloc[i]['open']  # 中间三天是小阴线
-                for i in range(len(middle_days))) and
-            all(middle_days.iloc[i]['low'] > day1['open']  # 中间三天的最低价高于第一天开盘价
-                for i in range(len(middle_days))))
-
-def is_falling_three_methods(days: pd.DataFrame) -> bool:
-    """
-    判断是否为下降三法形态
-    """
-    if len(days) < 5:
-        return False
-    
-    day1, day5 = days.iloc[0], days.iloc[4]
-    middle_days = days.iloc[1:4]
-    
-    return (day1['close'] < day1['open'] and  # 第一天大阴线
-            day5['close'] < day5['open'] and  # 最后一天大阴线
-            day5['close'] < day1['close'] and  # 突破新低
-            all(middle_days.iloc[i]['close'] > middle_days.iloc[i]['open']  # 中间三天是小阳线
-                for i in range(len(middle_days))) and
-            all(middle_days.iloc[i]['high'] < day1['open']  # 中间三天的最高价低于第一天开盘价
-                for i in range(len(middle_days))))
 
 def check_volume_confirmation(volume: float, avg_volume: float) -> float:
     """
@@ -627,146 +342,6 @@ def check_volume_confirmation(volume: float, avg_volume: float) -> float:
     else:
         return 0.3
 
-def is_harami(day1: pd.Series, day2: pd.Series, bullish: bool = True) -> bool:
-    """
-    判断是否为孕线形态（看涨/看跌）
-    
-    参数:
-        day1: 第一天数据
-        day2: 第二天数据
-        bullish: True为看涨孕线，False为看跌孕线
-    """
-    if bullish:
-        return (day1['close'] < day1['open'] and  # 第一天阴线
-                day2['close'] > day2['open'] and  # 第二天阳线
-                day2['open'] > day1['close'] and  # 第二天实体在第一天实体内
-                day2['close'] < day1['open'] and
-                abs(day2['close'] - day2['open']) < abs(day1['close'] - day1['open']) * 0.5)  # 第二天实体小于第一天的一半
-    else:
-        return (day1['close'] > day1['open'] and  # 第一天阳线
-                day2['close'] < day2['open'] and  # 第二天阴线
-                day2['open'] < day1['close'] and  # 第二天实体在第一天实体内
-                day2['close'] > day1['open'] and
-                abs(day2['close'] - day2['open']) < abs(day1['close'] - day1['open']) * 0.5)  # 第二天实体小于第一天的一半
-
-def is_tweezer(day1: pd.Series, day2: pd.Series, bullish: bool = True) -> bool:
-    """
-    判断是否为镊子底/顶形态
-    """
-    price_diff_threshold = (day1['high'] - day1['low']) * 0.001  # 允许0.1%的误差
-    
-    if bullish:  # 镊子底
-        return (day1['close'] < day1['open'] and  # 第一天阴线
-                day2['close'] > day2['open'] and  # 第二天阳线
-                abs(day1['low'] - day2['low']) <= price_diff_threshold)  # 两天低点相同
-    else:  # 镊子顶
-        return (day1['close'] > day1['open'] and  # 第一天阳线
-                day2['close'] < day2['open'] and  # 第二天阴线
-                abs(day1['high'] - day2['high']) <= price_diff_threshold)  # 两天高点相同
-
-def is_piercing_line(day1: pd.Series, day2: pd.Series) -> bool:
-    """
-    判断是否为刺透形态
-    """
-    mid_point = (day1['open'] + day1['close']) / 2
-    return (day1['close'] < day1['open'] and  # 第一天阴线
-            day2['close'] > day2['open'] and  # 第二天阳线
-            day2['open'] < day1['close'] and  # 第二天开盘价低于第一天收盘价
-            day2['close'] > mid_point)  # 第二天收盘价高于第一天实体中点
-
-def is_dark_cloud_cover(day1: pd.Series, day2: pd.Series) -> bool:
-    """
-    判断是否为乌云盖顶形态
-    """
-    mid_point = (day1['open'] + day1['close']) / 2
-    return (day1['close'] > day1['open'] and  # 第一天阳线
-            day2['close'] < day2['open'] and  # 第二天阴线
-            day2['open'] > day1['close'] and  # 第二天开盘价高于第一天收盘价
-            day2['close'] < mid_point)  # 第二天收盘价低于第一天实体中点
-
-def is_inside_bar(day1: pd.Series, day2: pd.Series) -> bool:
-    """
-    判断是否为内包形态
-    """
-    return (day2['high'] < day1['high'] and  # 第二天最高价低于第一天最高价
-            day2['low'] > day1['low'])  # 第二天最低价高于第一天最低价
-
-def is_outside_bar(day1: pd.Series, day2: pd.Series) -> bool:
-    """
-    判断是否为外包形态
-    """
-    return (day2['high'] > day1['high'] and  # 第二天最高价高于第一天最高价
-            day2['low'] < day1['low'])  # 第二天最低价低于第一天最低价
-
-def is_three_inside(days: pd.DataFrame) -> Tuple[bool, bool]:
-    """
-    判断是否为三内形态（看涨/看跌）
-    返回: (是否看涨三内, 是否看跌三内)
-    """
-    if len(days) < 3:
-        return False, False
-        
-    day1, day2, day3 = days.iloc[0], days.iloc[1], days.iloc[2]
-    
-    bullish = (is_inside_bar(day1, day2) and  # 前两天形成内包
-               day1['close'] < day1['open'] and  # 第一天阴线
-               day3['close'] > day3['open'] and  # 第三天阳线
-               day3['close'] > day2['high'])     # 第三天突破上方
-               
-    bearish = (is_inside_bar(day1, day2) and  # 前两天形成内包
-               day1['close'] > day1['open'] and  # 第一天阳线
-               day3['close'] < day3['open'] and  # 第三天阴线
-               day3['close'] < day2['low'])      # 第三天突破下方
-               
-    return bullish, bearish
-
-def is_three_outside(days: pd.DataFrame) -> Tuple[bool, bool]:
-    """
-    判断是否为三外形态（看涨/看跌）
-    返回: (是否看涨三外, 是否看跌三外)
-    """
-    if len(days) < 3:
-        return False, False
-        
-    day1, day2, day3 = days.iloc[0], days.iloc[1], days.iloc[2]
-    
-    bullish = (is_outside_bar(day1, day2) and  # 前两天形成外包
-               day1['close'] < day1['open'] and  # 第一天阴线
-               day2['close'] > day2['open'] and  # 第二天阳线
-               day3['close'] > day3['open'] and  # 第三天阳线
-               day3['close'] > day2['high'])     # 第三天创新高
-               
-    bearish = (is_outside_bar(day1, day2) and  # 前两天形成外包
-               day1['close'] > day1['open'] and  # 第一天阳线
-               day2['close'] < day2['open'] and  # 第二天阴线
-               day3['close'] < day3['open'] and  # 第三天阴线
-               day3['close'] < day2['low'])      # 第三天创新低
-               
-    return bullish, bearish
-
-def is_three_line_strike(days: pd.DataFrame) -> Tuple[bool, bool]:
-    """
-    判断是否为三线打击形态（看涨/看跌）
-    返回: (是否看涨三线打击, 是否看跌三线打击)
-    """
-    if len(days) < 4:
-        return False, False
-    
-    # 检查前三天
-    bullish = all(days.iloc[i]['close'] < days.iloc[i]['open'] for i in range(3))  # 前三天都是阴线
-    bearish = all(days.iloc[i]['close'] > days.iloc[i]['open'] for i in range(3))  # 前三天都是阳线
-    
-    if bullish:
-        # 看涨三线打击
-        return (days.iloc[3]['close'] > days.iloc[3]['open'] and  # 第四天是阳线
-                days.iloc[3]['close'] > days.iloc[0]['open']), False  # 第四天收盘价高于第一天开盘价
-    elif bearish:
-        # 看跌三线打击
-        return False, (days.iloc[3]['close'] < days.iloc[3]['open'] and  # 第四天是阴线
-                      days.iloc[3]['close'] < days.iloc[0]['open'])  # 第四天收盘价低于第一天开盘价
-    
-    return False, False
-
 def convert_to_stars(strength: float) -> str:
     """
     将强度分数转换为星级显示
@@ -777,9 +352,15 @@ def convert_to_stars(strength: float) -> str:
     返回:
         星级字符串，例如: "★★★☆☆"
     """
-    # 确保strength在0-5之间
+    # 确保strength在0-5之间；星级只取决于0.1精度的分数，直接查表
     strength = max(0, min(5, strength))
-    
+    return _STAR_TABLE[int(strength * 10)]
+
+
+def _compute_stars(strength: float) -> str:
+    """
+    按星级规则生成星级字符串，用于构建查找表
+    """
     # 计算实心星和空心星的数量
     full_stars = int(strength)
     empty_stars = 5 - full_stars
@@ -790,145 +371,6 @@ def convert_to_stars(strength: float) -> str:
     
     return "★" * full_stars + "☆" * empty_stars
 
-def is_long_legged_doji(open_price: float, close_price: float, high: float, low: float) -> bool:
-    """
-    判断是否为长腿十字星形态
-    """
-    body = abs(open_price - close_price)
-    upper_shadow = high - max(open_price, close_price)
-    lower_shadow = min(open_price, close_price) - low
-    total_range = high - low
-    
-    return (body <= total_range * 0.1 and 
-            upper_shadow >= total_range * 0.3 and 
-            lower_shadow >= total_range * 0.3)
-
-def is_gravestone_doji(open_price: float, close_price: float, high: float, low: float) -> bool:
-    """
-    判断是否为墓碑十字星形态
-    """
-    body = abs(open_price - close_price)
-    upper_shadow = high - max(open_price, close_price)
-    lower_shadow = min(open_price, close_price) - low
-    total_range = high - low
-    
-    return (body <= total_range * 0.1 and 
-            upper_shadow >= total_range * 0.6 and 
-            lower_shadow <= total_range * 0.1)
-
-def is_spinning_top(open_price: float, close_price: float, high: float, low: float) -> bool:
-    """
-    判断是否为纺锤线形态
-    """
-    body = abs(open_price - close_price)
-    upper_shadow = high - max(open_price, close_price)
-    lower_shadow = min(open_price, close_price) - low
-    total_range = high - low
-    
-    return (body <= total_range * 0.3 and 
-            upper_shadow >= body and 
-            lower_shadow >= body and
-            abs(upper_shadow - lower_shadow) <= total_range * 0.1)
-
-def is_inverted_hammer(open_price: float, close_price: float, high: float, low: float) -> bool:
-    """
-    判断是否为倒锤子线形态
-    """
-    body = abs(open_price - close_price)
-    upper_shadow = high - max(open_price, close_price)
-    lower_shadow = min(open_price, close_price) - low
-    total_range = high - low
-    
-    return (upper_shadow >= body * 2 and 
-            lower_shadow <= body * 0.1 and 
-            body >= total_range * 0.1)
-
-def is_hanging_man(open_price: float, close_price: float, high: float, low: float) -> bool:
-    """
-    判断是否为吊颈线形态
-    """
-    body = abs(open_price - close_price)
-    upper_shadow = high - max(open_price, close_price)
-    lower_shadow = min(open_price, close_price) - low
-    total_range = high - low
-    
-    return (lower_shadow >= body * 2 and 
-            upper_shadow <= body * 0.1 and 
-            body >= total_range * 0.1 and
-            close_price < open_price)  # 必须是阴线
-
-def is_gap(day1: pd.Series, day2: pd.Series, bullish: bool = True) -> bool:
-    """
-    判断是否为跳空缺口形态
-    """
-    if bullish:
-        return day2['low'] > day1['high']  # 向上跳空
-    else:
-        return day2['high'] < day1['low']  # 向下跳空
-
-def is_flat_top_bottom(day1: pd.Series, day2: pd.Series, is_top: bool = True) -> bool:
-    """
-    判断是否为平头顶/底形态
-    """
-    price_diff_threshold = (day1['high'] - day1['low']) * 0.001  # 允许0.1%的误差
-    
-    if is_top:
-        return abs(day1['high'] - day2['high']) <= price_diff_threshold  # 平头顶
-    else:
-        return abs(day1['low'] - day2['low']) <= price_diff_threshold   # 平头底
-
-def is_three_mountains(days: pd.DataFrame) -> bool:
-    """
-    判断是否为三山形态（看跌反转）
-    """
-    if len(days) < 3:
-        return False
-    
-    highs = [days.iloc[i]['high'] for i in range(3)]
-    return (highs[1] > highs[0] and 
-            highs[1] > highs[2] and 
-            abs(highs[0] - highs[2]) <= (days.iloc[0]['high'] - days.iloc[0]['low']) * 0.1)
-
-def is_three_rivers(days: pd.DataFrame) -> bool:
-    """
-    判断是否为三川形态（看涨反转）
-    """
-    if len(days) < 3:
-        return False
-    
-    lows = [days.iloc[i]['low'] for i in range(3)]
-    return (lows[1] < lows[0] and 
-            lows[1] < lows[2] and 
-            abs(lows[0] - lows[2]) <= (days.iloc[0]['high'] - days.iloc[0]['low']) * 0.1)
-
-def is_three_stars(days: pd.DataFrame) -> bool:
-    """
-    判断是否为三星形态
-    """
-    if len(days) < 3:
-        return False
-    
-    # 检查是否都是十字星
-    return all(is_doji(days.iloc[i]['open'], 
-                      days.iloc[i]['close'],
-                      days.iloc[i]['high'],
-                      days.iloc[i]['low']) for i in range(3))
-
-def is_island_reversal(days: pd.DataFrame, bullish: bool = True) -> bool:
-    """
-    判断是否为岛型反转形态
-    """
-    if len(days) < 3:
-        return False
-    
-    day1, day2, day3 = days.iloc[0], days.iloc[1], days.iloc[2]
-    
-    if bullish:
-        return (day2['low'] > day1['high'] and  # 第一个跳空（向上）
-                day3['high'] < day2['low'])      # 第二个跳空（向下）
-    else:
-        return (day2['high'] < day1['low'] and  # 第一个跳空（向下）
-                day3['low'] > day2['high'])      # 第二个跳空（向上）
-
-
 
+# 0.0-5.0按0.1步长的星级字符串
+_STAR_TABLE = tuple(_compute_stars(i / 10) for i in range(51))
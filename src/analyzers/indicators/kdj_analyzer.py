@@ -2,10 +2,59 @@
 KDJ指标分析模块
 分析KDJ指标的趋势和信号
 """
-from typing import Dict, Any
+from dataclasses import dataclass
+from typing import Dict, Any, Optional, Tuple
 import pandas as pd
 import numpy as np
 
+from ._kdj_numeric import (nan_mean_std, kdj_stats, trend_code, cross_code, strength_code,
+                           pattern_code, divergence_code, DIVERGENCE_TOP, DIVERGENCE_BOTTOM)
+
+# 数值内核返回的编码到中文标签的映射，顺序与_kdj_numeric中的编码常量一致
+_TREND_LABELS = ('强烈超买信号', '一般超买信号', '强烈超卖信号', '一般超卖信号',
+                 '多头动能增强', '多头信号', '空头动能增强', '空头信号',
+                 '盘整信号', '震荡信号')
+_CROSS_LABELS = ("黄金交叉（J线确认）", "黄金交叉", "死亡交叉（J线确认）", "死亡交叉",
+                 "交叉临界", "无交叉信号")
+_STRENGTH_LABELS = ("极强", "较强", "中等", "较弱")
+_PATTERN_LABELS = ("多头排列", "空头排列", "平行排列", "发散排列")
+_DIVERGENCE_LABELS = ("顶背离", "底背离", "无背离")
+
+# 综合信号用到的标志位：趋势编码、交叉编码各自对应的超买/超卖、金叉/死叉属性
+_OVERBOUGHT = 1
+_OVERSOLD = 2
+_GOLDEN_CROSS = 4
+_DEATH_CROSS = 8
+_TREND_FLAGS = (_OVERBOUGHT, _OVERBOUGHT, _OVERSOLD, _OVERSOLD, 0, 0, 0, 0, 0, 0)
+_CROSS_FLAGS = (_GOLDEN_CROSS, _GOLDEN_CROSS, _DEATH_CROSS, _DEATH_CROSS, 0, 0)
+
+# 一个时间窗口的K、D、J三条float64数组
+KdjArrays = Tuple[np.ndarray, np.ndarray, np.ndarray]
+
+@dataclass(frozen=True)
+class KdjResult:
+    """
+    单只股票的KDJ分析结果
+    
+    使用__slots__固定字段，批量扫描大量股票时比逐只构造字典更省内存；
+    各维度为编码（对应的中文标签见_TREND_LABELS等），需要文字描述时通过format_kdj_result转换
+    """
+    __slots__ = (
+        'k', 'd', 'j', 'long_term_trend', 'medium_term_trend', 'short_term_trend',
+        'cross_pattern', 'divergence', 'strength', 'pattern', 'signal'
+    )
+    k: float
+    d: float
+    j: float
+    long_term_trend: int
+    medium_term_trend: int
+    short_term_trend: int
+    cross_pattern: int
+    divergence: int
+    strength: int
+    pattern: int
+    signal: str
+
 def analyze_kdj(df: pd.DataFrame, long_term: pd.DataFrame, medium_term: pd.DataFrame, short_term: pd.DataFrame) -> Dict[str, Any]:
     """
     分析KDJ指标数据
@@ -19,203 +68,155 @@ def analyze_kdj(df: pd.DataFrame, long_term: pd.DataFrame, medium_term: pd.DataF
     返回:
         Dict[str, Any]: KDJ分析结果
     """
-    latest = df.iloc[-1]
+    return format_kdj_result(analyze_kdj_codes(df, long_term, medium_term, short_term))
+
+def analyze_kdj_codes(df: pd.DataFrame, long_term: pd.DataFrame, medium_term: pd.DataFrame, short_term: pd.DataFrame) -> KdjResult:
+    """
+    分析KDJ指标数据，各维度以编码而非文字描述返回
+    
+    参数与analyze_kdj相同；需要展示时再通过format_kdj_result转换为文字
+    
+    返回:
+        KdjResult: 最新K、D、J值、各维度编码及综合信号
+    """
+    # 长/中/短期窗口都是df的尾部：K、D、J与收盘价只从df转换一次，各窗口按长度取尾部视图，各子分析共用
+    kdj = _kdj_arrays(df)
+    close = df['close'].to_numpy(dtype=np.float64)
+    latest_k, latest_d, latest_j = (values[-1] for values in kdj)
+    long_kdj = _tail(kdj, len(long_term))
+    medium_kdj = _tail(kdj, len(medium_term))
+    short_kdj = _tail(kdj, len(short_term))
     
     # 分析各个时间维度的趋势
-    long_trend = _analyze_kdj_trend(long_term, "long")
-    medium_trend = _analyze_kdj_trend(medium_term, "medium")
-    short_trend = _analyze_kdj_trend(short_term, "short")
+    # 中期窗口的均值与标准差同时用于趋势和强度分析，只计算一次
+    medium_stats = kdj_stats(*medium_kdj)
+    long_trend = _analyze_kdj_trend(long_kdj, "long")
+    medium_trend = _analyze_kdj_trend(medium_kdj, "medium", stats=medium_stats)
+    short_trend = _analyze_kdj_trend(short_kdj, "short")
     
     # 分析KDJ三线交叉形态
-    cross_pattern = _analyze_cross_pattern(short_term)
+    cross_pattern = _analyze_cross_pattern(short_kdj)
     
     # 分析背离
-    divergence = _analyze_divergence(medium_term)
+    divergence = _analyze_divergence(close[-len(medium_term):], medium_kdj[0])
     
     # 分析KDJ指标强度
-    strength = _analyze_strength(medium_term)
+    strength = _analyze_strength(medium_kdj, stats=medium_stats)
     
     # 分析KDJ形态
-    pattern = _analyze_kdj_pattern(short_term)
+    pattern = _analyze_kdj_pattern(short_kdj)
     
     # 生成综合信号
-    signal = _generate_composite_signal(long_trend, medium_trend, short_trend, cross_pattern, divergence)
+    signal = _generate_composite_signal(long_trend, medium_trend, cross_pattern, divergence)
+    
+    return KdjResult(latest_k, latest_d, latest_j, long_trend, medium_trend, short_trend,
+                     cross_pattern, divergence, strength, pattern, signal)
+
+def format_kdj_result(result: KdjResult) -> Dict[str, Any]:
+    """
+    将KDJ分析结果的各维度编码转换为文字描述
     
+    参数:
+        result (KdjResult): analyze_kdj_codes的返回结果
+        
+    返回:
+        Dict[str, Any]: 与analyze_kdj相同的结果字典
+    """
     return {
-        'K': latest['kdj_k'],
-        'D': latest['kdj_d'],
-        'J': latest['kdj_j'],
-        'long_term_trend': long_trend,
-        'medium_term_trend': medium_trend,
-        'short_term_trend': short_trend,
-        'cross_pattern': cross_pattern,
-        'divergence': divergence,
-        'strength': strength,
-        'pattern': pattern,
-        'signal': signal
+        'K': result.k,
+        'D': result.d,
+        'J': result.j,
+        'long_term_trend': _TREND_LABELS[result.long_term_trend],
+        'medium_term_trend': _TREND_LABELS[result.medium_term_trend],
+        'short_term_trend': _TREND_LABELS[result.short_term_trend],
+        'cross_pattern': _CROSS_LABELS[result.cross_pattern],
+        'divergence': _DIVERGENCE_LABELS[result.divergence],
+        'strength': _STRENGTH_LABELS[result.strength],
+        'pattern': _PATTERN_LABELS[result.pattern],
+        'signal': result.signal
     }
 
-def _analyze_kdj_trend(data: pd.DataFrame, timeframe: str) -> str:
+def _analyze_kdj_trend(kdj: KdjArrays, timeframe: str,
+                       stats: Optional[Tuple[np.ndarray, np.ndarray]] = None) -> int:
     """
     分析KDJ趋势
     
     参数:
-        data (pd.DataFrame): 价格数据
+        kdj (KdjArrays): 该时间窗口的K、D、J数组
         timeframe (str): 时间维度（long/medium/short）
+        stats (Tuple[np.ndarray, np.ndarray], optional): 该窗口kdj_stats的结果，为None时现算K值的均值与标准差
         
     返回:
-        str: KDJ趋势分析结果
+        int: KDJ趋势编码，对应的中文标签见_TREND_LABELS
     """
-    latest = data.iloc[-1]
-    
-    # 计算KDJ区间
-    k_mean = data['kdj_k'].mean()
-    k_std = data['kdj_k'].std()
-    
-    # 计算KDJ趋势斜率
-    k_slope = (data['kdj_k'].iloc[-1] - data['kdj_k'].iloc[0]) / len(data)
-    d_slope = (data['kdj_d'].iloc[-1] - data['kdj_d'].iloc[0]) / len(data)
-    j_slope = (data['kdj_j'].iloc[-1] - data['kdj_j'].iloc[0]) / len(data)
-    
-    # 判断超买超卖
-    if latest['kdj_j'] > 100:
-        strength = '强烈' if latest['kdj_j'] > 110 else '一般'
-        trend = f'{strength}超买信号'
-    elif latest['kdj_j'] < 0:
-        strength = '强烈' if latest['kdj_j'] < -10 else '一般'
-        trend = f'{strength}超卖信号'
-    elif latest['kdj_k'] > k_mean + k_std:
-        if k_slope > 0 and d_slope > 0 and j_slope > 0:
-            trend = '多头动能增强'
-        else:
-            trend = '多头信号'
-    elif latest['kdj_k'] < k_mean - k_std:
-        if k_slope < 0 and d_slope < 0 and j_slope < 0:
-            trend = '空头动能增强'
-        else:
-            trend = '空头信号'
+    k, d, j = kdj
+    if stats is None:
+        k_mean, k_std = nan_mean_std(k)
     else:
-        if abs(k_slope) < 0.1 and abs(d_slope) < 0.1:
-            trend = '盘整信号'
-        else:
-            trend = '震荡信号'
-            
-    return trend
+        k_mean, k_std = stats[0][0], stats[1][0]
+    return trend_code(k, d, j, k_mean, k_std)
 
-def _analyze_cross_pattern(data: pd.DataFrame) -> str:
+def _analyze_cross_pattern(kdj: KdjArrays) -> int:
     """
-    分析KDJ三线交叉形态
+    分析KDJ三线交叉形态，返回交叉编码，对应的中文标签见_CROSS_LABELS
     """
-    latest = data.iloc[-1]
-    prev = data.iloc[-2]
-    
-    # 判断金叉死叉
-    if latest['kdj_k'] > latest['kdj_d'] and prev['kdj_k'] <= prev['kdj_d']:
-        if latest['kdj_j'] > latest['kdj_k']:
-            return "黄金交叉（J线确认）"
-        else:
-            return "黄金交叉"
-    elif latest['kdj_k'] < latest['kdj_d'] and prev['kdj_k'] >= prev['kdj_d']:
-        if latest['kdj_j'] < latest['kdj_k']:
-            return "死亡交叉（J线确认）"
-        else:
-            return "死亡交叉"
-    elif abs(latest['kdj_k'] - latest['kdj_d']) < 1:
-        return "交叉临界"
-    else:
-        return "无交叉信号"
+    return cross_code(*kdj)
 
-def _analyze_divergence(data: pd.DataFrame) -> str:
+def _analyze_divergence(close: np.ndarray, kdj_k: np.ndarray) -> int:
     """
-    分析KDJ指标与价格的背离情况
+    分析KDJ指标与价格的背离情况（close、kdj_k为同一窗口的收盘价与K值数组），
+    返回背离编码，对应的中文标签见_DIVERGENCE_LABELS
     """
-    # 获取最高价和最低价的位置
-    price_highs = data['close'].rolling(window=5, center=True).max()
-    price_lows = data['close'].rolling(window=5, center=True).min()
-    
-    # 获取KDJ的高点和低点
-    kdj_highs = data['kdj_k'].rolling(window=5, center=True).max()
-    kdj_lows = data['kdj_k'].rolling(window=5, center=True).min()
-    
-    # 判断顶背离
-    if (price_highs.iloc[-1] > price_highs.iloc[-5] and 
-        kdj_highs.iloc[-1] < kdj_highs.iloc[-5]):
-        return "顶背离"
-    # 判断底背离
-    elif (price_lows.iloc[-1] < price_lows.iloc[-5] and 
-          kdj_lows.iloc[-1] > kdj_lows.iloc[-5]):
-        return "底背离"
-    else:
-        return "无背离"
+    return divergence_code(close, kdj_k)
 
-def _analyze_strength(data: pd.DataFrame) -> str:
+def _analyze_strength(kdj: KdjArrays,
+                      stats: Optional[Tuple[np.ndarray, np.ndarray]] = None) -> int:
     """
-    分析KDJ指标强度
+    分析KDJ指标强度，stats为该窗口kdj_stats的结果，为None时现算；
+    返回强度编码，对应的中文标签见_STRENGTH_LABELS
     """
-    latest = data.iloc[-1]
-    
-    # 计算KDJ指标的标准差
-    k_std = data['kdj_k'].std()
-    d_std = data['kdj_d'].std()
-    j_std = data['kdj_j'].std()
-    
-    # 计算当前值与均值的偏离程度
-    k_dev = abs(latest['kdj_k'] - data['kdj_k'].mean()) / k_std
-    d_dev = abs(latest['kdj_d'] - data['kdj_d'].mean()) / d_std
-    j_dev = abs(latest['kdj_j'] - data['kdj_j'].mean()) / j_std
-    
-    # 判断强度
-    avg_dev = (k_dev + d_dev + j_dev) / 3
-    if avg_dev > 2:
-        return "极强"
-    elif avg_dev > 1.5:
-        return "较强"
-    elif avg_dev > 1:
-        return "中等"
-    else:
-        return "较弱"
+    k, d, j = kdj
+    means, stds = kdj_stats(k, d, j) if stats is None else stats
+    return strength_code(k, d, j, means, stds)
 
-def _analyze_kdj_pattern(data: pd.DataFrame) -> str:
+def _analyze_kdj_pattern(kdj: KdjArrays) -> int:
     """
-    分析KDJ形态特征
+    分析KDJ形态特征，返回三线排列编码，对应的中文标签见_PATTERN_LABELS
     """
-    latest = data.iloc[-1]
-    
-    # 判断三线位置关系
-    if latest['kdj_j'] > latest['kdj_k'] > latest['kdj_d']:
-        return "多头排列"
-    elif latest['kdj_j'] < latest['kdj_k'] < latest['kdj_d']:
-        return "空头排列"
-    elif abs(latest['kdj_k'] - latest['kdj_d']) < 2:
-        return "平行排列"
-    else:
-        return "发散排列"
+    return pattern_code(*kdj)
+
+def _kdj_arrays(data: pd.DataFrame) -> KdjArrays:
+    """
+    取出K、D、J三列的float64数组，供_kdj_numeric中的数值内核使用
+    """
+    return (data['kdj_k'].to_numpy(dtype=np.float64),
+            data['kdj_d'].to_numpy(dtype=np.float64),
+            data['kdj_j'].to_numpy(dtype=np.float64))
 
-def _generate_composite_signal(long_trend: str, medium_trend: str, short_trend: str, 
-                             cross_pattern: str, divergence: str) -> str:
+def _tail(kdj: KdjArrays, n: int) -> KdjArrays:
     """
-    生成综合信号
+    取K、D、J三条数组最后n天的视图
     """
+    return tuple(values[-n:] for values in kdj)
+
+def _generate_composite_signal(long_trend: int, medium_trend: int,
+                             cross_pattern: int, divergence: int) -> str:
+    """
+    生成综合信号（趋势、交叉与背离均为编码，通过标志位判断超买超卖与金叉死叉）
+    """
+    trend_flags = _TREND_FLAGS[long_trend] | _TREND_FLAGS[medium_trend]
+    cross_flags = _CROSS_FLAGS[cross_pattern]
+    
     # 根据不同时间维度的趋势和信号生成综合判断
-    if "超买" in long_trend or "超买" in medium_trend:
-        if "死亡交叉" in cross_pattern or "顶背离" in divergence:
+    if trend_flags & _OVERBOUGHT:
+        if cross_flags & _DEATH_CROSS or divergence == DIVERGENCE_TOP:
             return "强烈卖出"
         else:
             return "谨慎持有"
-    elif "超卖" in long_trend or "超卖" in medium_trend:
-        if "黄金交叉" in cross_pattern or "底背离" in divergence:
+    elif trend_flags & _OVERSOLD:
+        if cross_flags & _GOLDEN_CROSS or divergence == DIVERGENCE_BOTTOM:
             return "强烈买入"
         else:
             return "谨慎买入"
-    elif "强势上涨" in short_trend:
-        if "顶背离" in divergence:
-            return "高位观望"
-        else:
-            return "持续做多"
-    elif "强势下跌" in short_trend:
-        if "底背离" in divergence:
-            return "低位介入"
-        else:
-            return "持续观望"
     else:
-        return "观望等待" 
\ No newline at end of file
+        return "观望等待"
@@ -6,10 +6,40 @@
 3. 趋势判断
 """
 
+from functools import lru_cache
 from typing import Dict, Any, List
 import pandas as pd
 import numpy as np
 
+from ._indicators_numba import (nan_mean_std, ma_cross_codes, MA_CROSS_GOLDEN, MA_CROSS_STRONG)
+
+# 各时间窗口转换为数组时的列顺序：七条均线、收盘价、成交量；_COL为列名到列号的映射
+_MA_COLUMNS = [
+    'ma_qfq_5', 'ma_qfq_10', 'ma_qfq_20',
+    'ma_qfq_30', 'ma_qfq_60', 'ma_qfq_90', 'ma_qfq_250'
+]
+_WINDOW_COLUMNS = _MA_COLUMNS + ['close', 'vol']
+_COL = {name: i for i, name in enumerate(_WINDOW_COLUMNS)}
+
+# 检查交叉的均线对（短期均线, 长期均线），顺序与_indicators_numba.ma_cross_codes中写死的列号一致
+_CROSS_PAIRS = (
+    ('ma_qfq_5', 'ma_qfq_10'),
+    ('ma_qfq_5', 'ma_qfq_20'),
+    ('ma_qfq_10', 'ma_qfq_20'),
+    ('ma_qfq_20', 'ma_qfq_30')
+)
+_CROSS_SHORT_INDEX = tuple(_COL[short_ma] for short_ma, _ in _CROSS_PAIRS)
+_CROSS_LONG_INDEX = tuple(_COL[long_ma] for _, long_ma in _CROSS_PAIRS)
+
+# 分析拐点的均线及拐点类型标签（编码依次为0~4）
+_TURNING_COLUMNS = ['ma_qfq_5', 'ma_qfq_10', 'ma_qfq_20']
+_TURNING_INDEX = [_COL[ma] for ma in _TURNING_COLUMNS]
+
+# 密集区突破用到的列：5、10、20日均线、收盘价、成交量
+_BREAKTHROUGH_INDEX = [_COL[name] for name in ('ma_qfq_5', 'ma_qfq_10', 'ma_qfq_20', 'close', 'vol')]
+_BREAKTHROUGH_TYPES = ('no_breakthrough', 'upward_breakthrough', 'downward_breakthrough')
+_TURNING_LABELS = ("加速上涨", "下跌趋缓", "上涨趋缓", "加速下跌", "无明显拐点")
+
 def analyze_ma_system(df: pd.DataFrame,
                      long_term: pd.DataFrame,
                      medium_term: pd.DataFrame,
@@ -26,29 +56,36 @@ def analyze_ma_system(df: pd.DataFrame,
     返回:
         Dict[str, Dict[str, Any]]: 包含信号分析和指标数据的字典
     """
-    latest = df.iloc[-1]
-    ma_columns = [
-        'ma_qfq_5', 'ma_qfq_10', 'ma_qfq_20',
-        'ma_qfq_30', 'ma_qfq_60', 'ma_qfq_90', 'ma_qfq_250'
-    ]
+    ma_columns = _MA_COLUMNS
+    
+    # 长/中/短期窗口都是df的尾部：各列只从df转换一次，窗口按长度取尾部视图
+    values = _window_values(df)
+    
+    # 最新一天的全部均线值与收盘价，各子分析直接按位置索引该数组
+    latest_row = values[-1]
+    latest_ma = latest_row[:len(ma_columns)]
+    latest_price = latest_row[_COL['close']]
     
     # 1. 分析长期趋势（250天）
-    long_term_trend = _analyze_long_term_trend(long_term, ma_columns)
+    long_term_trend = _analyze_long_term_trend(values[-len(long_term):], ma_columns)
     
     # 2. 分析中期趋势（60天）
-    medium_term_trend = _analyze_medium_term_trend(medium_term, ma_columns)
+    medium_term_trend = _analyze_medium_term_trend(values[-len(medium_term):], ma_columns)
     
     # 3. 分析短期信号（20天）
-    short_term_signal = _analyze_short_term_signal(short_term, ma_columns)
+    short_term_signal = _analyze_short_term_signal(values[-len(short_term):], ma_columns, latest_ma, latest_price)
+    
+    # 相邻均线之差（长周期减短周期），形态与强度分析共用
+    ma_gaps = np.diff(latest_ma)
     
     # 4. 分析均线形态
-    formation = _analyze_formation(df, ma_columns)
+    formation = _analyze_formation(latest_ma, ma_gaps)
     
     # 5. 分析均线强度
-    strength = _analyze_strength(medium_term, ma_columns)
+    strength = _analyze_strength(latest_ma, ma_gaps, ma_columns)
     
     # 6. 分析支撑阻力位
-    support_resistance = _analyze_support_resistance(df, ma_columns)
+    support_resistance = _analyze_support_resistance(latest_ma, latest_price, ma_columns)
     
     # 7. 生成综合信号
     signal = _generate_composite_signal({
@@ -71,13 +108,20 @@ def analyze_ma_system(df: pd.DataFrame,
     }
     
 
-def _analyze_long_term_trend(data: pd.DataFrame, ma_columns: list) -> Dict[str, Any]:
+def _window_values(data: pd.DataFrame) -> np.ndarray:
+    """
+    将一个时间窗口转换为 (天数, 列数) 的float64数组，列顺序见_WINDOW_COLUMNS，各子分析按_COL取列
+    """
+    return data[_WINDOW_COLUMNS].to_numpy(dtype=np.float64)
+
+def _analyze_long_term_trend(data: np.ndarray, ma_columns: list) -> Dict[str, Any]:
     """
     分析均线长期趋势（250天）
     """
     # 计算主要均线的趋势
-    ma250_trend = _calculate_trend_direction(data['ma_qfq_250'])
-    ma60_trend = _calculate_trend_direction(data['ma_qfq_60'])
+    slopes = _calculate_trend_slopes(data, ['ma_qfq_250', 'ma_qfq_60'])
+    ma250_trend = slopes['ma_qfq_250']
+    ma60_trend = slopes['ma_qfq_60']
     
     # 判断长期趋势
     if ma250_trend > 0 and ma60_trend > 0:
@@ -98,16 +142,17 @@ def _analyze_long_term_trend(data: pd.DataFrame, ma_columns: list) -> Dict[str,
         'period': '250天'
     }
 
-def _analyze_medium_term_trend(data: pd.DataFrame, ma_columns: list) -> Dict[str, Any]:
+def _analyze_medium_term_trend(data: np.ndarray, ma_columns: list) -> Dict[str, Any]:
     """
     分析均线中期趋势（60天）
     """
     # 计算中期均线的趋势
-    ma60_trend = _calculate_trend_direction(data['ma_qfq_60'])
-    ma20_trend = _calculate_trend_direction(data['ma_qfq_20'])
+    slopes = _calculate_trend_slopes(data, ['ma_qfq_60', 'ma_qfq_20'])
+    ma60_trend = slopes['ma_qfq_60']
+    ma20_trend = slopes['ma_qfq_20']
     
     # 计算趋势的斜率
-    slope = _calculate_trend_slope(data['ma_qfq_20'])
+    slope = ma20_trend
     
     # 判断趋势强度
     if abs(slope) < 0.1:
@@ -125,13 +170,11 @@ def _analyze_medium_term_trend(data: pd.DataFrame, ma_columns: list) -> Dict[str
         'period': '60天'
     }
 
-def _analyze_short_term_signal(data: pd.DataFrame, ma_columns: list) -> Dict[str, Any]:
+def _analyze_short_term_signal(data: np.ndarray, ma_columns: list,
+                               latest_ma: np.ndarray, latest_price: float) -> Dict[str, Any]:
     """
     分析均线短期信号（20天）
     """
-    latest = data.iloc[-1]
-    prev = data.iloc[-2]
-    
     # 1. 分析均线交叉信号
     cross_signals = _analyze_ma_crossover(data)
     
@@ -145,7 +188,7 @@ def _analyze_short_term_signal(data: pd.DataFrame, ma_columns: list) -> Dict[str
     trend_strength = _analyze_short_term_trend_strength(data)
     
     # 5. 分析均线乖离率
-    deviation = _analyze_ma_deviation(data)
+    deviation = _analyze_ma_deviation(latest_ma, latest_price)
     
     # 生成综合短期信号
     summary = _generate_short_term_summary(
@@ -166,137 +209,109 @@ def _analyze_short_term_signal(data: pd.DataFrame, ma_columns: list) -> Dict[str
         'period': '20天'
     }
 
-def _analyze_ma_crossover(data: pd.DataFrame) -> List[Dict[str, Any]]:
+def _analyze_ma_crossover(data: np.ndarray) -> List[Dict[str, Any]]:
     """分析均线交叉信号"""
-    latest = data.iloc[-1]
-    prev = data.iloc[-2]
     signals = []
     
-    # 检查短期均线和中期均线的交叉
-    ma_pairs = [
-        ('ma_qfq_5', 'ma_qfq_10'),
-        ('ma_qfq_5', 'ma_qfq_20'),
-        ('ma_qfq_10', 'ma_qfq_20'),
-        ('ma_qfq_20', 'ma_qfq_30')
-    ]
-    
-    for short_ma, long_ma in ma_pairs:
-        today_diff = latest[short_ma] - latest[long_ma]
-        yesterday_diff = prev[short_ma] - prev[long_ma]
-        
-        if today_diff > 0 and yesterday_diff < 0:
-            strength = "强势" if abs(today_diff) > abs(yesterday_diff) * 1.5 else "普通"
-            signals.append({
-                'type': 'golden_cross',
-                'short_ma': short_ma,
-                'long_ma': long_ma,
-                'strength': strength,
-                'value': latest[short_ma],
-                'diff': today_diff
-            })
-        elif today_diff < 0 and yesterday_diff > 0:
-            strength = "强势" if abs(today_diff) > abs(yesterday_diff) * 1.5 else "普通"
-            signals.append({
-                'type': 'death_cross',
-                'short_ma': short_ma,
-                'long_ma': long_ma,
-                'strength': strength,
-                'value': latest[short_ma],
-                'diff': today_diff
-            })
+    # 最近两天的数据行，逐对判断交叉由数值内核完成，只对发生交叉的均线对生成结果
+    prev_row, last_row = data[-2], data[-1]
+    codes = ma_cross_codes(prev_row, last_row)
+    
+    for i in np.flatnonzero(codes):
+        short_ma, long_ma = _CROSS_PAIRS[i]
+        short_index, long_index = _CROSS_SHORT_INDEX[i], _CROSS_LONG_INDEX[i]
+        signals.append({
+            'type': 'golden_cross' if codes[i] & MA_CROSS_GOLDEN else 'death_cross',
+            'short_ma': short_ma,
+            'long_ma': long_ma,
+            'strength': "强势" if codes[i] & MA_CROSS_STRONG else "普通",
+            'value': last_row[short_index],
+            'diff': last_row[short_index] - last_row[long_index]
+        })
     
     return signals
 
-def _analyze_ma_turning_points(data: pd.DataFrame) -> Dict[str, List[Dict[str, Any]]]:
+def _analyze_ma_turning_points(data: np.ndarray) -> Dict[str, List[Dict[str, Any]]]:
     """分析均线拐点信号"""
-    # 使用最近5天的数据分析拐点
-    recent_data = data.tail(5)
+    # 使用最近5天的数据分析拐点，每列一条均线
+    ma_values = data[-5:, _TURNING_INDEX]
+    # 计算一阶导数（斜率）
+    slopes = np.diff(ma_values, axis=0)
+    # 计算二阶导数（斜率变化）
+    slope_changes = np.diff(slopes, axis=0)
     turning_points = {}
     
-    for ma in ['ma_qfq_5', 'ma_qfq_10', 'ma_qfq_20']:
-        ma_values = recent_data[ma].values
-        # 计算一阶导数（斜率）
-        slopes = np.diff(ma_values)
-        # 计算二阶导数（斜率变化）
-        slope_changes = np.diff(slopes)
+    if len(slope_changes) >= 2:
+        # 按最新一天的斜率与斜率变化的正负组合判断拐点类型
+        last_slopes = slopes[-1]
+        last_changes = slope_changes[-1]
+        turn_codes = np.select(
+            [(last_changes > 0) & (last_slopes > 0),
+             (last_changes > 0) & (last_slopes < 0),
+             (last_changes < 0) & (last_slopes > 0),
+             (last_changes < 0) & (last_slopes < 0)],
+            [0, 1, 2, 3], default=4)
         
-        # 判断拐点类型
-        if len(slope_changes) >= 2:
-            if slope_changes[-1] > 0 and slopes[-1] > 0:
-                turn_type = "加速上涨"
-            elif slope_changes[-1] > 0 and slopes[-1] < 0:
-                turn_type = "下跌趋缓"
-            elif slope_changes[-1] < 0 and slopes[-1] > 0:
-                turn_type = "上涨趋缓"
-            elif slope_changes[-1] < 0 and slopes[-1] < 0:
-                turn_type = "加速下跌"
-            else:
-                turn_type = "无明显拐点"
-                
+        for i, ma in enumerate(_TURNING_COLUMNS):
             turning_points[ma] = {
-                'type': turn_type,
-                'slope': slopes[-1],
-                'slope_change': slope_changes[-1],
-                'value': ma_values[-1]
+                'type': _TURNING_LABELS[turn_codes[i]],
+                'slope': last_slopes[i],
+                'slope_change': last_changes[i],
+                'value': ma_values[-1, i]
             }
     
     return turning_points
 
-def _analyze_ma_breakthrough(data: pd.DataFrame) -> Dict[str, Any]:
+def _analyze_ma_breakthrough(data: np.ndarray) -> Dict[str, Any]:
     """分析均线密集区突破"""
-    latest = data.iloc[-1]
-    prev = data.iloc[-2]
+    # 一次取出最近两天的5、10、20日均线与收盘价、成交量，第0行为前一天，第1行为最新一天
+    prev, latest = data[-2:, _BREAKTHROUGH_INDEX]
     
-    # 计算均线密集区
-    ma_values = [latest[ma] for ma in ['ma_qfq_5', 'ma_qfq_10', 'ma_qfq_20']]
-    ma_std = np.std(ma_values)
+    # 计算均线密集区（均值只算一次，总体标准差与np.std一致）
+    ma_values = latest[:3]
     ma_mean = np.mean(ma_values)
+    ma_std = np.sqrt(np.mean(np.square(ma_values - ma_mean)))
     
     # 判断是否形成密集区
     is_convergence = ma_std / ma_mean < 0.01
     
+    # 分析突破：形成密集区且放量超过1.5倍时，按价格涨跌得到编码，对应_BREAKTHROUGH_TYPES
+    code = 0
+    if is_convergence:
+        price_change = latest[3] - prev[3]
+        volume_change = latest[4] / prev[4]
+        if volume_change > 1.5:
+            code = 1 if price_change > 0 else 2 if price_change < 0 else 0
+    
     result = {
         'is_convergence': is_convergence,
         'ma_std': ma_std,
         'ma_mean': ma_mean,
-        'type': 'no_breakthrough'
+        'type': _BREAKTHROUGH_TYPES[code]
     }
-    
-    # 分析突破
-    if is_convergence:
-        price_change = latest['close'] - prev['close']
-        volume_change = latest['vol'] / prev['vol']
-        
-        if price_change > 0 and volume_change > 1.5:
-            result.update({
-                'type': 'upward_breakthrough',
-                'strength': 'strong' if volume_change > 2 else 'normal',
-                'price_change_pct': price_change / prev['close'] * 100,
-                'volume_change': volume_change
-            })
-        elif price_change < 0 and volume_change > 1.5:
-            result.update({
-                'type': 'downward_breakthrough',
-                'strength': 'strong' if volume_change > 2 else 'normal',
-                'price_change_pct': price_change / prev['close'] * 100,
-                'volume_change': volume_change
-            })
+    if code:
+        result['strength'] = 'strong' if volume_change > 2 else 'normal'
+        result['price_change_pct'] = price_change / prev[3] * 100
+        result['volume_change'] = volume_change
     
     return result
 
-def _analyze_short_term_trend_strength(data: pd.DataFrame) -> Dict[str, Any]:
+def _analyze_short_term_trend_strength(data: np.ndarray) -> Dict[str, Any]:
     """分析短期趋势强度"""
-    recent_data = data.tail(5)
+    recent_data = data[-5:]
     
     # 计算短期均线的趋势强度
-    ma5_trend = _calculate_trend_slope(recent_data['ma_qfq_5'])
-    ma10_trend = _calculate_trend_slope(recent_data['ma_qfq_10'])
+    slopes = _calculate_trend_slopes(recent_data, ['ma_qfq_5', 'ma_qfq_10'])
+    ma5_trend = slopes['ma_qfq_5']
+    ma10_trend = slopes['ma_qfq_10']
     
     # 计算价格动量
-    momentum = (recent_data['close'].iloc[-1] / recent_data['close'].iloc[0] - 1) * 100
+    close = recent_data[:, _COL['close']]
+    momentum = (close[-1] / close[0] - 1) * 100
     
-    # 计算成交量变化
-    volume_change = recent_data['vol'].iloc[-1] / recent_data['vol'].mean()
+    # 计算成交量变化（均值与pandas的mean()一样跳过NaN）
+    vol = recent_data[:, _COL['vol']]
+    volume_change = vol[-1] / nan_mean_std(vol)[0]
     
     strength = 'strong' if abs(momentum) > 3 and volume_change > 1.2 else 'normal'
     
@@ -309,19 +324,16 @@ def _analyze_short_term_trend_strength(data: pd.DataFrame) -> Dict[str, Any]:
         'period': '5天'
     }
 
-def _analyze_ma_deviation(data: pd.DataFrame) -> Dict[str, Any]:
-    """分析均线乖离率"""
-    latest = data.iloc[-1]
-    
+def _analyze_ma_deviation(latest_ma: np.ndarray, latest_price: float) -> Dict[str, Any]:
+    """分析均线乖离率（latest_ma前三项依次为5、10、20日均线）"""
     # 计算各均线对当前价格的乖离率
-    deviations = {}
-    for ma in ['ma_qfq_5', 'ma_qfq_10', 'ma_qfq_20']:
-        deviation = (latest['close'] - latest[ma]) / latest[ma] * 100
-        deviations[ma] = deviation
+    short_ma = latest_ma[:3]
+    deviation_values = (latest_price - short_ma) / short_ma * 100
+    deviations = dict(zip(['ma_qfq_5', 'ma_qfq_10', 'ma_qfq_20'], deviation_values))
     
     # 判断乖离状态
-    avg_deviation = np.mean(list(deviations.values()))
-    max_deviation = max(abs(d) for d in deviations.values())
+    avg_deviation = np.mean(deviation_values)
+    max_deviation = max(abs(d) for d in deviation_values)
     
     if max_deviation > 5:
         status = "超买" if avg_deviation > 0 else "超卖"
@@ -333,26 +345,21 @@ def _analyze_ma_deviation(data: pd.DataFrame) -> Dict[str, Any]:
         'average_deviation': avg_deviation,
         'max_deviation': max_deviation,
         'status': status,
-        'current_price': latest['close']
+        'current_price': latest_price
     }
 
-def _analyze_formation(data: pd.DataFrame, ma_columns: list) -> Dict[str, Any]:
+def _analyze_formation(latest_ma: np.ndarray, ma_gaps: np.ndarray) -> Dict[str, Any]:
     """
-    分析均线形态
+    分析均线形态（ma_gaps为np.diff(latest_ma)）
     """
-    latest = data.iloc[-1]
-    
     # 检查多头排列
-    is_bullish = all(latest[ma_columns[i]] > latest[ma_columns[i+1]] 
-                    for i in range(len(ma_columns)-1))
+    is_bullish = bool(np.all(ma_gaps < 0))
     
     # 检查空头排列
-    is_bearish = all(latest[ma_columns[i]] < latest[ma_columns[i+1]] 
-                    for i in range(len(ma_columns)-1))
+    is_bearish = bool(np.all(ma_gaps > 0))
     
     # 计算均线密集程度
-    ma_values = [latest[col] for col in ma_columns]
-    dispersion = np.std(ma_values) / np.mean(ma_values)
+    dispersion = np.std(latest_ma) / np.mean(latest_ma)
     
     formation_type = "多头排列" if is_bullish else "空头排列" if is_bearish else "混乱排列"
     strength = "强" if dispersion > 0.05 else "中" if dispersion > 0.02 else "弱"
@@ -365,19 +372,14 @@ def _analyze_formation(data: pd.DataFrame, ma_columns: list) -> Dict[str, Any]:
         'is_bearish': is_bearish
     }
 
-def _analyze_strength(data: pd.DataFrame, ma_columns: list) -> Dict[str, Any]:
+def _analyze_strength(latest_ma: np.ndarray, ma_gaps: np.ndarray, ma_columns: list) -> Dict[str, Any]:
     """
-    分析均线系统强度
+    分析均线系统强度（ma_gaps为np.diff(latest_ma)）
     """
-    latest = data.iloc[-1]
-    
     # 计算短期均线和长期均线的距离
-    ma_distances = []
-    for i in range(len(ma_columns)-1):
-        distance = abs(latest[ma_columns[i]] - latest[ma_columns[i+1]]) / latest[ma_columns[i+1]]
-        ma_distances.append(distance)
+    ma_distances = np.abs(ma_gaps) / latest_ma[1:]
     
-    avg_distance = np.mean(ma_distances)
+    avg_distance = ma_distances.mean()
     
     if avg_distance > 0.05:
         strength = "极强势"
@@ -394,25 +396,20 @@ def _analyze_strength(data: pd.DataFrame, ma_columns: list) -> Dict[str, Any]:
         'distances': dict(zip(ma_columns[:-1], ma_distances))
     }
 
-def _analyze_support_resistance(data: pd.DataFrame, ma_columns: list) -> Dict[str, Any]:
+def _analyze_support_resistance(latest_ma: np.ndarray, latest_price: float,
+                                ma_columns: list) -> Dict[str, Any]:
     """
     分析均线支撑阻力位
     """
-    latest = data.iloc[-1]
-    latest_price = latest['close']
-    
-    support_levels = []
-    resistance_levels = []
+    # 低于现价的均线为支撑位（由高到低），其余为阻力位（由低到高）；稳定排序，数值相同时保持均线顺序
+    is_support = latest_ma < latest_price
+    support_index = np.flatnonzero(is_support)
+    resistance_index = np.flatnonzero(~is_support)
+    support_index = support_index[np.argsort(-latest_ma[support_index], kind='stable')]
+    resistance_index = resistance_index[np.argsort(latest_ma[resistance_index], kind='stable')]
     
-    for ma in ma_columns:
-        ma_value = latest[ma]
-        if ma_value < latest_price:
-            support_levels.append({'ma': ma, 'value': ma_value})
-        else:
-            resistance_levels.append({'ma': ma, 'value': ma_value})
-    
-    support_levels = sorted(support_levels, key=lambda x: x['value'], reverse=True)
-    resistance_levels = sorted(resistance_levels, key=lambda x: x['value'])
+    support_levels = [{'ma': ma_columns[i], 'value': latest_ma[i]} for i in support_index]
+    resistance_levels = [{'ma': ma_columns[i], 'value': latest_ma[i]} for i in resistance_index]
     
     return {
         'support_levels': support_levels,
@@ -462,21 +459,31 @@ def _generate_composite_signal(analysis: Dict[str, Any]) -> str:
     
     return "，".join(signal_parts)
 
-def _calculate_trend_direction(series: pd.Series) -> float:
+def _calculate_trend_slopes(data: np.ndarray, columns: List[str]) -> Dict[str, float]:
     """
-    计算序列的趋势方向
+    一次计算多列的趋势方向（线性回归斜率），返回列名到斜率的字典
+    
+    x取0..n-1时斜率为 Σ(x-x̄)·y / Σ(x-x̄)²，分母等于n(n²-1)/12；
+    x-x̄关于中点正负对称，先对对称位置的y作差再加权，常数序列的斜率恰好为0。
+    各列共用同一组权重，一次矩阵乘法即得到全部列的斜率（data为_window_values的结果）
     """
-    x = np.arange(len(series))
-    slope, _ = np.polyfit(x, series, 1)
-    return slope
+    values = data[:, [_COL[column] for column in columns]]
+    n = len(values)
+    if n < 2:
+        return dict.fromkeys(columns, 0.0)
+    half = n // 2
+    offsets = _slope_offsets(n)
+    slopes = offsets @ (values[:half] - values[::-1][:half]) * 12.0 / (n * (n * n - 1))
+    return dict(zip(columns, slopes.tolist()))
 
-def _calculate_trend_slope(series: pd.Series) -> float:
+@lru_cache(maxsize=32)
+def _slope_offsets(n: int) -> np.ndarray:
     """
-    计算序列的斜率
+    长度为n的窗口前半段的 x-x̄ 权重（只读）；窗口长度只有固定几种，按长度缓存避免每次重新分配
     """
-    x = np.arange(len(series))
-    slope, _ = np.polyfit(x, series, 1)
-    return slope
+    offsets = np.arange(n // 2) - (n - 1) / 2.0
+    offsets.flags.writeable = False
+    return offsets
 
 def _generate_short_term_summary(cross_signals: List[Dict[str, Any]],
                                turning_signals: Dict[str, Dict[str, Any]],
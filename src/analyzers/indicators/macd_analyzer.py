@@ -2,10 +2,65 @@
 MACD指标分析器
 包含MACD指标的所有分析逻辑
 """
-from typing import Dict, Any
+from dataclasses import dataclass
+from typing import Dict, Any, NamedTuple
 import pandas as pd
 import numpy as np
 
+from ._indicators_numba import macd_codes, DIVERGENCE_NONE
+
+# 综合信号用到的标志位：各趋势/信号编码对应的多头、空头属性
+_BULLISH = 1
+_BEARISH = 2
+
+# 长期趋势编码对应的中文标签与标志位
+_LONG_TREND_LABELS = ("强势上涨（40天）", "上涨趋势转弱（40天）", "强势下跌（40天）",
+                      "下跌趋势转弱（40天）", "震荡整理（40天）")
+_LONG_TREND_FLAGS = (_BULLISH, _BULLISH, _BEARISH, _BEARISH, 0)
+
+# 中期趋势编码对应的中文标签与标志位（只有“上升趋势”“下降趋势”计入多空）
+_MEDIUM_TREND_LABELS = ("横盘震荡", "上升趋势", "弱势上涨", "下降趋势", "弱势下跌")
+_MEDIUM_TREND_FLAGS = (0, _BULLISH, 0, _BEARISH, 0)
+
+# 短期信号编码（_indicators_numba中的MACD_*常量）对应的中文标签与标志位（金叉、红柱为多头，死叉、绿柱为空头）
+_SHORT_SIGNAL_LABELS = ("金叉信号", "死叉信号", "红柱放大", "红柱缩小", "绿柱放大", "绿柱缩小", "无明显信号")
+_SHORT_SIGNAL_FLAGS = (_BULLISH, _BEARISH, _BULLISH, _BULLISH, _BEARISH, _BEARISH, 0)
+
+# 背离编码与强度编码对应的中文标签
+_DIVERGENCE_LABELS = ("顶背离", "底背离", "无背离")
+_STRENGTH_LABELS = ("极强", "极弱", "较强", "较弱", "普通")
+
+class MacdArrays(NamedTuple):
+    """
+    完整序列的DIF、DEA、MACD柱状值与收盘价（均为float64数组）
+    """
+    dif: np.ndarray
+    dea: np.ndarray
+    macd: np.ndarray
+    close: np.ndarray
+
+@dataclass(frozen=True)
+class MacdResult:
+    """
+    单只股票的MACD分析结果
+    
+    使用__slots__固定字段，批量扫描大量股票时比逐只构造字典更省内存；
+    各维度为编码（对应的中文标签见_LONG_TREND_LABELS等），需要文字描述时通过format_macd_result转换
+    """
+    __slots__ = (
+        'dif', 'dea', 'macd', 'long_term_trend', 'medium_term_trend', 'short_term_signal',
+        'divergence', 'strength', 'signal'
+    )
+    dif: float
+    dea: float
+    macd: float
+    long_term_trend: int
+    medium_term_trend: int
+    short_term_signal: int
+    divergence: int
+    strength: int
+    signal: str
+
 def analyze_macd(df: pd.DataFrame, 
                 long_term: pd.DataFrame,
                 medium_term: pd.DataFrame, 
@@ -22,211 +77,98 @@ def analyze_macd(df: pd.DataFrame,
     返回:
         Dict[str, Dict[str, Any]]: 包含信号分析和指标数据的字典
     """
-    latest = df.iloc[-1]
-    
-    # 收集各维度分析结果
-    signals = {}
-    
-    # 1. 分析长期趋势（40天）
-    signals['long_term_trend'] = _analyze_long_term_trend(long_term)
-    
-    # 2. 分析中期趋势（20天）
-    signals['medium_term_trend'] = _analyze_medium_term_trend(medium_term)
-    
-    # 3. 分析短期信号（10天）
-    signals['short_term_signal'] = _analyze_short_term_signal(short_term)
-    
-    # 4. 分析背离
-    signals['divergence'] = _analyze_divergence(long_term)
-    
-    # 5. 分析MACD强度
-    signals['strength'] = _analyze_strength(medium_term)
-    
-    # 6. 生成综合信号
-    signals['signal'] = _generate_composite_signal(signals)
-    
-    # 返回完整的分析结果
-    return {
-        'DIF': latest['macd_dif'],
-        'DEA': latest['macd_dea'],
-        'MACD': latest['macd'],
-        'long_term_trend': signals['long_term_trend'],
-        'medium_term_trend': signals['medium_term_trend'],
-        'short_term_signal': signals['short_term_signal'],
-        'divergence': signals['divergence'],
-        'strength': signals['strength'],
-        'signal': signals['signal']
-    }
-
-def _analyze_long_term_trend(data: pd.DataFrame) -> str:
-    """
-    分析MACD长期趋势（40天）
-    """
-    # 计算DIF和DEA的趋势
-    dif_trend = _calculate_trend_direction(data['macd_dif'])
-    dea_trend = _calculate_trend_direction(data['macd_dea'])
-    
-    # 计算MACD柱状量的累计值
-    macd_sum = data['macd'].sum()
-    
-    if dif_trend > 0 and dea_trend > 0:
-        trend = "强势上涨" if macd_sum > 0 else "上涨趋势转弱"
-    elif dif_trend < 0 and dea_trend < 0:
-        trend = "强势下跌" if macd_sum < 0 else "下跌趋势转弱"
-    else:
-        trend = "震荡整理"
-        
-    return f"{trend}（40天）"
+    return format_macd_result(analyze_macd_codes(df, long_term, medium_term, short_term))
 
-def _analyze_medium_term_trend(data: pd.DataFrame) -> str:
-    """
-    分析MACD中期趋势（20天）
+def analyze_macd_codes(df: pd.DataFrame,
+                       long_term: pd.DataFrame,
+                       medium_term: pd.DataFrame,
+                       short_term: pd.DataFrame) -> MacdResult:
     """
-    # 计算最近20天的MACD柱状趋势
-    recent_macd = data['macd']
+    分析MACD指标，各维度以编码而非文字描述返回
     
-    # 计算趋势的斜率
-    slope = _calculate_trend_slope(recent_macd)
+    参数与analyze_macd相同；需要展示时再通过format_macd_result转换为文字
     
-    # 判断趋势强度
-    if abs(slope) < 0.1:
-        return "横盘震荡"
-    elif slope > 0:
-        return "上升趋势" if slope > 0.3 else "弱势上涨"
-    else:
-        return "下降趋势" if slope < -0.3 else "弱势下跌"
-
-def _analyze_short_term_signal(data: pd.DataFrame) -> str:
-    """
-    分析MACD短期信号（10天）
+    返回:
+        MacdResult: 最新DIF、DEA、MACD值、各维度编码及综合信号
     """
-    latest = data.iloc[-1]
-    prev = data.iloc[-2]
+    # 长/中/短期窗口都是df的尾部，四列只从df提取一次，各窗口在内核中按长度取视图
+    columns = _macd_arrays(df)
+    latest_dif, latest_dea, latest_macd = columns.dif[-1], columns.dea[-1], columns.macd[-1]
     
-    # 判断金叉死叉
-    if latest['macd_dif'] > latest['macd_dea'] and prev['macd_dif'] <= prev['macd_dea']:
-        return "金叉信号"
-    elif latest['macd_dif'] < latest['macd_dea'] and prev['macd_dif'] >= prev['macd_dea']:
-        return "死叉信号"
+    # 一次内核调用得到各维度编码：长期趋势与背离用40天、中期趋势与强度用20天、短期信号用10天
+    long_term_trend, medium_term_trend, short_term_signal, divergence, strength = macd_codes(
+        columns.dif, columns.dea, columns.macd, columns.close,
+        len(long_term), len(medium_term), len(short_term)
+    )
     
-    # 判断MACD柱状的变化
-    if latest['macd'] > 0 and latest['macd'] > prev['macd']:
-        return "红柱放大"
-    elif latest['macd'] > 0 and latest['macd'] < prev['macd']:
-        return "红柱缩小"
-    elif latest['macd'] < 0 and latest['macd'] < prev['macd']:
-        return "绿柱放大"
-    elif latest['macd'] < 0 and latest['macd'] > prev['macd']:
-        return "绿柱缩小"
+    # 生成综合信号
+    signal = _generate_composite_signal(long_term_trend, medium_term_trend, short_term_signal,
+                                        divergence, strength)
     
-    return "无明显信号"
+    return MacdResult(latest_dif, latest_dea, latest_macd, long_term_trend, medium_term_trend,
+                      short_term_signal, divergence, strength, signal)
 
-def _analyze_divergence(data: pd.DataFrame) -> str:
-    """
-    分析MACD背离
+def format_macd_result(result: MacdResult) -> Dict[str, Any]:
     """
-    # 获取价格的高点和低点
-    price_highs = _find_local_extremes(data['close'], is_high=True)
-    price_lows = _find_local_extremes(data['close'], is_high=False)
-    
-    # 获取MACD的高点和低点
-    macd_highs = _find_local_extremes(data['macd'], is_high=True)
-    macd_lows = _find_local_extremes(data['macd'], is_high=False)
+    将MACD分析结果的各维度编码转换为文字描述
     
-    # 判断顶背离
-    if len(price_highs) >= 2 and len(macd_highs) >= 2:
-        if price_highs[-1] > price_highs[-2] and macd_highs[-1] < macd_highs[-2]:
-            return "顶背离"
-    
-    # 判断底背离
-    if len(price_lows) >= 2 and len(macd_lows) >= 2:
-        if price_lows[-1] < price_lows[-2] and macd_lows[-1] > macd_lows[-2]:
-            return "底背离"
-    
-    return "无背离"
+    参数:
+        result (MacdResult): analyze_macd_codes的返回结果
+        
+    返回:
+        Dict[str, Any]: 与analyze_macd相同的结果字典
+    """
+    return {
+        'DIF': result.dif,
+        'DEA': result.dea,
+        'MACD': result.macd,
+        'long_term_trend': _LONG_TREND_LABELS[result.long_term_trend],
+        'medium_term_trend': _MEDIUM_TREND_LABELS[result.medium_term_trend],
+        'short_term_signal': _SHORT_SIGNAL_LABELS[result.short_term_signal],
+        'divergence': _DIVERGENCE_LABELS[result.divergence],
+        'strength': _STRENGTH_LABELS[result.strength],
+        'signal': result.signal
+    }
 
-def _analyze_strength(data: pd.DataFrame) -> str:
+def _macd_arrays(data: pd.DataFrame) -> MacdArrays:
     """
-    分析MACD强度
+    取出分析用到的各列float64数组
     """
-    latest = data.iloc[-1]
-    
-    # 计算MACD柱状量的标准差
-    macd_std = data['macd'].std()
-    
-    # 判断当前MACD柱状量的强度
-    current_strength = abs(latest['macd'])
-    
-    if current_strength > 2 * macd_std:
-        return "极强" if latest['macd'] > 0 else "极弱"
-    elif current_strength > macd_std:
-        return "较强" if latest['macd'] > 0 else "较弱"
-    else:
-        return "普通"
+    return MacdArrays(data['macd_dif'].to_numpy(dtype=np.float64),
+                      data['macd_dea'].to_numpy(dtype=np.float64),
+                      data['macd'].to_numpy(dtype=np.float64),
+                      data['close'].to_numpy(dtype=np.float64))
 
-def _generate_composite_signal(analysis: Dict[str, str]) -> str:
+def _generate_composite_signal(long_term: int, medium_term: int, short_term: int,
+                             divergence: int, strength: int) -> str:
     """
-    生成MACD综合信号
+    生成MACD综合信号（各维度均为编码，通过标志位判断多空）
     """
-    # 获取各维度分析结果
-    long_term = analysis['long_term_trend']
-    medium_term = analysis['medium_term_trend']
-    short_term = analysis['short_term_signal']
-    divergence = analysis['divergence']
-    strength = analysis['strength']
+    trend_flags = _LONG_TREND_FLAGS[long_term] | _MEDIUM_TREND_FLAGS[medium_term]
+    short_flags = _SHORT_SIGNAL_FLAGS[short_term]
     
     # 生成综合信号
     signal_parts = []
     
     # 添加背离信号（如果有）
-    if divergence != "无背离":
-        signal_parts.append(f"出现{divergence}")
+    if divergence != DIVERGENCE_NONE:
+        signal_parts.append(f"出现{_DIVERGENCE_LABELS[divergence]}")
     
     # 添加趋势信号
-    if "上涨" in long_term or "上升" in medium_term:
-        if "金叉" in short_term or "红柱" in short_term:
+    if trend_flags & _BULLISH:
+        if short_flags & _BULLISH:
             signal_parts.append("多头趋势增强")
-        elif "死叉" in short_term or "绿柱" in short_term:
+        elif short_flags & _BEARISH:
             signal_parts.append("多头趋势减弱")
-    elif "下跌" in long_term or "下降" in medium_term:
-        if "死叉" in short_term or "绿柱" in short_term:
+    elif trend_flags & _BEARISH:
+        if short_flags & _BEARISH:
             signal_parts.append("空头趋势增强")
-        elif "金叉" in short_term or "红柱" in short_term:
+        elif short_flags & _BULLISH:
             signal_parts.append("空头趋势减弱")
     else:
         signal_parts.append("震荡整理")
     
     # 添加强度描述
-    signal_parts.append(f"（{strength}）")
+    signal_parts.append(f"（{_STRENGTH_LABELS[strength]}）")
     
     return "，".join(signal_parts)
-
-def _calculate_trend_direction(series: pd.Series) -> float:
-    """
-    计算序列的趋势方向
-    """
-    x = np.arange(len(series))
-    slope, _ = np.polyfit(x, series, 1)
-    return slope
-
-def _calculate_trend_slope(series: pd.Series) -> float:
-    """
-    计算序列的斜率
-    """
-    x = np.arange(len(series))
-    slope, _ = np.polyfit(x, series, 1)
-    return slope
-
-def _find_local_extremes(series: pd.Series, is_high: bool = True) -> list:
-    """
-    找出序列的局部极值点
-    """
-    extremes = []
-    for i in range(1, len(series)-1):
-        if is_high:
-            if series[i] > series[i-1] and series[i] > series[i+1]:
-                extremes.append(series[i])
-        else:
-            if series[i] < series[i-1] and series[i] < series[i+1]:
-                extremes.append(series[i])
-    return extremes 
\ No newline at end of file
@@ -2,10 +2,69 @@
 RSI指标分析模块
 分析相对强弱指标(RSI)的趋势和信号
 """
-from typing import Dict, Any
+from dataclasses import dataclass
+from typing import Dict, Any, NamedTuple
 import pandas as pd
 import numpy as np
 
+from ._indicators_numba import (nan_mean_std, trend_slope, rsi_short_signal_code, extremes_divergence_code,
+                                RSI_CROSS_UP, RSI_CROSS_DOWN, DIVERGENCE_NONE)
+
+# 综合信号用到的标志位：各趋势编码对应的上涨、下跌属性
+_UP = 1
+_DOWN = 2
+
+# 长期趋势编码对应的中文标签与标志位
+_LONG_TREND_LABELS = ("强势上涨（40天）", "上涨趋势（40天）", "强势下跌（40天）", "下跌趋势（40天）",
+                      "高位震荡（40天）", "低位震荡（40天）", "中位震荡（40天）")
+_LONG_TREND_FLAGS = (_UP, _UP, _DOWN, _DOWN, 0, 0, 0)
+
+# 中期趋势编码对应的中文标签与标志位
+_MEDIUM_TREND_LABELS = ("窄幅震荡", "宽幅震荡", "快速上升", "缓慢上升", "快速下降", "缓慢下降")
+_MEDIUM_TREND_FLAGS = (0, 0, _UP, _UP, _DOWN, _DOWN)
+
+# 短期信号编码（_indicators_numba中的RSI_*常量）对应的中文标签
+_SHORT_SIGNAL_LABELS = ("RSI快线上穿慢线", "RSI快线下穿慢线", "突破超买区间", "突破超卖区间",
+                        "离开超买区间", "离开超卖区间", "无明显信号")
+
+# 背离、强度、三线形态编码对应的中文标签
+_DIVERGENCE_LABELS = ("顶背离（卖出信号）", "底背离（买入信号）", "无背离")
+_STRENGTH_LABELS = ("极强", "极弱", "较强", "较弱", "偏强", "偏弱", "中性")
+_PATTERN_BULLISH, _PATTERN_BEARISH, _PATTERN_PARALLEL, _PATTERN_CROSSED = range(4)
+_PATTERN_LABELS = ("多头排列", "空头排列", "三线平行", "三线交叉")
+
+class RsiArrays(NamedTuple):
+    """
+    一段序列的RSI6、RSI12、RSI24与收盘价（均为float64数组）
+    """
+    rsi_6: np.ndarray
+    rsi_12: np.ndarray
+    rsi_24: np.ndarray
+    close: np.ndarray
+
+@dataclass(frozen=True)
+class RsiResult:
+    """
+    单只股票的RSI分析结果
+    
+    使用__slots__固定字段，批量扫描大量股票时比逐只构造字典更省内存；
+    各维度为编码（对应的中文标签见_LONG_TREND_LABELS等），需要文字描述时通过format_rsi_result转换
+    """
+    __slots__ = (
+        'rsi_6', 'rsi_12', 'rsi_24', 'long_term_trend', 'medium_term_trend', 'short_term_signal',
+        'divergence', 'strength', 'pattern', 'signal'
+    )
+    rsi_6: float
+    rsi_12: float
+    rsi_24: float
+    long_term_trend: int
+    medium_term_trend: int
+    short_term_signal: int
+    divergence: int
+    strength: int
+    pattern: int
+    signal: str
+
 def analyze_rsi(df: pd.DataFrame, long_term: pd.DataFrame, medium_term: pd.DataFrame, short_term: pd.DataFrame) -> Dict[str, Any]:
     """
     分析RSI指标数据
@@ -19,247 +78,218 @@ def analyze_rsi(df: pd.DataFrame, long_term: pd.DataFrame, medium_term: pd.DataF
     返回:
         Dict[str, Any]: RSI分析结果
     """
-    latest = df.iloc[-1]
+    return format_rsi_result(analyze_rsi_codes(df, long_term, medium_term, short_term))
+
+def analyze_rsi_codes(df: pd.DataFrame, long_term: pd.DataFrame, medium_term: pd.DataFrame, short_term: pd.DataFrame) -> RsiResult:
+    """
+    分析RSI指标数据，各维度以编码而非文字描述返回
+    
+    参数与analyze_rsi相同；需要展示时再通过format_rsi_result转换为文字
     
-    # 收集各维度分析结果
-    signals = {}
+    返回:
+        RsiResult: 最新RSI6、RSI12、RSI24值、各维度编码及综合信号
+    """
+    # 长/中/短期窗口都是df的尾部：各列只从df转换一次，窗口按长度取尾部视图，各子分析不再访问DataFrame
+    columns = _rsi_arrays(df)
+    latest_rsi6, latest_rsi12, latest_rsi24 = columns.rsi_6[-1], columns.rsi_12[-1], columns.rsi_24[-1]
+    long_arrays = _tail(columns, len(long_term))
+    medium_arrays = _tail(columns, len(medium_term))
+    short_arrays = _tail(columns, len(short_term))
     
     # 1. 分析长期趋势（40天）
-    signals['long_term_trend'] = _analyze_long_term_trend(long_term)
+    long_term_trend = _analyze_long_term_trend(long_arrays)
     
     # 2. 分析中期趋势（20天）
-    signals['medium_term_trend'] = _analyze_medium_term_trend(medium_term)
+    medium_term_trend = _analyze_medium_term_trend(medium_arrays)
     
     # 3. 分析短期信号（10天）
-    signals['short_term_signal'] = _analyze_short_term_signal(short_term)
+    short_term_signal = _analyze_short_term_signal(short_arrays)
     
     # 4. 分析背离
-    signals['divergence'] = _analyze_divergence(long_term)
+    divergence = _analyze_divergence(long_arrays)
     
     # 5. 分析RSI强度
-    signals['strength'] = _analyze_strength(medium_term)
+    strength = _analyze_strength(medium_arrays)
     
     # 6. 分析RSI形态
-    signals['pattern'] = _analyze_rsi_pattern(short_term)
+    pattern = _analyze_rsi_pattern(short_arrays)
     
     # 7. 生成综合信号
-    signals['signal'] = _generate_composite_signal(signals)
+    signal = _generate_composite_signal(long_term_trend, medium_term_trend, short_term_signal,
+                                        divergence, strength, pattern)
+    
+    return RsiResult(latest_rsi6, latest_rsi12, latest_rsi24, long_term_trend, medium_term_trend,
+                     short_term_signal, divergence, strength, pattern, signal)
+
+def format_rsi_result(result: RsiResult) -> Dict[str, Any]:
+    """
+    将RSI分析结果的各维度编码转换为文字描述
     
+    参数:
+        result (RsiResult): analyze_rsi_codes的返回结果
+        
+    返回:
+        Dict[str, Any]: 与analyze_rsi相同的结果字典
+    """
     return {
-        'RSI6': latest['rsi_6'],
-        'RSI12': latest['rsi_12'],
-        'RSI24': latest['rsi_24'],
-        'long_term_trend': signals['long_term_trend'],
-        'medium_term_trend': signals['medium_term_trend'],
-        'short_term_signal': signals['short_term_signal'],
-        'divergence': signals['divergence'],
-        'strength': signals['strength'],
-        'pattern': signals['pattern'],
-        'signal': signals['signal']
+        'RSI6': result.rsi_6,
+        'RSI12': result.rsi_12,
+        'RSI24': result.rsi_24,
+        'long_term_trend': _LONG_TREND_LABELS[result.long_term_trend],
+        'medium_term_trend': _MEDIUM_TREND_LABELS[result.medium_term_trend],
+        'short_term_signal': _SHORT_SIGNAL_LABELS[result.short_term_signal],
+        'divergence': _DIVERGENCE_LABELS[result.divergence],
+        'strength': _STRENGTH_LABELS[result.strength],
+        'pattern': _PATTERN_LABELS[result.pattern],
+        'signal': result.signal
     }
 
-def _analyze_long_term_trend(data: pd.DataFrame) -> str:
+def _rsi_arrays(data: pd.DataFrame) -> RsiArrays:
+    """
+    取出分析用到的各列float64数组
     """
-    分析RSI长期趋势（40天）
+    return RsiArrays(data['rsi_6'].to_numpy(dtype=np.float64),
+                     data['rsi_12'].to_numpy(dtype=np.float64),
+                     data['rsi_24'].to_numpy(dtype=np.float64),
+                     data['close'].to_numpy(dtype=np.float64))
+
+def _tail(data: RsiArrays, n: int) -> RsiArrays:
+    """
+    取各列最后n天的视图
+    """
+    return RsiArrays(*(values[-n:] for values in data))
+
+def _analyze_long_term_trend(data: RsiArrays) -> int:
+    """
+    分析RSI长期趋势（40天），返回趋势编码，对应的中文标签见_LONG_TREND_LABELS
     """
     # 计算RSI6的趋势
-    rsi6_trend = _calculate_trend_direction(data['rsi_6'])
-    rsi12_trend = _calculate_trend_direction(data['rsi_12'])
-    rsi24_trend = _calculate_trend_direction(data['rsi_24'])
+    rsi6_trend = _calculate_trend_direction(data.rsi_6)
+    rsi12_trend = _calculate_trend_direction(data.rsi_12)
+    rsi24_trend = _calculate_trend_direction(data.rsi_24)
     
-    # 计算RSI均值
-    rsi6_mean = data['rsi_6'].mean()
+    # 计算RSI均值（与pandas的mean()一样跳过NaN）
+    rsi6_mean, _ = nan_mean_std(data.rsi_6)
     
     if rsi6_trend > 0 and rsi12_trend > 0 and rsi24_trend > 0:
-        trend = "强势上涨" if rsi6_mean > 70 else "上涨趋势"
+        return 0 if rsi6_mean > 70 else 1
     elif rsi6_trend < 0 and rsi12_trend < 0 and rsi24_trend < 0:
-        trend = "强势下跌" if rsi6_mean < 30 else "下跌趋势"
+        return 2 if rsi6_mean < 30 else 3
+    elif rsi6_mean > 60:
+        return 4
+    elif rsi6_mean < 40:
+        return 5
     else:
-        if rsi6_mean > 60:
-            trend = "高位震荡"
-        elif rsi6_mean < 40:
-            trend = "低位震荡"
-        else:
-            trend = "中位震荡"
-    
-    return f"{trend}（40天）"
+        return 6
 
-def _analyze_medium_term_trend(data: pd.DataFrame) -> str:
+def _analyze_medium_term_trend(data: RsiArrays) -> int:
     """
-    分析RSI中期趋势（20天）
+    分析RSI中期趋势（20天），返回趋势编码，对应的中文标签见_MEDIUM_TREND_LABELS
     """
     # 计算RSI6的趋势斜率
-    slope = _calculate_trend_slope(data['rsi_6'])
+    slope = _calculate_trend_slope(data.rsi_6)
     
-    # 计算RSI的波动范围
-    rsi_range = data['rsi_6'].max() - data['rsi_6'].min()
+    # 计算RSI的波动范围（fmax/fmin与pandas一样跳过NaN）
+    rsi_range = np.fmax.reduce(data.rsi_6) - np.fmin.reduce(data.rsi_6)
     
     if abs(slope) < 0.1:
-        if rsi_range < 10:
-            return "窄幅震荡"
-        else:
-            return "宽幅震荡"
+        return 0 if rsi_range < 10 else 1
     elif slope > 0:
-        if slope > 0.3:
-            return "快速上升"
-        else:
-            return "缓慢上升"
+        return 2 if slope > 0.3 else 3
     else:
-        if slope < -0.3:
-            return "快速下降"
-        else:
-            return "缓慢下降"
+        return 4 if slope < -0.3 else 5
 
-def _analyze_short_term_signal(data: pd.DataFrame) -> str:
+def _analyze_short_term_signal(data: RsiArrays) -> int:
     """
-    分析RSI短期信号（10天）
+    分析RSI短期信号（10天）：最近两天的快慢线交叉与超买超卖区间进出，判断见_indicators_numba.rsi_short_signal_code；
+    返回信号编码，对应的中文标签见_SHORT_SIGNAL_LABELS
     """
-    latest = data.iloc[-1]
-    prev = data.iloc[-2]
-    
-    # 判断RSI交叉情况
-    if latest['rsi_6'] > latest['rsi_12'] and prev['rsi_6'] <= prev['rsi_12']:
-        return "RSI快线上穿慢线"
-    elif latest['rsi_6'] < latest['rsi_12'] and prev['rsi_6'] >= prev['rsi_12']:
-        return "RSI快线下穿慢线"
-    
-    # 判断超买超卖区间突破
-    if latest['rsi_6'] > 80 and prev['rsi_6'] <= 80:
-        return "突破超买区间"
-    elif latest['rsi_6'] < 20 and prev['rsi_6'] >= 20:
-        return "突破超卖区间"
-    elif latest['rsi_6'] < 80 and prev['rsi_6'] >= 80:
-        return "离开超买区间"
-    elif latest['rsi_6'] > 20 and prev['rsi_6'] <= 20:
-        return "离开超卖区间"
-    
-    return "无明显信号"
+    return rsi_short_signal_code(data.rsi_6, data.rsi_12)
 
-def _analyze_divergence(data: pd.DataFrame) -> str:
+def _analyze_divergence(data: RsiArrays) -> int:
     """
-    分析RSI背离
+    分析RSI背离：比较价格与RSI6最近两个局部高点（低点），
+    返回背离编码，对应的中文标签见_DIVERGENCE_LABELS
     """
-    # 获取价格的高点和低点
-    price_highs = _find_local_extremes(data['close'], is_high=True)
-    price_lows = _find_local_extremes(data['close'], is_high=False)
-    
-    # 获取RSI的高点和低点
-    rsi_highs = _find_local_extremes(data['rsi_6'], is_high=True)
-    rsi_lows = _find_local_extremes(data['rsi_6'], is_high=False)
-    
-    # 判断顶背离
-    if len(price_highs) >= 2 and len(rsi_highs) >= 2:
-        if price_highs[-1] > price_highs[-2] and rsi_highs[-1] < rsi_highs[-2]:
-            return "顶背离（卖出信号）"
-    
-    # 判断底背离
-    if len(price_lows) >= 2 and len(rsi_lows) >= 2:
-        if price_lows[-1] < price_lows[-2] and rsi_lows[-1] > rsi_lows[-2]:
-            return "底背离（买入信号）"
-    
-    return "无背离"
+    return extremes_divergence_code(data.close, data.rsi_6)
 
-def _analyze_strength(data: pd.DataFrame) -> str:
+def _analyze_strength(data: RsiArrays) -> int:
     """
-    分析RSI强度
+    分析RSI强度，返回强度编码，对应的中文标签见_STRENGTH_LABELS
     """
-    latest = data.iloc[-1]
-    
-    # 计算RSI的标准差
-    rsi_std = data['rsi_6'].std()
+    latest_rsi6 = data.rsi_6[-1]
     
     # 计算当前RSI值与中值的偏离度
-    deviation = abs(latest['rsi_6'] - 50)
+    deviation = abs(latest_rsi6 - 50)
     
     if deviation > 30:
-        return "极强" if latest['rsi_6'] > 50 else "极弱"
+        return 0 if latest_rsi6 > 50 else 1
     elif deviation > 20:
-        return "较强" if latest['rsi_6'] > 50 else "较弱"
+        return 2 if latest_rsi6 > 50 else 3
     elif deviation > 10:
-        return "偏强" if latest['rsi_6'] > 50 else "偏弱"
+        return 4 if latest_rsi6 > 50 else 5
     else:
-        return "中性"
+        return 6
 
-def _analyze_rsi_pattern(data: pd.DataFrame) -> str:
+def _analyze_rsi_pattern(data: RsiArrays) -> int:
     """
-    分析RSI形态特征
+    分析RSI形态特征，返回三线排列编码，对应的中文标签见_PATTERN_LABELS
     """
-    latest = data.iloc[-1]
+    rsi6, rsi12, rsi24 = data.rsi_6[-1], data.rsi_12[-1], data.rsi_24[-1]
     
     # 判断RSI三线位置关系
-    if latest['rsi_6'] > latest['rsi_12'] > latest['rsi_24']:
-        return "多头排列"
-    elif latest['rsi_6'] < latest['rsi_12'] < latest['rsi_24']:
-        return "空头排列"
-    elif abs(latest['rsi_6'] - latest['rsi_12']) < 2 and abs(latest['rsi_12'] - latest['rsi_24']) < 2:
-        return "三线平行"
+    if rsi6 > rsi12 > rsi24:
+        return _PATTERN_BULLISH
+    elif rsi6 < rsi12 < rsi24:
+        return _PATTERN_BEARISH
+    elif abs(rsi6 - rsi12) < 2 and abs(rsi12 - rsi24) < 2:
+        return _PATTERN_PARALLEL
     else:
-        return "三线交叉"
+        return _PATTERN_CROSSED
 
-def _generate_composite_signal(analysis: Dict[str, str]) -> str:
+def _generate_composite_signal(long_term: int, medium_term: int, short_term: int,
+                               divergence: int, strength: int, pattern: int) -> str:
     """
-    生成RSI综合信号
+    生成RSI综合信号（各维度均为编码，趋势通过标志位判断涨跌）
     """
-    # 获取各维度分析结果
-    long_term = analysis['long_term_trend']
-    medium_term = analysis['medium_term_trend']
-    short_term = analysis['short_term_signal']
-    divergence = analysis['divergence']
-    strength = analysis['strength']
-    pattern = analysis['pattern']
+    trend_flags = _LONG_TREND_FLAGS[long_term] | _MEDIUM_TREND_FLAGS[medium_term]
     
     # 生成综合信号
     signal_parts = []
     
     # 添加背离信号（如果有）
-    if divergence != "无背离":
-        signal_parts.append(f"出现{divergence}")
+    if divergence != DIVERGENCE_NONE:
+        signal_parts.append(f"出现{_DIVERGENCE_LABELS[divergence]}")
     
-    # 添加趋势信号
-    if "上涨" in long_term or "上升" in medium_term:
-        if "上穿" in short_term or "多头" in pattern:
+    # 添加趋势信号（长期上涨或中期上升优先于下跌判断）
+    if trend_flags & _UP:
+        if short_term == RSI_CROSS_UP or pattern == _PATTERN_BULLISH:
             signal_parts.append("多头趋势增强")
-        elif "下穿" in short_term:
+        elif short_term == RSI_CROSS_DOWN:
             signal_parts.append("多头趋势减弱")
-    elif "下跌" in long_term or "下降" in medium_term:
-        if "下穿" in short_term or "空头" in pattern:
+    elif trend_flags & _DOWN:
+        if short_term == RSI_CROSS_DOWN or pattern == _PATTERN_BEARISH:
             signal_parts.append("空头趋势增强")
-        elif "上穿" in short_term:
+        elif short_term == RSI_CROSS_UP:
             signal_parts.append("空头趋势减弱")
     else:
         signal_parts.append("震荡整理")
     
     # 添加强度描述
-    signal_parts.append(f"（{strength}）")
+    signal_parts.append(f"（{_STRENGTH_LABELS[strength]}）")
     
     return "，".join(signal_parts)
 
-def _calculate_trend_direction(series: pd.Series) -> float:
+def _calculate_trend_direction(series: np.ndarray) -> float:
     """
-    计算序列的趋势方向
+    计算序列的趋势方向（线性回归斜率）
+    
+    计算见_indicators_numba.trend_slope
     """
-    x = np.arange(len(series))
-    slope, _ = np.polyfit(x, series, 1)
-    return slope
+    return float(trend_slope(np.asarray(series, dtype=np.float64)))
 
-def _calculate_trend_slope(series: pd.Series) -> float:
+def _calculate_trend_slope(series: np.ndarray) -> float:
     """
     计算序列的斜率
     """
-    x = np.arange(len(series))
-    slope, _ = np.polyfit(x, series, 1)
-    return slope
-
-def _find_local_extremes(series: pd.Series, is_high: bool = True) -> list:
-    """
-    找出序列的局部极值点
-    """
-    extremes = []
-    for i in range(1, len(series)-1):
-        if is_high:
-            if series[i] > series[i-1] and series[i] > series[i+1]:
-                extremes.append(series[i])
-        else:
-            if series[i] < series[i-1] and series[i] < series[i+1]:
-                extremes.append(series[i])
-    return extremes
\ No newline at end of file
+    return _calculate_trend_direction(series)
@@ -2,15 +2,39 @@
 技术指标分析模块
 包含各种技术指标的分析逻辑
 """
-from typing import Dict, Any
+import os
+import multiprocessing
+from concurrent.futures import ProcessPoolExecutor
+from typing import Dict, Any, Mapping, Optional, Sequence
+import numpy as np
 import pandas as pd
-from .indicators import analyze_macd
-from .indicators.kdj_analyzer import analyze_kdj
-from .indicators.rsi_analyzer import analyze_rsi
-from .indicators.boll_analyzer import analyze_boll
+from .indicators.macd_analyzer import (analyze_macd_codes, format_macd_result,
+                                       _SHORT_SIGNAL_LABELS as _MACD_SHORT_SIGNAL_LABELS)
+from .indicators.kdj_analyzer import analyze_kdj_codes, format_kdj_result, _CROSS_LABELS as _KDJ_CROSS_LABELS
+from .indicators.rsi_analyzer import (analyze_rsi_codes, format_rsi_result,
+                                      _SHORT_SIGNAL_LABELS as _RSI_SHORT_SIGNAL_LABELS)
+from .indicators.boll_analyzer import (analyze_boll_codes, format_boll_result, _SHORT_TERM_TABLE,
+                                       _SHORT_TERM_SIGNALS, _relation,
+                                       _short_term_code as _boll_short_term_code)
+from .indicators._indicators_numba import macd_short_signal_code, rsi_short_signal_code
+from .indicators._kdj_numeric import cross_code
+from .indicators._njit import njit, NUMBA_AVAILABLE, EAGER_JIT
 from .indicators.ma_system_analyzer import analyze_ma_system
 from .indicators.candlestick_analyzer import analyze_candlesticks
 
+# 批量分析时可降为单精度的列：均线、KDJ、MACD只用于形态与趋势分类；收盘价、成交量等保持原精度
+_REDUCIBLE_COLUMNS = (
+    'ma_qfq_5', 'ma_qfq_10', 'ma_qfq_20', 'ma_qfq_30', 'ma_qfq_60', 'ma_qfq_90', 'ma_qfq_250',
+    'kdj_k', 'kdj_d', 'kdj_j',
+    'macd_dif', 'macd_dea', 'macd'
+)
+
+# 横截面筛选用到的列，顺序与_screen_codes的参数一致
+_SCREEN_COLUMNS = (
+    'macd_dif', 'macd_dea', 'macd', 'kdj_k', 'kdj_d', 'kdj_j', 'rsi_6', 'rsi_12',
+    'close', 'boll_upper', 'boll_mid', 'boll_lower'
+)
+
 def analyze_indicators(df: pd.DataFrame) -> Dict[str, Dict[str, Any]]:
     """
     分析技术指标数据，使用历史数据进行更全面的分析
@@ -21,6 +45,21 @@ def analyze_indicators(df: pd.DataFrame) -> Dict[str, Dict[str, Any]]:
     返回:
         Dict[str, Dict[str, Any]]: 各个技术指标的分析结果
     """
+    return format_indicator_results(analyze_indicators_codes(df))
+
+def analyze_indicators_codes(df: pd.DataFrame) -> Dict[str, Any]:
+    """
+    分析技术指标数据，MACD、KDJ、RSI、BOLL以编码形式的结果对象返回
+    
+    批量筛选时直接比较编码，不必先生成再匹配中文字符串；需要展示时再通过format_indicator_results转换。
+    MA系统与K线形态的结果本身就是字典，原样返回
+    
+    参数:
+        df (pd.DataFrame): 包含技术指标数据的DataFrame
+        
+    返回:
+        Dict[str, Any]: 各个技术指标的分析结果（MacdResult、KdjResult、RsiResult、BollResult及MA、K线形态字典）
+    """
     # 使用不同的时间窗口进行分析
     long_term = df.tail(40)    # 约2个月的交易日
     medium_term = df.tail(20)  # 约1个月的交易日
@@ -29,21 +68,183 @@ def analyze_indicators(df: pd.DataFrame) -> Dict[str, Dict[str, Any]]:
     analysis = {}
     
     # MACD分析
-    analysis['MACD'] = analyze_macd(df, long_term, medium_term, short_term)
+    analysis['MACD'] = analyze_macd_codes(df, long_term, medium_term, short_term)
     
     # KDJ分析
-    analysis['KDJ'] = analyze_kdj(df, long_term, medium_term, short_term)
+    analysis['KDJ'] = analyze_kdj_codes(df, long_term, medium_term, short_term)
     
     # RSI分析
-    analysis['RSI'] = analyze_rsi(df, long_term, medium_term, short_term)
+    analysis['RSI'] = analyze_rsi_codes(df, long_term, medium_term, short_term)
     
     # BOLL分析
-    analysis['BOLL'] = analyze_boll(df, long_term, medium_term, short_term)
+    analysis['BOLL'] = analyze_boll_codes(df, long_term, medium_term, short_term)
     
     # MA系统分析
     analysis['MA'] = analyze_ma_system(df, long_term, medium_term, short_term)
     
     # K线形态分析
-    analysis['Candlestick'] = analyze_candlesticks(df, long_term, medium_term, short_term)
+    analysis['Candlestick'] = analyze_candlesticks(short_term)
+    
+    return analysis
+
+def format_indicator_results(analysis: Mapping[str, Any]) -> Dict[str, Dict[str, Any]]:
+    """
+    将analyze_indicators_codes的结果转换为文字描述
+    
+    参数:
+        analysis (Mapping[str, Any]): analyze_indicators_codes的返回结果
+        
+    返回:
+        Dict[str, Dict[str, Any]]: 与analyze_indicators相同的结果字典
+    """
+    return {
+        'MACD': format_macd_result(analysis['MACD']),
+        'KDJ': format_kdj_result(analysis['KDJ']),
+        'RSI': format_rsi_result(analysis['RSI']),
+        'BOLL': format_boll_result(analysis['BOLL']),
+        'MA': analysis['MA'],
+        'Candlestick': analysis['Candlestick']
+    }
+
+def analyze_indicators_batch(frames: Dict[str, pd.DataFrame],
+                             max_workers: Optional[int] = None,
+                             dtype: Any = np.float64) -> Dict[str, Dict[str, Dict[str, Any]]]:
+    """
+    批量分析多只股票的技术指标，各股票之间互不依赖，用多进程并行执行
+    
+    参数:
+        frames (Dict[str, pd.DataFrame]): 股票代码到其技术指标数据的映射
+        max_workers (int, optional): 最大进程数，默认为CPU核数；为1或只有一只股票时在当前进程内顺序执行
+        dtype: 均线、KDJ、MACD列使用的浮点类型，全市场扫描时可传np.float32以减半这些列的内存占用
+            和发往子进程的数据量；接近判断阈值时分类结果可能与float64不同，默认保持float64
+        
+    返回:
+        Dict[str, Dict[str, Dict[str, Any]]]: 股票代码到analyze_indicators分析结果的映射，顺序与frames一致
+    """
+    if np.dtype(dtype) != np.float64:
+        frames = {code: _reduce_precision(df, dtype) for code, df in frames.items()}
+    
+    workers = max_workers or os.cpu_count() or 1
+    if workers == 1 or len(frames) <= 1:
+        return {code: analyze_indicators(df) for code, df in frames.items()}
     
-    return analysis 
\ No newline at end of file
+    # 单只股票的数据很小，按块分发以摊薄进程间传输的开销
+    chunksize = max(1, len(frames) // (workers * 4))
+    # 子进程用spawn启动：父进程中numba的并行内核（如analyze_boll_batch_parallel）可能已启动线程池，
+    # fork出的子进程继承其锁状态，会在解释器退出时永久阻塞
+    with ProcessPoolExecutor(max_workers=workers, mp_context=multiprocessing.get_context('spawn')) as executor:
+        results = executor.map(analyze_indicators, frames.values(), chunksize=chunksize)
+        return dict(zip(frames.keys(), results))
+
+def _reduce_precision(df: pd.DataFrame, dtype: Any) -> pd.DataFrame:
+    """
+    将均线、KDJ、MACD列转换为指定的浮点类型，其余列不变
+    """
+    return df.astype({column: dtype for column in _REDUCIBLE_COLUMNS if column in df.columns})
+
+def screen_indicators(latest: Mapping[str, Any], prev: Mapping[str, Any],
+                      index: Optional[Sequence] = None) -> pd.DataFrame:
+    """
+    横截面筛选：按最新一天与前一天的指标值，一次判断所有股票的MACD、KDJ、RSI、BOLL短期信号
+    
+    判断规则与各分析器中只依赖最近两天的短期信号一致（MACD短期信号、KDJ交叉形态、RSI短期信号、BOLL短期信号），
+    适合每个调仓日对全市场调用一次，代替逐只股票调用analyze_indicators；
+    安装了numba时在编译后的内核中逐只股票调用各分析器的判断内核，未安装时按列向量化计算，结果一致
+    
+    参数:
+        latest (Mapping[str, Any]): 列名到各股票最新一天数值的映射（一维数组，也可直接传DataFrame），
+            需包含 macd_dif、macd_dea、macd、kdj_k、kdj_d、kdj_j、rsi_6、rsi_12、
+            close、boll_upper、boll_mid、boll_lower 列
+        prev (Mapping[str, Any]): 同上，各股票前一天的数值，顺序与latest一致
+        index (Sequence, optional): 结果的行索引（如股票代码），默认为0开始的整数
+        
+    返回:
+        pd.DataFrame: 每行一只股票，MACD、KDJ、RSI、BOLL四列为对应的短期信号文字描述
+    """
+    # 每列排成(股票数, 2)的数组，每行依次为前一天、最新一天，相当于单只股票分析时窗口的最后两天
+    pairs = [np.column_stack((np.asarray(prev[name], dtype=np.float64), np.asarray(latest[name], dtype=np.float64)))
+             for name in _SCREEN_COLUMNS]
+    codes = _screen_codes(*pairs) if NUMBA_AVAILABLE else _screen_codes_numpy(*pairs)
+    
+    return pd.DataFrame({
+        'MACD': np.asarray(_MACD_SHORT_SIGNAL_LABELS, dtype=object)[codes[:, 0]],
+        'KDJ': np.asarray(_KDJ_CROSS_LABELS, dtype=object)[codes[:, 1]],
+        'RSI': np.asarray(_RSI_SHORT_SIGNAL_LABELS, dtype=object)[codes[:, 2]],
+        'BOLL': np.asarray(_SHORT_TERM_SIGNALS, dtype=object)[codes[:, 3]],
+    }, index=index)
+
+@njit(cache=True)
+def _screen_codes(macd_dif, macd_dea, macd, kdj_k, kdj_d, kdj_j, rsi_6, rsi_12,
+                  close, boll_upper, boll_mid, boll_lower):
+    """
+    逐只股票调用各分析器的短期信号内核，参数顺序见_SCREEN_COLUMNS，均为(股票数, 2)的数组；
+    返回(股票数, 4)的编码数组，各列依次为MACD、KDJ、RSI、BOLL
+    """
+    n = macd_dif.shape[0]
+    codes = np.empty((n, 4), dtype=np.int8)
+    for i in range(n):
+        codes[i, 0] = macd_short_signal_code(macd_dif[i], macd_dea[i], macd[i])
+        codes[i, 1] = cross_code(kdj_k[i], kdj_d[i], kdj_j[i])
+        codes[i, 2] = rsi_short_signal_code(rsi_6[i], rsi_12[i])
+        codes[i, 3] = _boll_short_term_code(close[i], boll_upper[i], boll_mid[i], boll_lower[i])
+    return codes
+
+def _screen_codes_numpy(macd_dif, macd_dea, macd, kdj_k, kdj_d, kdj_j, rsi_6, rsi_12,
+                        close, boll_upper, boll_mid, boll_lower) -> np.ndarray:
+    """
+    未安装numba时_screen_codes的NumPy实现：各判断按列向量化，用np.select按原有判断顺序取编码
+    """
+    # MACD：先看DIF与DEA的金叉死叉，再看柱状放大缩小
+    dif, dif_prev = macd_dif[:, 1], macd_dif[:, 0]
+    dea, dea_prev = macd_dea[:, 1], macd_dea[:, 0]
+    hist, hist_prev = macd[:, 1], macd[:, 0]
+    macd_code = np.select(
+        [(dif > dea) & (dif_prev <= dea_prev), (dif < dea) & (dif_prev >= dea_prev),
+         (hist > 0) & (hist > hist_prev), (hist > 0) & (hist < hist_prev),
+         (hist < 0) & (hist < hist_prev), (hist < 0) & (hist > hist_prev)],
+        [0, 1, 2, 3, 4, 5], 6
+    )
+    
+    # KDJ：K、D线交叉，J线同向时为确认信号；K、D接近时为交叉临界
+    k, k_prev = kdj_k[:, 1], kdj_k[:, 0]
+    d, d_prev = kdj_d[:, 1], kdj_d[:, 0]
+    j = kdj_j[:, 1]
+    golden = (k > d) & (k_prev <= d_prev)
+    death = (k < d) & (k_prev >= d_prev)
+    kdj_code = np.select(
+        [golden & (j > k), golden, death & (j < k), death, np.abs(k - d) < 1],
+        [0, 1, 2, 3, 4], 5
+    )
+    
+    # RSI：先看快慢线交叉，再看RSI6进出超买（80）超卖（20）区间
+    fast, fast_prev = rsi_6[:, 1], rsi_6[:, 0]
+    slow, slow_prev = rsi_12[:, 1], rsi_12[:, 0]
+    rsi_code = np.select(
+        [(fast > slow) & (fast_prev <= slow_prev), (fast < slow) & (fast_prev >= slow_prev),
+         (fast > 80) & (fast_prev <= 80), (fast < 20) & (fast_prev >= 20),
+         (fast < 80) & (fast_prev >= 80), (fast > 20) & (fast_prev <= 20)],
+        [0, 1, 2, 3, 4, 5], 6
+    )
+    
+    # BOLL：收盘价相对上、下、中轨的关系查状态转移表
+    c, c_prev = close[:, 1], close[:, 0]
+    boll_code = _SHORT_TERM_TABLE[
+        _relation(c, boll_upper[:, 1]) << 10 | _relation(c_prev, boll_upper[:, 0]) << 8
+        | _relation(c, boll_lower[:, 1]) << 6 | _relation(c_prev, boll_lower[:, 0]) << 4
+        | _relation(c, boll_mid[:, 1]) << 2 | _relation(c_prev, boll_mid[:, 0])
+    ]
+    
+    return np.column_stack((macd_code, kdj_code, rsi_code, boll_code)).astype(np.int8)
+
+def _warmup() -> None:
+    """
+    预先编译横截面筛选内核，未安装numba时不做任何事
+    """
+    if not NUMBA_AVAILABLE:
+        return
+    values = np.ones((1, 2))
+    _screen_codes(*([values] * len(_SCREEN_COLUMNS)))
+
+# 设置环境变量EAGER_JIT=1时在导入阶段完成编译，否则在首次筛选时编译
+if EAGER_JIT:
+    _warmup()
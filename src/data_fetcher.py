@@ -2,14 +2,34 @@
 数据获取模块 - 负责从Tushare获取股票日线数据和技术指标
 """
 import os
+import time
+from datetime import date
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
 import tushare as ts
 from dotenv import load_dotenv
+import numpy as np
 import pandas as pd
 
+# 各接口请求的字段
+_DAILY_FIELDS = 'ts_code,trade_date,open,high,low,close,pre_close,change,pct_chg,vol,amount'
+_FACTOR_FIELDS = 'ts_code,trade_date,macd_dif,macd_dea,macd,kdj_k,kdj_d,kdj_j,rsi_6,rsi_12,rsi_24,boll_upper,boll_mid,boll_lower'
+_MA_FIELDS = 'ts_code,trade_date,ma_qfq_5,ma_qfq_10,ma_qfq_20,ma_qfq_30,ma_qfq_60,ma_qfq_90,ma_qfq_250'
+
+# 批量获取时默认的并发股票数，过高容易触发Tushare的每分钟调用次数限制
+_DEFAULT_FETCH_WORKERS = 4
+
+# 股票基础信息缓存的有效期（秒），上市股票列表每天最多变化一次
+_STOCK_BASIC_CACHE_SECONDS = 24 * 60 * 60
 
 
 class TushareDataFetcher:
-    def __init__(self):
+    def __init__(self, cache_dir=None):
+        """
+        参数:
+            cache_dir (str | Path): Parquet磁盘缓存目录（如'.cache'），为None时不使用磁盘缓存；
+                读写Parquet需要安装pyarrow
+        """
         load_dotenv()
         token = os.getenv('TUSHARE_TOKEN')
 
@@ -21,7 +41,13 @@ class TushareDataFetcher:
         ts.set_token(token)
         self.pro = ts.pro_api()
         
-    def get_stock_data(self, ts_code, start_date=None, end_date=None):
+        # 进程内缓存：键与磁盘缓存文件名一致，返回副本以免调用方的修改污染缓存
+        self._memory_cache = {}
+        self.cache_dir = Path(cache_dir) if cache_dir is not None else None
+        if self.cache_dir is not None:
+            self.cache_dir.mkdir(parents=True, exist_ok=True)
+        
+    def get_stock_data(self, ts_code, start_date=None, end_date=None, dtype=np.float64):
         """
         获取股票日线数据和技术指标
         
@@ -29,41 +55,35 @@ class TushareDataFetcher:
             ts_code (str): 股票代码（如：000001.SZ）
             start_date (str): 开始日期（如：20230101）
             end_date (str): 结束日期（如：20240214）
+            dtype: 浮点列使用的类型，全市场扫描时可传np.float32以减半内存占用；
+                接近判断阈值时分析结果可能与float64不同，默认保持float64
             
         返回:
             pandas.DataFrame: 包含日线数据和技术指标的DataFrame
         """
+        # 同一股票、日期区间与精度的结果先查进程内缓存，再查磁盘缓存；
+        # 未指定结束日期时数据每天都会更新，磁盘缓存只在写入当天有效
+        key = f"{ts_code}_{start_date}_{end_date}_{np.dtype(dtype).name}"
+        max_age = None if end_date is not None else _seconds_since_midnight()
+        cached = self._load_cached(key, max_age)
+        if cached is not None:
+            return cached
+        
         try:
-            # 获取日线数据
-            df_daily = self.pro.daily(
-                ts_code=ts_code,
-                start_date=start_date,
-                end_date=end_date,
-                fields='ts_code,trade_date,open,high,low,close,pre_close,change,pct_chg,vol,amount'
-            )
+            # 日线、技术指标、MA均线三个接口互不依赖，并发请求以重叠网络等待时间
+            query = dict(ts_code=ts_code, start_date=start_date, end_date=end_date)
+            with ThreadPoolExecutor(max_workers=3) as executor:
+                daily_future = executor.submit(self.pro.daily, fields=_DAILY_FIELDS, **query)
+                factor_future = executor.submit(self.pro.stk_factor, fields=_FACTOR_FIELDS, **query)
+                ma_future = executor.submit(self.pro.stk_factor_pro, fields=_MA_FIELDS, **query)
+                df_daily = daily_future.result()
+                df_factor = factor_future.result()
+                df_ma = ma_future.result()
             
             if df_daily is None or df_daily.empty:
-                
-
                 print("获取日线数据失败")
                 return None
             
-            # 获取技术指标数据
-            df_factor = self.pro.stk_factor(
-                ts_code=ts_code,
-                start_date=start_date,
-                end_date=end_date,
-                fields='ts_code,trade_date,macd_dif,macd_dea,macd,kdj_k,kdj_d,kdj_j,rsi_6,rsi_12,rsi_24,boll_upper,boll_mid,boll_lower'
-            )
-            
-            # 获取MA均线数据
-            df_ma = self.pro.stk_factor_pro(
-                ts_code=ts_code,
-                start_date=start_date,
-                end_date=end_date,
-                fields='ts_code,trade_date,ma_qfq_5,ma_qfq_10,ma_qfq_20,ma_qfq_30,ma_qfq_60,ma_qfq_90,ma_qfq_250'
-            )
-            
             if df_factor is None or df_factor.empty:
                 print("获取技术指标数据失败")
                 return None
@@ -72,9 +92,9 @@ class TushareDataFetcher:
                 print("获取MA均线数据失败")
                 return None
                 
-            # 合并所有数据
-            df = pd.merge(df_daily, df_factor, on=['ts_code', 'trade_date'], how='left')
-            df = pd.merge(df, df_ma, on=['ts_code', 'trade_date'], how='left')
+            # 合并所有数据：三个接口查询的是同一只股票，按交易日对齐后一次左连接，代替两次按两列的merge
+            factors = [frame.drop(columns='ts_code').set_index('trade_date') for frame in (df_factor, df_ma)]
+            df = df_daily.set_index('trade_date', drop=False).join(factors, how='left').reset_index(drop=True)
             
             # 按日期升序排序
             df = df.sort_values('trade_date')
@@ -82,6 +102,9 @@ class TushareDataFetcher:
             # 重命名列
             df = df.rename(columns={'pct_chg': 'pct_change'})
             
+            df = _consolidate_floats(df, dtype)
+            
+            self._store_cached(key, df)
             return df
             
         except Exception as e:
@@ -90,16 +113,112 @@ class TushareDataFetcher:
             print(f"获取数据失败: {str(e)}")
             return None
 
+    def get_many(self, ts_codes, start_date=None, end_date=None, max_workers=_DEFAULT_FETCH_WORKERS,
+                 dtype=np.float64):
+        """
+        并发获取多只股票的日线数据和技术指标
+        
+        参数:
+            ts_codes (Iterable[str]): 股票代码列表
+            start_date (str): 开始日期（如：20230101）
+            end_date (str): 结束日期（如：20240214）
+            max_workers (int): 同时请求的股票数
+            dtype: 浮点列使用的类型，见get_stock_data
+            
+        返回:
+            Dict[str, pandas.DataFrame]: 股票代码到数据的映射，顺序与ts_codes一致；获取失败的股票不包含在内
+        """
+        ts_codes = list(ts_codes)
+        with ThreadPoolExecutor(max_workers=max_workers) as executor:
+            frames = executor.map(lambda code: self.get_stock_data(code, start_date, end_date, dtype), ts_codes)
+            return {code: df for code, df in zip(ts_codes, frames) if df is not None}
+
     def get_stock_basic(self):
         """
-        获取股票基础信息
+        获取股票基础信息（启用缓存时一天内重复调用直接读取缓存）
         """
+        cached = self._load_cached('stock_basic', _STOCK_BASIC_CACHE_SECONDS)
+        if cached is not None:
+            return cached
+        
         try:
-            return self.pro.stock_basic(
+            df = self.pro.stock_basic(
                 exchange='',
                 list_status='L',
                 fields='ts_code,symbol,name,area,industry,list_date'
             )
+            if df is not None and not df.empty:
+                self._store_cached('stock_basic', df)
+            return df
         except Exception as e:
             print(f"获取股票基础信息失败: {str(e)}")
-            return None 
\ No newline at end of file
+            return None
+
+    def _cache_path(self, key):
+        """
+        缓存键对应的Parquet文件路径
+        """
+        return self.cache_dir / f"{key}.parquet"
+
+    def _load_cached(self, key, max_age=None):
+        """
+        按缓存键依次查找进程内缓存与磁盘缓存，未命中或已过期时返回None
+        
+        参数:
+            key (str): 缓存键
+            max_age (float): 缓存有效期（秒），按写入时间（磁盘缓存为文件修改时间）判断，为None时不过期
+        """
+        entry = self._memory_cache.get(key)
+        if entry is not None:
+            stored_at, df = entry
+            if max_age is None or time.time() - stored_at <= max_age:
+                return df.copy()
+        
+        if self.cache_dir is None:
+            return None
+        path = self._cache_path(key)
+        try:
+            stored_at = path.stat().st_mtime
+        except FileNotFoundError:
+            return None
+        if max_age is not None and time.time() - stored_at > max_age:
+            return None
+        try:
+            df = pd.read_parquet(path)
+        except Exception as e:
+            print(f"读取缓存失败: {str(e)}")
+            return None
+        self._memory_cache[key] = (stored_at, df)
+        return df.copy()
+
+    def _store_cached(self, key, df):
+        """
+        将结果写入进程内缓存，并在启用磁盘缓存时写入Parquet文件（zstd压缩）
+        """
+        self._memory_cache[key] = (time.time(), df.copy())
+        if self.cache_dir is None:
+            return
+        try:
+            df.to_parquet(self._cache_path(key), compression='zstd')
+        except Exception as e:
+            print(f"写入缓存失败: {str(e)}")
+
+
+def _seconds_since_midnight():
+    """
+    当天已经过去的秒数，用作只在当天有效的缓存的有效期
+    """
+    return time.time() - time.mktime(date.today().timetuple())
+
+
+def _consolidate_floats(df, dtype):
+    """
+    将各接口合并后分散在多个块中的浮点列转换为dtype，并合并为一个按列连续存储的二维块，列顺序不变
+    
+    单列取出时是连续的一维视图，多列一起取出（如均线分析）时只需从同一个块中取行，不再逐列拼接
+    """
+    float_columns = df.select_dtypes(include='float').columns
+    # (天数, 列数)的Fortran序数组转置后即为pandas块内部的(列数, 天数)C序布局，构造时不再复制
+    block = np.asfortranarray(df[float_columns].to_numpy(dtype=dtype))
+    floats = pd.DataFrame(block, index=df.index, columns=float_columns, copy=False)
+    return pd.concat([df.drop(columns=float_columns), floats], axis=1)[df.columns]
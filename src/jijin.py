@@ -2,15 +2,24 @@ import tushare as ts
 import os
 from dotenv import load_dotenv
 
-load_dotenv()
 
-pro = ts.pro_api(os.getenv('TUSHARE_TOKEN'))
+def main():
+    """
+    拉取基金基本信息与持仓数据并写入CSV（网络请求与文件读写只在直接运行时执行，导入本模块不会触发）
+    """
+    load_dotenv()
 
-df = pro.fund_basic(market='E')
-# df.to_csv('fund_basic.csv', index=False, encoding='utf-8-sig')
+    pro = ts.pro_api(os.getenv('TUSHARE_TOKEN'))
 
-# pro = ts.pro_api()
+    df = pro.fund_basic(market='E')
+    # df.to_csv('fund_basic.csv', index=False, encoding='utf-8-sig')
 
-df1 = pro.fund_portfolio(ts_code='001753.OF')
-print(df1)
-df1.to_csv("test.csv",index=False)
\ No newline at end of file
+    # pro = ts.pro_api()
+
+    df1 = pro.fund_portfolio(ts_code='001753.OF')
+    print(df1)
+    df1.to_csv("test.csv", index=False, chunksize=10_000)
+
+
+if __name__ == '__main__':
+    main()
@@ -5,15 +5,12 @@ import sys
 print(sys.path)
 
 
-import os
+from concurrent.futures import ThreadPoolExecutor
 from dotenv import load_dotenv
 from src.data_fetcher import TushareDataFetcher
-from src.visualizer import TechnicalVisualizer
-from src.report_generator import ReportGenerator
 from src.analyzers import analyze_indicators
 from datetime import datetime, timedelta
-import calendar
-import loguru
+from dateutil.relativedelta import relativedelta
 
 def get_date_range(lookback_months=2):
     """
@@ -26,33 +23,131 @@ def get_date_range(lookback_months=2):
     """
     end_date = datetime.now() - timedelta(days=1)
     
-    # 计算起始日期（前N个月的1号）
-    if end_date.month > lookback_months:
-        start_month = end_date.month - lookback_months
-        start_year = end_date.year
-    else:
-        start_month = end_date.month + 12 - lookback_months
-        start_year = end_date.year - 1
-    
-    start_date = datetime(start_year, start_month, 1)
+    # 计算起始日期（前N个月的1号），relativedelta自动处理跨年
+    start_date = (end_date - relativedelta(months=lookback_months)).replace(day=1)
     
     return (
         start_date.strftime('%Y%m%d'),
         end_date.strftime('%Y%m%d')
     )
 
+def _format_analysis(analysis):
+    """
+    将技术指标分析结果整理为终端输出的文本
+    
+    各行先收集到列表中，最后拼接为一个字符串，由调用方一次输出，避免逐行print
+    """
+    lines = []
+    
+    lines.append("\n=== 技术指标分析结果 ===")
+    
+    lines.append("\nMACD分析:")
+    lines.append(f"DIF值: {analysis['MACD']['DIF']:.2f}")
+    lines.append(f"DEA值: {analysis['MACD']['DEA']:.2f}")
+    lines.append(f"MACD值: {analysis['MACD']['MACD']:.2f}")
+    lines.append(f"长期趋势: {analysis['MACD']['long_term_trend']}")
+    lines.append(f"中期趋势: {analysis['MACD']['medium_term_trend']}")
+    lines.append(f"短期信号: {analysis['MACD']['short_term_signal']}")
+    lines.append(f"背离情况: {analysis['MACD']['divergence']}")
+    lines.append(f"指标强度: {analysis['MACD']['strength']}")
+    lines.append(f"综合信号: {analysis['MACD']['signal']}")
+    
+    lines.append("\nKDJ分析:")
+    lines.append(f"K值: {analysis['KDJ']['K']:.2f}")
+    lines.append(f"D值: {analysis['KDJ']['D']:.2f}")
+    lines.append(f"J值: {analysis['KDJ']['J']:.2f}")
+    lines.append(f"长期趋势: {analysis['KDJ']['long_term_trend']}")
+    lines.append(f"中期趋势: {analysis['KDJ']['medium_term_trend']}")
+    lines.append(f"短期趋势: {analysis['KDJ']['short_term_trend']}")
+    lines.append(f"交叉形态: {analysis['KDJ']['cross_pattern']}")
+    lines.append(f"背离情况: {analysis['KDJ']['divergence']}")
+    lines.append(f"指标强度: {analysis['KDJ']['strength']}")
+    lines.append(f"形态特征: {analysis['KDJ']['pattern']}")
+    lines.append(f"综合信号: {analysis['KDJ']['signal']}")
+    
+    lines.append("\nRSI分析:")
+    lines.append(f"RSI指标值:")
+    lines.append(f"  - RSI6: {analysis['RSI']['RSI6']:.2f}")
+    lines.append(f"  - RSI12: {analysis['RSI']['RSI12']:.2f}")
+    lines.append(f"  - RSI24: {analysis['RSI']['RSI24']:.2f}")
+    lines.append(f"\n趋势分析:")
+    lines.append(f"  - 长期趋势: {analysis['RSI']['long_term_trend']}")
+    lines.append(f"  - 中期趋势: {analysis['RSI']['medium_term_trend']}")
+    lines.append(f"  - 短期信号: {analysis['RSI']['short_term_signal']}")
+    lines.append(f"\n形态分析:")
+    lines.append(f"  - RSI形态: {analysis['RSI']['pattern']}")
+    lines.append(f"  - 背离情况: {analysis['RSI']['divergence']}")
+    lines.append(f"  - 指标强度: {analysis['RSI']['strength']}")
+    lines.append(f"\n综合判断:")
+    lines.append(f"  - {analysis['RSI']['signal']}")
+    
+    lines.append("\nBOLL分析:")
+    lines.append(f"布林带指标值:")
+    lines.append(f"  - 上轨: {analysis['BOLL']['UPPER']:.2f}")
+    lines.append(f"  - 中轨: {analysis['BOLL']['MID']:.2f}")
+    lines.append(f"  - 下轨: {analysis['BOLL']['LOWER']:.2f}")
+    lines.append(f"\n趋势分析:")
+    lines.append(f"  - 长期趋势: {analysis['BOLL']['long_term_trend']}")
+    lines.append(f"  - 中期趋势: {analysis['BOLL']['medium_term_trend']}")
+    lines.append(f"  - 短期信号: {analysis['BOLL']['short_term_signal']}")
+    lines.append(f"\n形态分析:")
+    lines.append(f"  - 带宽状态: {analysis['BOLL']['bandwidth']}")
+    lines.append(f"  - 形态特征: {analysis['BOLL']['pattern']}")
+    lines.append(f"  - 指标强度: {analysis['BOLL']['strength']}")
+    lines.append(f"\n综合判断:")
+    lines.append(f"  - {analysis['BOLL']['signal']}")
+    
+    lines.append("\nMA系统分析:")
+    lines.append(f"\n趋势分析:")
+    lines.append(f"  - 长期趋势: {analysis['MA']['long_term_trend']['trend']}")
+    lines.append(f"  - 中期趋势: {analysis['MA']['medium_term_trend']['trend']}")
+    lines.append(f"  - 短期信号: {analysis['MA']['short_term_signal']['summary']}")
+    lines.append(f"\n形态分析:")
+    lines.append(f"  - 形态类型: {analysis['MA']['formation']['type']}")
+    lines.append(f"  - 形态强度: {analysis['MA']['formation']['strength']}")
+    lines.append(f"  - 均线分散度: {analysis['MA']['formation']['dispersion']:.4f}")
+    lines.append(f"\n支撑与阻力:")
+    if analysis['MA']['support_resistance']['nearest_support']:
+        lines.append(f"  - 最近支撑: {analysis['MA']['support_resistance']['nearest_support']['value']:.2f}")
+    if analysis['MA']['support_resistance']['nearest_resistance']:
+        lines.append(f"  - 最近阻力: {analysis['MA']['support_resistance']['nearest_resistance']['value']:.2f}")
+    lines.append(f"\n系统强度与信号:")
+    lines.append(f"  - 均线系统强度: {analysis['MA']['strength']['strength']}")
+    lines.append(f"  - 综合研判信号: {analysis['MA']['signal']}")
+    
+    # 打印K线形态分析结果
+    lines.append("\nK线形态分析:")
+    if analysis['Candlestick'].get('error'):
+        lines.append(f"错误: {analysis['Candlestick']['error']}")
+    else:
+        # 打印识别到的形态
+        lines.append("\n识别到的形态:")
+        if not analysis['Candlestick']['patterns']:
+            lines.append("  - 未识别到明显的K线形态")
+        else:
+            for pattern in analysis['Candlestick']['patterns']:
+                lines.append(f"  - {pattern['type']}: {pattern['pattern']}")
+        # 打印形态强度
+        lines.append(f"\n形态强度: {analysis['Candlestick']['strength']}")
+        # 打印交易建议
+        lines.append(f"交易建议: {analysis['Candlestick']['suggestion']}")
+    
+    return "\n".join(lines)
+
 def main():
     # 加载环境变量
     load_dotenv()
     
-    # 初始化数据获取器
-    fetcher = TushareDataFetcher()
+    # 初始化数据获取器：同一股票与日期区间的数据缓存在.cache目录下，重复运行时不再请求Tushare
+    fetcher = TushareDataFetcher(cache_dir='.cache')
     
     # 获取股票列表
     stocks = fetcher.get_stock_basic()
     if stocks is None:
         print("获取股票列表失败")
         return
+    # 股票代码到名称的映射只构建一次，之后按代码查名称不再逐行扫描整张表
+    name_by_code = dict(zip(stocks['ts_code'].to_numpy(), stocks['name'].to_numpy()))
     
     # 获取用户输入
     print("\n可用的股票列表:")
@@ -74,135 +169,55 @@ def main():
     # 分析指标
     analysis = analyze_indicators(df)
     
-    # 打印分析结果
-    print("\n=== 技术指标分析结果 ===")
-    
-    print("\nMACD分析:")
-    print(f"DIF值: {analysis['MACD']['DIF']:.2f}")
-    print(f"DEA值: {analysis['MACD']['DEA']:.2f}")
-    print(f"MACD值: {analysis['MACD']['MACD']:.2f}")
-    print(f"长期趋势: {analysis['MACD']['long_term_trend']}")
-    print(f"中期趋势: {analysis['MACD']['medium_term_trend']}")
-    print(f"短期信号: {analysis['MACD']['short_term_signal']}")
-    print(f"背离情况: {analysis['MACD']['divergence']}")
-    print(f"指标强度: {analysis['MACD']['strength']}")
-    print(f"综合信号: {analysis['MACD']['signal']}")
-    
-    print("\nKDJ分析:")
-    print(f"K值: {analysis['KDJ']['K']:.2f}")
-    print(f"D值: {analysis['KDJ']['D']:.2f}")
-    print(f"J值: {analysis['KDJ']['J']:.2f}")
-    print(f"长期趋势: {analysis['KDJ']['long_term_trend']}")
-    print(f"中期趋势: {analysis['KDJ']['medium_term_trend']}")
-    print(f"短期趋势: {analysis['KDJ']['short_term_trend']}")
-    print(f"交叉形态: {analysis['KDJ']['cross_pattern']}")
-    print(f"背离情况: {analysis['KDJ']['divergence']}")
-    print(f"指标强度: {analysis['KDJ']['strength']}")
-    print(f"形态特征: {analysis['KDJ']['pattern']}")
-    print(f"综合信号: {analysis['KDJ']['signal']}")
-    
-    print("\nRSI分析:")
-    print(f"RSI指标值:")
-    print(f"  - RSI6: {analysis['RSI']['RSI6']:.2f}")
-    print(f"  - RSI12: {analysis['RSI']['RSI12']:.2f}")
-    print(f"  - RSI24: {analysis['RSI']['RSI24']:.2f}")
-    print(f"\n趋势分析:")
-    print(f"  - 长期趋势: {analysis['RSI']['long_term_trend']}")
-    print(f"  - 中期趋势: {analysis['RSI']['medium_term_trend']}")
-    print(f"  - 短期信号: {analysis['RSI']['short_term_signal']}")
-    print(f"\n形态分析:")
-    print(f"  - RSI形态: {analysis['RSI']['pattern']}")
-    print(f"  - 背离情况: {analysis['RSI']['divergence']}")
-    print(f"  - 指标强度: {analysis['RSI']['strength']}")
-    print(f"\n综合判断:")
-    print(f"  - {analysis['RSI']['signal']}")
-    
-    print("\nBOLL分析:")
-    print(f"布林带指标值:")
-    print(f"  - 上轨: {analysis['BOLL']['UPPER']:.2f}")
-    print(f"  - 中轨: {analysis['BOLL']['MID']:.2f}")
-    print(f"  - 下轨: {analysis['BOLL']['LOWER']:.2f}")
-    print(f"\n趋势分析:")
-    print(f"  - 长期趋势: {analysis['BOLL']['long_term_trend']}")
-    print(f"  - 中期趋势: {analysis['BOLL']['medium_term_trend']}")
-    print(f"  - 短期信号: {analysis['BOLL']['short_term_signal']}")
-    print(f"\n形态分析:")
-    print(f"  - 带宽状态: {analysis['BOLL']['bandwidth']}")
-    print(f"  - 形态特征: {analysis['BOLL']['pattern']}")
-    print(f"  - 指标强度: {analysis['BOLL']['strength']}")
-    print(f"\n综合判断:")
-    print(f"  - {analysis['BOLL']['signal']}")
-    
-    print("\nMA系统分析:")
-    print(f"\n趋势分析:")
-    print(f"  - 长期趋势: {analysis['MA']['long_term_trend']['trend']}")
-    print(f"  - 中期趋势: {analysis['MA']['medium_term_trend']['trend']}")
-    print(f"  - 短期信号: {analysis['MA']['short_term_signal']['summary']}")
-    print(f"\n形态分析:")
-    print(f"  - 形态类型: {analysis['MA']['formation']['type']}")
-    print(f"  - 形态强度: {analysis['MA']['formation']['strength']}")
-    print(f"  - 均线分散度: {analysis['MA']['formation']['dispersion']:.4f}")
-    print(f"\n支撑与阻力:")
-    if analysis['MA']['support_resistance']['nearest_support']:
-        print(f"  - 最近支撑: {analysis['MA']['support_resistance']['nearest_support']['value']:.2f}")
-    if analysis['MA']['support_resistance']['nearest_resistance']:
-        print(f"  - 最近阻力: {analysis['MA']['support_resistance']['nearest_resistance']['value']:.2f}")
-    print(f"\n系统强度与信号:")
-    print(f"  - 均线系统强度: {analysis['MA']['strength']['strength']}")
-    print(f"  - 综合研判信号: {analysis['MA']['signal']}")
-    
-    # 打印K线形态分析结果
-    print("\nK线形态分析:")
-    if analysis['Candlestick'].get('error'):
-        print(f"错误: {analysis['Candlestick']['error']}")
-    else:
-        # 打印识别到的形态
-        print("\n识别到的形态:")
-        if not analysis['Candlestick']['patterns']:
-            print("  - 未识别到明显的K线形态")
-        else:
-            for pattern in analysis['Candlestick']['patterns']:
-                print(f"  - {pattern['type']}: {pattern['pattern']}")
-        # 打印形态强度
-        print(f"\n形态强度: {analysis['Candlestick']['strength']}")
-        # 打印交易建议
-        print(f"交易建议: {analysis['Candlestick']['suggestion']}")
+    # 打印分析结果（整理为一段文本后一次输出）
+    print(_format_analysis(analysis))
     
     # 绘制图表
-    stock_name = stocks[stocks['ts_code'] == ts_code]['name'].values[0]
+    stock_name = name_by_code[ts_code]
+    # 绘图与报告生成分别依赖plotly和Gemini SDK，导入较慢，到真正用到时才导入，获取数据失败或中途退出时不必付出这部分开销
+    from src.visualizer import TechnicalVisualizer
     visualizer = TechnicalVisualizer()
     fig = visualizer.plot_indicators(df, stock_name)
     
-    # 获取最新价格和变化
-    latest_price = df['close'].iloc[-1]
-    price_change = (df['close'].iloc[-1] - df['close'].iloc[-2]) / df['close'].iloc[-2] * 100
-    vol_change = (df['vol'].iloc[-1] - df['vol'].iloc[-2]) / df['vol'].iloc[-2] * 100
+    # 获取最新价格和变化：最近两天的收盘价与成交量一次取出为数组，不再逐个按标签取值
+    (prev_close, prev_vol), (latest_price, latest_vol) = df[['close', 'vol']].to_numpy()[-2:]
+    price_change = (latest_price - prev_close) / prev_close * 100
+    vol_change = (latest_vol - prev_vol) / prev_vol * 100
     
     # 生成分析报告
     print("\n正在生成AI分析报告...")
-    report_generator = ReportGenerator()
-    
-    # 生成综合分析报告
-    report = report_generator.generate_report(stock_name, analysis, df)
-    
-    # 生成各个技术指标的独立报告
+    from src.report_generator import ReportGenerator
+    report_generator = ReportGenerator(cache_dir='.cache/llm')
     indicators = ['MACD', 'KDJ', 'RSI', 'BOLL', 'MA']
-    for indicator in indicators:
-        print(f"\n正在生成{indicator}指标分析报告...")
-        indicator_report = report_generator.generate_indicator_report(
-            stock_name=stock_name,
-            indicator_name=indicator,
-            latest_price=latest_price,
-            price_change=price_change,
-            vol_change=vol_change,
-            analysis=analysis
-        )
-        report_file = report_generator.save_indicator_report(
-            stock_name=stock_name,
-            indicator_name=indicator,
-            report_content=indicator_report
-        )
-        print(f"{indicator}指标分析报告已保存至: {report_file}")
+    # 各指标报告共用同一生成时间，报告头部除指标名称外完全相同
+    generated_at = datetime.now().strftime('%Y-%m-%d %H:%M:%S')
+    
+    # 综合报告与各个技术指标的独立报告是互不依赖的API请求，并发发出以重叠网络等待时间
+    with ThreadPoolExecutor(max_workers=len(indicators) + 1) as executor:
+        report_future = executor.submit(report_generator.generate_report, stock_name, analysis, df)
+        indicator_futures = {}
+        for indicator in indicators:
+            print(f"\n正在生成{indicator}指标分析报告...")
+            indicator_futures[indicator] = executor.submit(
+                report_generator.generate_indicator_report,
+                stock_name=stock_name,
+                indicator_name=indicator,
+                latest_price=latest_price,
+                price_change=price_change,
+                vol_change=vol_change,
+                analysis=analysis,
+                generated_at=generated_at
+            )
+        
+        # 综合报告完成时创建本次的报告目录，各指标报告等它完成后再按顺序保存到同一目录
+        report = report_future.result()
+        for indicator, future in indicator_futures.items():
+            report_file = report_generator.save_indicator_report(
+                stock_name=stock_name,
+                indicator_name=indicator,
+                report_content=future.result()
+            )
+            print(f"{indicator}指标分析报告已保存至: {report_file}")
     
     # 打印分析思路
     print("\n=== AI 分析思路 ===")
@@ -3,6 +3,6 @@ prompt模板包
 包含各种用于生成分析报告的prompt模板
 """
 
-from .technical_analysis import get_technical_analysis_prompt
+from .technical_analysis import get_technical_analysis_prompt, TECHNICAL_ANALYSIS_INSTRUCTION
 
-__all__ = ['get_technical_analysis_prompt'] 
\ No newline at end of file
+__all__ = ['get_technical_analysis_prompt', 'TECHNICAL_ANALYSIS_INSTRUCTION'] 
\ No newline at end of file
@@ -4,6 +4,9 @@
 
 from typing import Dict, Any
 
+# 均线列名的固定前缀（如ma_qfq_20），去掉前缀即为均线天数
+_MA_PREFIX_LEN = len('ma_qfq_')
+
 def get_ma_system_analysis_prompt(analysis_results: Dict[str, Any]) -> str:
     """
     生成均线系统分析的prompt模板
@@ -116,18 +119,17 @@ def _format_short_term_details(short_term: Dict[str, Any]) -> str:
     # 添加均线交叉信号
     if short_term['cross_signals']:
         details.append("均线交叉信号：")
-        for signal in short_term['cross_signals']:
-            short_ma = signal['short_ma'].replace('ma_qfq_', '')
-            long_ma = signal['long_ma'].replace('ma_qfq_', '')
-            signal_type = "金叉" if signal['type'] == 'golden_cross' else "死叉"
-            details.append(f"  - {short_ma}日线与{long_ma}日线形成{signal['strength']}{signal_type}")
+        details.extend(
+            f"  - {signal['short_ma'][_MA_PREFIX_LEN:]}日线与{signal['long_ma'][_MA_PREFIX_LEN:]}日线"
+            f"形成{signal['strength']}{'金叉' if signal['type'] == 'golden_cross' else '死叉'}"
+            for signal in short_term['cross_signals']
+        )
     
     # 添加拐点信号
     if short_term['turning_signals']:
         details.append("\n拐点信号：")
-        for ma, info in short_term['turning_signals'].items():
-            ma_days = ma.replace('ma_qfq_', '')
-            details.append(f"  - {ma_days}日均线{info['type']}")
+        details.extend(f"  - {ma[_MA_PREFIX_LEN:]}日均线{info['type']}"
+                       for ma, info in short_term['turning_signals'].items())
     
     # 添加突破信号
     if short_term['breakthrough']['type'] != 'no_breakthrough':
@@ -162,16 +164,16 @@ def _format_support_resistance(sr_data: Dict[str, Any]) -> str:
     # 添加支撑位信息
     if sr_data['support_levels']:
         details.append("支撑位：")
-        for level in sr_data['support_levels'][:3]:  # 只显示前3个支撑位
-            ma_days = level['ma'].replace('ma_qfq_', '')
-            details.append(f"  - {ma_days}日均线：{level['value']:.2f}")
+        # 只显示前3个支撑位
+        details.extend(f"  - {level['ma'][_MA_PREFIX_LEN:]}日均线：{level['value']:.2f}"
+                       for level in sr_data['support_levels'][:3])
     
     # 添加阻力位信息
     if sr_data['resistance_levels']:
         details.append("\n阻力位：")
-        for level in sr_data['resistance_levels'][:3]:  # 只显示前3个阻力位
-            ma_days = level['ma'].replace('ma_qfq_', '')
-            details.append(f"  - {ma_days}日均线：{level['value']:.2f}")
+        # 只显示前3个阻力位
+        details.extend(f"  - {level['ma'][_MA_PREFIX_LEN:]}日均线：{level['value']:.2f}"
+                       for level in sr_data['resistance_levels'][:3])
     
     # 添加当前价格信息
     details.append(f"\n当前价格：{sr_data['current_price']:.2f}")
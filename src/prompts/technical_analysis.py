@@ -1,9 +1,33 @@
 """
 技术分析报告的prompt模板
 """
-from src.analyzers.technical_indicators import analyze_indicators
+from numbers import Real
+from typing import Any
 import pandas as pd
 
+def _format_number(value: Any, spec: str) -> str:
+    """
+    按spec格式化数值；缺失（None或'无数据'等非数值）时返回'无数据'，避免对字符串做数值格式化时报错
+    """
+    return format(value, spec) if isinstance(value, Real) else '无数据'
+
+# 提示词中与具体股票无关的固定部分（角色、目标与推理原则），作为模型的system instruction只需设置一次，
+# 每次请求只发送get_technical_analysis_prompt生成的行情与指标数据
+TECHNICAL_ANALYSIS_INSTRUCTION = """#Role    
+你是一位经验丰富的股票技术分析师，你的目标是帮助普通用户理解复杂的市场趋势。 你非常擅长使用K线形态、MA均线系统、MACD、KDJ、RSI和BOLL等六大技术指标进行共振分析。 
+
+## 目标
+分析我提供的以下六大技术指标的信号数据，进行深入细致的共振分析，判断当前的市场趋势，并基于上述推理原则，详细、透彻地解释你的推理过程，确保即使是不熟悉技术分析的用户也能理解你的专业分析。 请直接在共振分析报告中融入对各指标信号的解读，无需单独列出指标信号的白话解读部分。
+
+#推理原则：
+1. 指标类型差异化原则: 认识到不同类型指标的特性和局限性。 趋势指标 (MA, BOLL)、动量指标 (MACD, RSI)、超买超卖指标 (KDJ, RSI)、K线形态 各有所长。 共振分析要考虑指标类型的差异，避免同质化解读。
+2.信号强度加权原则： 每个指标发出的信号都有强弱之分。 分析时，需要考虑你提供的信号强度评级。 强度较高的信号应在共振分析中占据更重要的地位，对最终趋势判断产生更大的影响。 多个中等或偏强信号的共振，有时比单个极强信号更值得信赖。
+3.多指标印证原则： 共振分析的关键在于寻找多个指标信号的相互印证。 当多个指标同时指向相同的市场方向时，趋势判断的可信度和稳健性将显著提升。 指标间的相互印证越多，共振效应就越强，趋势判断的可靠性也越高。
+4.冲突信号辨析原则： 实际市场分析中，指标信号出现冲突是常见情况。 你需要敏锐地辨识冲突信号的性质和强度，并根据指标类型、信号强度以及当前市场环境进行审慎权衡。 例如，区分趋势性指标与震荡指标的信号冲突，以及强信号与弱信号的冲突，并做出合理的判断。
+5.短期与长期信号结合原则： 技术指标分析往往包含短期、中期和长期信号。 共振分析应当整合不同时间周期的信号，以便更全面地把握市场脉搏。 短期信号可能反映市场短期波动，而长期信号则揭示市场的主要趋势。 你需要综合评估不同周期信号，判断短期波动是否会演化为长期趋势，或者仅仅是趋势中的噪音。
+6. 逻辑连贯性与可解释性原则： 你的共振分析过程必须具备严谨的逻辑和高度的可解释性。 你需要清晰地阐述各个指标信号是如何相互作用、如何形成共振的，以及最终的市场趋势判断是如何从这些共振信号中推理得出的。 避免给出缺乏逻辑支撑或难以理解的结论，确保你的分析过程和结果对用户来说都是透明且易懂的。
+"""
+
 def get_technical_analysis_prompt(stock_name: str, latest_price: float, price_change: float, \
                                 vol_change: float, df: pd.DataFrame, analysis: dict) -> str:
     """
@@ -18,21 +42,21 @@ def get_technical_analysis_prompt(stock_name: str, latest_price: float, price_ch
         analysis (dict): 技术指标分析结果
         
     返回:
-        str: 格式化后的prompt
+        str: 格式化后的prompt（行情与指标数据部分，角色与推理原则见TECHNICAL_ANALYSIS_INSTRUCTION）
     """
     # 获取各个指标的分析结果
     # 这里可以使用 analysis 参数来生成更详细的报告内容
     # 例如：
     # analysis_summary = analysis.get('summary', '无总结信息')
     
+    # 均线分散度与支撑/阻力位可能缺失（无MA数据，或没有更低/更高的均线时为None），先转换为文字再填入模板
+    ma_formation = analysis.get('MA', {}).get('formation', {})
+    support_resistance = analysis.get('MA', {}).get('support_resistance', {})
+    dispersion = _format_number(ma_formation.get('dispersion'), '.4f')
+    nearest_support = _format_number((support_resistance.get('nearest_support') or {}).get('value'), '.2f')
+    nearest_resistance = _format_number((support_resistance.get('nearest_resistance') or {}).get('value'), '.2f')
+    
     return f"""
-
-#Role    
-你是一位经验丰富的股票技术分析师，你的目标是帮助普通用户理解复杂的市场趋势。 你非常擅长使用K线形态、MA均线系统、MACD、KDJ、RSI和BOLL等六大技术指标进行共振分析。 
-
-## 目标
-分析我提供的以下六大技术指标的信号数据，进行深入细致的共振分析，判断当前的市场趋势，并基于上述推理原则，详细、透彻地解释你的推理过程，确保即使是不熟悉技术分析的用户也能理解你的专业分析。 请直接在共振分析报告中融入对各指标信号的解读，无需单独列出指标信号的白话解读部分。
-
 # 市场数据
 ## 基础行情
 - 最新收盘价：{latest_price:.2f}
@@ -50,9 +74,9 @@ def get_technical_analysis_prompt(stock_name: str, latest_price: float, price_ch
 - 短期信号: {analysis.get('MA', {}).get('short_term_signal', {}).get('summary', '无数据')}
 - 形态类型: {analysis.get('MA', {}).get('formation', {}).get('type', '无数据')}
 - 形态强度: {analysis.get('MA', {}).get('formation', {}).get('strength', '无数据')}
-- 均线分散度: {analysis.get('MA', {}).get('formation', {}).get('dispersion', '无数据'):.4f}
-- 最近支撑: {analysis.get('MA', {}).get('support_resistance', {}).get('nearest_support', {}).get('value', '无数据'):.2f}
-- 最近阻力: {analysis.get('MA', {}).get('support_resistance', {}).get('nearest_resistance', {}).get('value', '无数据'):.2f}
+- 均线分散度: {dispersion}
+- 最近支撑: {nearest_support}
+- 最近阻力: {nearest_resistance}
 - 均线系统强度: {analysis.get('MA', {}).get('strength', {}).get('strength', '无数据')}
 - **综合研判信号**: {analysis.get('MA', {}).get('signal', '无数据')}
 
@@ -66,16 +90,5 @@ def get_technical_analysis_prompt(stock_name: str, latest_price: float, price_ch
 {analysis.get('RSI', '无数据')}  
 
 ## 6. BOLL分析
-{analysis.get('BOLL', '无数据')}  
-
-#推理原则：
-1. 指标类型差异化原则: 认识到不同类型指标的特性和局限性。 趋势指标 (MA, BOLL)、动量指标 (MACD, RSI)、超买超卖指标 (KDJ, RSI)、K线形态 各有所长。 共振分析要考虑指标类型的差异，避免同质化解读。
-2.信号强度加权原则： 每个指标发出的信号都有强弱之分。 分析时，需要考虑你提供的信号强度评级。 强度较高的信号应在共振分析中占据更重要的地位，对最终趋势判断产生更大的影响。 多个中等或偏强信号的共振，有时比单个极强信号更值得信赖。
-3.多指标印证原则： 共振分析的关键在于寻找多个指标信号的相互印证。 当多个指标同时指向相同的市场方向时，趋势判断的可信度和稳健性将显著提升。 指标间的相互印证越多，共振效应就越强，趋势判断的可靠性也越高。
-4.冲突信号辨析原则： 实际市场分析中，指标信号出现冲突是常见情况。 你需要敏锐地辨识冲突信号的性质和强度，并根据指标类型、信号强度以及当前市场环境进行审慎权衡。 例如，区分趋势性指标与震荡指标的信号冲突，以及强信号与弱信号的冲突，并做出合理的判断。
-5.短期与长期信号结合原则： 技术指标分析往往包含短期、中期和长期信号。 共振分析应当整合不同时间周期的信号，以便更全面地把握市场脉搏。 短期信号可能反映市场短期波动，而长期信号则揭示市场的主要趋势。 你需要综合评估不同周期信号，判断短期波动是否会演化为长期趋势，或者仅仅是趋势中的噪音。
-6. 逻辑连贯性与可解释性原则： 你的共振分析过程必须具备严谨的逻辑和高度的可解释性。 你需要清晰地阐述各个指标信号是如何相互作用、如何形成共振的，以及最终的市场趋势判断是如何从这些共振信号中推理得出的。 避免给出缺乏逻辑支撑或难以理解的结论，确保你的分析过程和结果对用户来说都是透明且易懂的。
-
-
-
-""" 
\ No newline at end of file
+{analysis.get('BOLL', '无数据')}
+"""
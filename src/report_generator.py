@@ -2,11 +2,15 @@
 报告生成模块 - 使用 Google Gemini API 生成技术分析报告
 """
 import os
-from typing import Dict, Any
+import hashlib
+from pathlib import Path
+from typing import Dict, Any, Iterable, Optional
+import time
 import google.generativeai as genai
+from google.api_core.exceptions import ResourceExhausted, ServiceUnavailable
 from dotenv import load_dotenv
 from datetime import datetime
-from src.prompts.technical_analysis import get_technical_analysis_prompt
+from src.prompts.technical_analysis import get_technical_analysis_prompt, TECHNICAL_ANALYSIS_INSTRUCTION
 from src.prompts.indicators import (
     get_macd_analysis_prompt,
     get_kdj_analysis_prompt,
@@ -15,16 +19,110 @@ from src.prompts.indicators import (
     get_ma_system_analysis_prompt
 )
 
+def _build_macd_prompt(analysis: Dict[str, Any]) -> str:
+    """生成MACD指标的prompt"""
+    return get_macd_analysis_prompt(
+        dif=analysis['MACD']['DIF'],
+        dea=analysis['MACD']['DEA'],
+        macd=analysis['MACD']['MACD'],
+        long_term_trend=analysis['MACD']['long_term_trend'],
+        medium_term_trend=analysis['MACD']['medium_term_trend'],
+        short_term_signal=analysis['MACD']['short_term_signal'],
+        divergence=analysis['MACD']['divergence'],
+        strength=analysis['MACD']['strength'],
+        signal=analysis['MACD']['signal']
+    )
+
+def _build_kdj_prompt(analysis: Dict[str, Any]) -> str:
+    """生成KDJ指标的prompt"""
+    return get_kdj_analysis_prompt(
+        k_value=analysis['KDJ']['K'],
+        d_value=analysis['KDJ']['D'],
+        j_value=analysis['KDJ']['J'],
+        analysis_result={
+            'long_term_trend': analysis['KDJ']['long_term_trend'],
+            'medium_term_trend': analysis['KDJ']['medium_term_trend'],
+            'short_term_trend': analysis['KDJ']['short_term_trend'],
+            'cross_pattern': analysis['KDJ']['cross_pattern'],
+            'divergence': analysis['KDJ']['divergence'],
+            'strength': analysis['KDJ']['strength'],
+            'pattern': analysis['KDJ']['pattern'],
+            'signal': analysis['KDJ']['signal']
+        }
+    )
+
+def _build_rsi_prompt(analysis: Dict[str, Any]) -> str:
+    """生成RSI指标的prompt"""
+    return get_rsi_analysis_prompt(
+        rsi6=analysis['RSI']['RSI6'],
+        rsi12=analysis['RSI']['RSI12'],
+        rsi24=analysis['RSI']['RSI24'],
+        long_term_trend=analysis['RSI']['long_term_trend'],
+        medium_term_trend=analysis['RSI']['medium_term_trend'],
+        short_term_signal=analysis['RSI']['short_term_signal'],
+        divergence=analysis['RSI']['divergence'],
+        strength=analysis['RSI']['strength'],
+        pattern=analysis['RSI']['pattern'],
+        signal=analysis['RSI']['signal']
+    )
+
+def _build_boll_prompt(analysis: Dict[str, Any]) -> str:
+    """生成BOLL指标的prompt"""
+    return get_boll_analysis_prompt(
+        upper=analysis['BOLL']['UPPER'],
+        mid=analysis['BOLL']['MID'],
+        lower=analysis['BOLL']['LOWER'],
+        long_term_trend=analysis['BOLL']['long_term_trend'],
+        medium_term_trend=analysis['BOLL']['medium_term_trend'],
+        short_term_signal=analysis['BOLL']['short_term_signal'],
+        bandwidth=analysis['BOLL']['bandwidth'],
+        pattern=analysis['BOLL']['pattern'],
+        strength=analysis['BOLL']['strength'],
+        signal=analysis['BOLL']['signal']
+    )
+
+def _build_ma_prompt(analysis: Dict[str, Any]) -> str:
+    """生成MA系统的prompt"""
+    return get_ma_system_analysis_prompt(
+        analysis_results={
+            'ma_values': analysis['MA']['ma_values'],
+            'long_term_trend': analysis['MA']['signals']['long_term_trend'],
+            'medium_term_trend': analysis['MA']['signals']['medium_term_trend'],
+            'short_term_signal': analysis['MA']['signals']['short_term_signal'],
+            'formation': analysis['MA']['signals']['formation'],
+            'strength': analysis['MA']['signals']['strength'],
+            'support_resistance': analysis['MA']['signals']['support_resistance'],
+            'signal': analysis['MA']['signals']['signal']
+        }
+    )
+
+# 请求被限流（429）或服务暂时不可用（503）时的最大尝试次数，两次尝试之间按指数退避等待，最长30秒
+_MAX_ATTEMPTS = 5
+
+# 技术指标名称到prompt生成函数的映射
+_INDICATOR_PROMPT_BUILDERS = {
+    'MACD': _build_macd_prompt,
+    'KDJ': _build_kdj_prompt,
+    'RSI': _build_rsi_prompt,
+    'BOLL': _build_boll_prompt,
+    'MA': _build_ma_prompt
+}
+
 class ReportGenerator:
-    def __init__(self, output_dir: str = "analysis_reports"):
+    def __init__(self, output_dir: str = "analysis_reports", cache_dir=None):
         """
         初始化报告生成器
         
         参数:
             output_dir (str): 报告输出目录
+            cache_dir (str | Path): 模型回复的磁盘缓存目录（如'.cache/llm'），为None时不使用缓存；
+                以模型名称与完整prompt的sha256为键，相同的分析重复生成报告时不再请求API
         """
         self.output_dir = output_dir
         self.current_report_dir = None  # 添加当前报告目录的引用
+        self.cache_dir = Path(cache_dir) if cache_dir is not None else None
+        if self.cache_dir is not None:
+            self.cache_dir.mkdir(parents=True, exist_ok=True)
         load_dotenv()
         
         # 创建 Gemini API client
@@ -35,31 +133,50 @@ class ReportGenerator:
         # 初始化 Gemini client
         genai.configure(api_key=api_key)
         
+        # 单指标报告使用的模型
+        self.model = self._create_model()
+        # 综合报告使用的模型：固定的角色与推理原则作为system instruction只设置一次，
+        # 每次请求只发送行情与指标数据
+        self.analysis_model = self._create_model(system_instruction=TECHNICAL_ANALYSIS_INSTRUCTION)
+
+    @staticmethod
+    def _create_model(system_instruction: Optional[str] = None) -> genai.GenerativeModel:
+        """
+        创建 Gemini 模型，实验性模型不可用时回退到标准模型
+        
+        参数:
+            system_instruction (str, optional): 模型的system instruction
+            
+        返回:
+            genai.GenerativeModel: 配置好的模型
+        """
         try:
             # 配置 Gemini 2.0 Flash Thinking 模型
-            self.model = genai.GenerativeModel(
+            return genai.GenerativeModel(
                 model_name='gemini-2.0-flash-thinking-exp',  # 使用 Flash Thinking 实验性模型
                 generation_config={
                     'temperature': 0.9,  # 保持较高的创造性
                     'top_p': 0.9,
                     'top_k': 40,
                     'max_output_tokens': 8192,  # 允许生成更长的分析报告
-                }
+                },
+                system_instruction=system_instruction
             )
         except Exception as e:
             print(f"警告：Flash Thinking 模型初始化失败，将使用默认模型: {str(e)}")
             # 如果实验性模型不可用，回退到标准模型
-            self.model = genai.GenerativeModel(
+            return genai.GenerativeModel(
                 model_name='gemini-pro',
                 generation_config={
                     'temperature': 0.9,
                     'top_p': 0.9,
                     'top_k': 40,
                     'max_output_tokens': 8192,
-                }
+                },
+                system_instruction=system_instruction
             )
 
-    def generate_report(self, stock_name: str, analysis: dict, df) -> Dict[str, str]:
+    def generate_report(self, stock_name: str, analysis: dict, df, bypass_cache: bool = False) -> Dict[str, str]:
         """
         生成技术分析报告
         
@@ -67,14 +184,14 @@ class ReportGenerator:
             stock_name (str): 股票名称
             analysis (dict): 技术指标分析结果
             df: 原始数据DataFrame
+            bypass_cache (bool): 为True时忽略已缓存的回复，重新请求API（新的回复仍会写入缓存）
             
         返回:
             Dict[str, str]: 包含思维过程和分析结果的字典
         """
-        # 准备提示信息
-        latest_price = df.iloc[-1]['close']
-        price_change = df.iloc[-1]['pct_change']
-        vol_change = ((df.iloc[-1]['vol'] - df.iloc[-2]['vol']) / df.iloc[-2]['vol']) * 100
+        # 准备提示信息：只取用到的列的最近两天，避免df.iloc[-1]把整行各列拼成object类型的Series
+        (_, _, prev_vol), (latest_price, price_change, latest_vol) = df[['close', 'pct_change', 'vol']].to_numpy()[-2:]
+        vol_change = ((latest_vol - prev_vol) / prev_vol) * 100
         
 
         # 使用prompt模板生成提示信息
@@ -91,16 +208,25 @@ class ReportGenerator:
         print(prompt)
 
         try:
-            # 调用API生成报告
-            response = self.model.generate_content(prompt)
+            cache_key = self._cache_key(self.analysis_model.model_name, TECHNICAL_ANALYSIS_INSTRUCTION,
+                                        stock_name, prompt)
+            cached = None if bypass_cache else self._load_cached(cache_key)
+            if cached is not None:
+                chunks = [cached]
+            else:
+                # 调用API生成报告，以流式方式接收，边生成边写入文件
+                response = self._generate_content(self.analysis_model, prompt, stream=True)
+                chunks = (chunk.text for chunk in response)
             
             # 创建并保存报告目录的引用
             self.current_report_dir = self._create_report_directory(stock_name)
-            self._save_report(response.text, self.current_report_dir)
+            report = self._save_report(chunks, self.current_report_dir)
+            if cached is None:
+                self._store_cached(cache_key, report)
             
             return {
                 "thoughts": "基于多维度技术指标的综合分析完成",
-                "analysis": response.text
+                "analysis": report
             }
             
         except Exception as e:
@@ -110,6 +236,46 @@ class ReportGenerator:
                 "analysis": error_msg
             }
 
+    @staticmethod
+    def _generate_content(model: genai.GenerativeModel, prompt: str, **kwargs):
+        """调用模型生成内容，被限流或服务暂时不可用时按指数退避重试"""
+        for attempt in range(_MAX_ATTEMPTS):
+            try:
+                return model.generate_content(prompt, **kwargs)
+            except (ResourceExhausted, ServiceUnavailable) as e:
+                if attempt == _MAX_ATTEMPTS - 1:
+                    raise
+                delay = min(2 ** attempt, 30)
+                print(f"请求受限，{delay}秒后重试: {str(e)}")
+                time.sleep(delay)
+
+    @staticmethod
+    def _cache_key(*parts: str) -> str:
+        """由模型名称与prompt各部分计算缓存键（sha256）"""
+        digest = hashlib.sha256()
+        for part in parts:
+            digest.update(part.encode('utf-8'))
+            digest.update(b'\0')
+        return digest.hexdigest()
+
+    def _load_cached(self, key: str) -> Optional[str]:
+        """读取缓存的模型回复，未启用缓存或未命中时返回None"""
+        if self.cache_dir is None:
+            return None
+        try:
+            return (self.cache_dir / f"{key}.md").read_text(encoding='utf-8')
+        except FileNotFoundError:
+            return None
+
+    def _store_cached(self, key: str, text: str):
+        """启用缓存时写入模型回复"""
+        if self.cache_dir is None:
+            return
+        try:
+            (self.cache_dir / f"{key}.md").write_text(text, encoding='utf-8')
+        except Exception as e:
+            print(f"写入缓存失败: {str(e)}")
+
     def _create_report_directory(self, stock_name: str) -> str:
         """创建报告保存目录"""
         current_time = datetime.now().strftime("%Y%m%d_%H%M%S")
@@ -117,17 +283,31 @@ class ReportGenerator:
         os.makedirs(report_dir, exist_ok=True)
         return report_dir
 
-    def _save_report(self, report: str, report_dir: str):
-        """保存报告为Markdown格式"""
+    def _save_report(self, chunks: Iterable[str], report_dir: str) -> str:
+        """保存报告为Markdown格式：逐段写入收到的报告文本，返回完整的报告内容"""
         filepath = os.path.join(report_dir, "technical_analysis.md")
-        with open(filepath, "w", encoding="utf-8") as f:
-            f.write("# 技术分析报告\n\n")
-            f.write(report)
+        # 先写入临时文件，全部接收完成后再替换为正式文件，中途出错时不留下不完整的报告
+        partial_path = filepath + ".part"
+        parts = []
+        try:
+            with open(partial_path, "w", encoding="utf-8") as f:
+                f.write("# 技术分析报告\n\n")
+                for chunk in chunks:
+                    f.write(chunk)
+                    f.flush()
+                    parts.append(chunk)
+            os.replace(partial_path, filepath)
+        except BaseException:
+            if os.path.exists(partial_path):
+                os.remove(partial_path)
+            raise
         print(f"\n详细分析报告已保存到: {filepath}")
+        return ''.join(parts)
 
     def generate_indicator_report(self, stock_name: str, indicator_name: str, 
                                 latest_price: float, price_change: float, 
-                                vol_change: float, analysis: Dict[str, Any]) -> str:
+                                vol_change: float, analysis: Dict[str, Any],
+                                bypass_cache: bool = False, generated_at: Optional[str] = None) -> str:
         """
         生成单个技术指标的分析报告
         
@@ -138,86 +318,24 @@ class ReportGenerator:
             price_change (float): 涨跌幅
             vol_change (float): 成交量变化
             analysis (dict): 技术指标分析结果
+            bypass_cache (bool): 为True时忽略已缓存的回复，重新请求API（新的回复仍会写入缓存）
+            generated_at (str, optional): 报告标题中的生成时间，同一只股票的各指标报告可传入同一时间，
+                为None时取当前时间
             
         返回:
             str: 生成的报告内容
         """
-        indicator_prompts = {
-            'MACD': lambda: get_macd_analysis_prompt(
-                dif=analysis['MACD']['DIF'],
-                dea=analysis['MACD']['DEA'],
-                macd=analysis['MACD']['MACD'],
-                long_term_trend=analysis['MACD']['long_term_trend'],
-                medium_term_trend=analysis['MACD']['medium_term_trend'],
-                short_term_signal=analysis['MACD']['short_term_signal'],
-                divergence=analysis['MACD']['divergence'],
-                strength=analysis['MACD']['strength'],
-                signal=analysis['MACD']['signal']
-            ),
-            'KDJ': lambda: get_kdj_analysis_prompt(
-                k_value=analysis['KDJ']['K'],
-                d_value=analysis['KDJ']['D'],
-                j_value=analysis['KDJ']['J'],
-                analysis_result={
-                    'long_term_trend': analysis['KDJ']['long_term_trend'],
-                    'medium_term_trend': analysis['KDJ']['medium_term_trend'],
-                    'short_term_trend': analysis['KDJ']['short_term_trend'],
-                    'cross_pattern': analysis['KDJ']['cross_pattern'],
-                    'divergence': analysis['KDJ']['divergence'],
-                    'strength': analysis['KDJ']['strength'],
-                    'pattern': analysis['KDJ']['pattern'],
-                    'signal': analysis['KDJ']['signal']
-                }
-            ),
-            'RSI': lambda: get_rsi_analysis_prompt(
-                rsi6=analysis['RSI']['RSI6'],
-                rsi12=analysis['RSI']['RSI12'],
-                rsi24=analysis['RSI']['RSI24'],
-                long_term_trend=analysis['RSI']['long_term_trend'],
-                medium_term_trend=analysis['RSI']['medium_term_trend'],
-                short_term_signal=analysis['RSI']['short_term_signal'],
-                divergence=analysis['RSI']['divergence'],
-                strength=analysis['RSI']['strength'],
-                pattern=analysis['RSI']['pattern'],
-                signal=analysis['RSI']['signal']
-            ),
-            'BOLL': lambda: get_boll_analysis_prompt(
-                upper=analysis['BOLL']['UPPER'],
-                mid=analysis['BOLL']['MID'],
-                lower=analysis['BOLL']['LOWER'],
-                long_term_trend=analysis['BOLL']['long_term_trend'],
-                medium_term_trend=analysis['BOLL']['medium_term_trend'],
-                short_term_signal=analysis['BOLL']['short_term_signal'],
-                bandwidth=analysis['BOLL']['bandwidth'],
-                pattern=analysis['BOLL']['pattern'],
-                strength=analysis['BOLL']['strength'],
-                signal=analysis['BOLL']['signal']
-            ),
-            'MA': lambda: get_ma_system_analysis_prompt(
-                analysis_results={
-                    'ma_values': analysis['MA']['ma_values'],
-                    'long_term_trend': analysis['MA']['signals']['long_term_trend'],
-                    'medium_term_trend': analysis['MA']['signals']['medium_term_trend'],
-                    'short_term_signal': analysis['MA']['signals']['short_term_signal'],
-                    'formation': analysis['MA']['signals']['formation'],
-                    'strength': analysis['MA']['signals']['strength'],
-                    'support_resistance': analysis['MA']['signals']['support_resistance'],
-                    'signal': analysis['MA']['signals']['signal']
-                }
-            )
-        }
-        
-        if indicator_name not in indicator_prompts:
+        if generated_at is None:
+            generated_at = datetime.now().strftime('%Y-%m-%d %H:%M:%S')
+        builder = _INDICATOR_PROMPT_BUILDERS.get(indicator_name)
+        if builder is None:
             raise ValueError(f"不支持的技术指标: {indicator_name}")
             
         # 获取指标的prompt
-        indicator_prompt = indicator_prompts[indicator_name]()
+        indicator_prompt = builder(analysis)
         
-        # 构建完整的报告模板
-        report_template = f"""
-# {stock_name} - {indicator_name}技术指标分析报告
-生成时间：{datetime.now().strftime('%Y-%m-%d %H:%M:%S')}
-
+        # 构建完整的报告模板；生成时间每次都不同，缓存键只取其余部分
+        report_body = f"""
 ## 市场数据
 - 最新收盘价：{latest_price:.2f}
 - 涨跌幅：{price_change:.2f}%
@@ -225,15 +343,25 @@ class ReportGenerator:
 
 {indicator_prompt}
 """
+        report_template = f"""
+# {stock_name} - {indicator_name}技术指标分析报告
+生成时间：{generated_at}
+{report_body}"""
         try:
+            cache_key = self._cache_key(self.model.model_name, stock_name, indicator_name, report_body)
+            cached = None if bypass_cache else self._load_cached(cache_key)
+            if cached is not None:
+                return cached
+            
             # 调用Gemini API生成分析报告
-            response = self.model.generate_content(report_template)
+            response = self._generate_content(self.model, report_template)
+            self._store_cached(cache_key, response.text)
             return response.text
         except Exception as e:
             error_msg = f"生成{indicator_name}指标报告时发生错误: {str(e)}"
             return f"""
 # {stock_name} - {indicator_name}技术指标分析报告
-生成时间：{datetime.now().strftime('%Y-%m-%d %H:%M:%S')}
+生成时间：{generated_at}
 
 ## 错误信息
 {error_msg}
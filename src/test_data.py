@@ -38,8 +38,11 @@ def save_data_to_csv(df, stock_code):
         print(f"保存数据时发生错误: {e}")
 
 def visualize_data(df):
+    # 先取出为数组再绘图，matplotlib不必逐列再转换pandas对象
+    dates = df['date'].to_numpy()
+    close = df['close'].to_numpy()
     plt.figure(figsize=(10, 5))
-    plt.plot(df['date'], df['close'], label='收盘价', color='blue')
+    plt.plot(dates, close, label='收盘价', color='blue')
     plt.title('股票收盘价变化')
     plt.xlabel('日期')
     plt.ylabel('价格')
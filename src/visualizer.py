@@ -3,229 +3,221 @@
 """
 import plotly.graph_objects as go
 from plotly.subplots import make_subplots
+import numpy as np
 import pandas as pd
 from typing import List
 
+# MA均线系统：(数据列, 图例名称, 颜色)
+_MA_LINES = (
+    ('ma_qfq_5', 'MA5', '#FF9900'),      # 橙色
+    ('ma_qfq_10', 'MA10', '#0066CC'),    # 蓝色
+    ('ma_qfq_20', 'MA20', '#9933CC'),    # 紫色
+    ('ma_qfq_30', 'MA30', '#FF3366'),    # 粉红
+    ('ma_qfq_60', 'MA60', '#666666'),    # 深灰
+    ('ma_qfq_90', 'MA90', '#003366'),    # 深蓝
+    ('ma_qfq_250', 'MA250', '#333333')   # 黑色
+)
+
+def _build_figure_template() -> go.Figure:
+    """
+    构建与数据无关的图表骨架：子图布局、固定的布局参数与RSI参考线
+    """
+    # 创建子图
+    fig = make_subplots(
+        rows=4, cols=1,
+        shared_xaxes=True,
+        vertical_spacing=0.05,
+        subplot_titles=('K线图 & BOLL & MA', 'MACD', 'KDJ', 'RSI'),
+        row_heights=[0.4, 0.2, 0.2, 0.2]
+    )
+
+    # 更新布局
+    fig.update_layout(
+        xaxis_title='日期',
+        height=1200,
+        showlegend=True,
+        template='plotly_white',
+        barmode='overlay',  # 确保柱状图可以叠加
+        bargap=0,  # 移除柱状图间距
+        legend=dict(
+            orientation="h",
+            yanchor="bottom",
+            y=1.02,
+            xanchor="right",
+            x=1
+        )
+    )
+
+    # 添加RSI参考线（此时子图中还没有数据，需关闭exclude_empty_subplots，否则参考线会被跳过）
+    fig.add_hline(y=80, line_dash="dash", line_color="red", row=4, col=1, exclude_empty_subplots=False)
+    fig.add_hline(y=20, line_dash="dash", line_color="green", row=4, col=1, exclude_empty_subplots=False)
+    return fig
+
+# 图表骨架只构建一次，每次绘图复制后再添加数据
+_FIGURE_TEMPLATE = _build_figure_template()
+
+# 开启抽样时，超过该天数的历史数据按周聚合后再绘图
+_DECIMATE_THRESHOLD = 500
+
+def _decimate_weekly(df: pd.DataFrame, threshold: int = _DECIMATE_THRESHOLD) -> pd.DataFrame:
+    """
+    数据超过threshold天时按自然周聚合：开盘价取周内第一天，最高/最低价取周内极值，
+    其余各列（收盘价、均线、指标与日期）取周内最后一个交易日的值；未超过时原样返回
+    """
+    if len(df) <= threshold:
+        return df
+    weeks = pd.to_datetime(df['trade_date'], format='%Y%m%d').dt.to_period('W')
+    aggregations = dict.fromkeys(df.columns, 'last')
+    aggregations.update(open='first', high='max', low='min')
+    return df.groupby(weeks.to_numpy(), sort=False).agg(aggregations).reset_index(drop=True)
+
 class TechnicalVisualizer:
     @staticmethod
-    def plot_indicators(df: pd.DataFrame, stock_name: str) -> go.Figure:
+    def plot_indicators(df: pd.DataFrame, stock_name: str, decimate: bool = False) -> go.Figure:
         """
         绘制技术指标图表
         
         参数:
             df (pd.DataFrame): 包含技术指标的DataFrame
             stock_name (str): 股票名称
+            decimate (bool): 为True且数据超过500天时按周聚合后绘图，减小长历史图表的体积
             
         返回:
             go.Figure: Plotly图表对象
         """
-        # 创建子图
-        fig = make_subplots(
-            rows=4, cols=1,
-            shared_xaxes=True,
-            vertical_spacing=0.05,
-            subplot_titles=('K线图 & BOLL & MA', 'MACD', 'KDJ', 'RSI'),
-            row_heights=[0.4, 0.2, 0.2, 0.2]
-        )
+        if decimate:
+            df = _decimate_weekly(df)
+
+        # 绘图只需单精度：浮点列转换为float32（astype返回副本，不修改传入的df），
+        # 图表中的数值数组按二进制编码写入，图表数据体积明显减小
+        float_columns = df.select_dtypes(include='float64').columns
+        df = df.astype(dict.fromkeys(float_columns, np.float32))
+
+        # 复制预先构建的图表骨架，不再每次重建子图与固定布局
+        fig = go.Figure(_FIGURE_TEMPLATE)
+        fig.layout.title.text = f'{stock_name} 技术指标分析'
+
+        # 日期只转换一次为数组，所有曲线共用
+        dates = df['trade_date'].to_numpy()
 
-        # 添加K线图
-        fig.add_trace(
+        # 分别创建正值和负值的MACD柱状图：在数组上按符号一次取值，另一侧为NaN（不绘制）
+        macd = df['macd'].to_numpy()
+        positive_macd = np.where(macd > 0, macd, np.nan)
+        negative_macd = np.where(macd <= 0, macd, np.nan)
+
+        # 第1行：K线图、MA均线系统与BOLL线
+        price_traces = [
             go.Candlestick(
-                x=df['trade_date'],
-                open=df['open'],
-                high=df['high'],
-                low=df['low'],
-                close=df['close'],
+                x=dates,
+                open=df['open'].to_numpy(),
+                high=df['high'].to_numpy(),
+                low=df['low'].to_numpy(),
+                close=df['close'].to_numpy(),
                 name='K线',
                 increasing_line_color='red',  # 阳线为红色
                 decreasing_line_color='green'  # 阴线为绿色
-            ),
-            row=1, col=1
+            )
+        ]
+        price_traces.extend(
+            go.Scatter(
+                x=dates,
+                y=df[ma_col],
+                name=ma_name,
+                line=dict(color=color, width=1)
+            )
+            for ma_col, ma_name, color in _MA_LINES
+            if ma_col in df.columns  # 确保数据列存在
         )
-
-        # 添加MA均线系统
-        ma_colors = {
-            'ma_qfq_5': '#FF9900',    # 橙色
-            'ma_qfq_10': '#0066CC',   # 蓝色
-            'ma_qfq_20': '#9933CC',   # 紫色
-            'ma_qfq_30': '#FF3366',   # 粉红
-            'ma_qfq_60': '#666666',   # 深灰
-            'ma_qfq_90': '#003366',   # 深蓝
-            'ma_qfq_250': '#333333'   # 黑色
-        }
-        
-        ma_names = {
-            'ma_qfq_5': 'MA5',
-            'ma_qfq_10': 'MA10',
-            'ma_qfq_20': 'MA20',
-            'ma_qfq_30': 'MA30',
-            'ma_qfq_60': 'MA60',
-            'ma_qfq_90': 'MA90',
-            'ma_qfq_250': 'MA250'
-        }
-
-        for ma_col, color in ma_colors.items():
-            if ma_col in df.columns:  # 确保数据列存在
-                fig.add_trace(
-                    go.Scatter(
-                        x=df['trade_date'],
-                        y=df[ma_col],
-                        name=ma_names[ma_col],
-                        line=dict(color=color, width=1)
-                    ),
-                    row=1, col=1
-                )
-
-        # 添加BOLL线
-        fig.add_trace(
+        price_traces += [
             go.Scatter(
-                x=df['trade_date'],
+                x=dates,
                 y=df['boll_upper'],
                 name='BOLL上轨',
                 line=dict(color='gray', dash='dash')
             ),
-            row=1, col=1
-        )
-        fig.add_trace(
             go.Scatter(
-                x=df['trade_date'],
+                x=dates,
                 y=df['boll_mid'],
                 name='BOLL中轨',
                 line=dict(color='gray')
             ),
-            row=1, col=1
-        )
-        fig.add_trace(
             go.Scatter(
-                x=df['trade_date'],
+                x=dates,
                 y=df['boll_lower'],
                 name='BOLL下轨',
                 line=dict(color='gray', dash='dash')
-            ),
-            row=1, col=1
-        )
+            )
+        ]
 
-        # 添加MACD
-        # 先绘制DIF和DEA线
-        fig.add_trace(
+        # 第2行：MACD，先绘制DIF和DEA线，再绘制红色的正值柱与绿色的负值柱
+        macd_traces = [
             go.Scatter(
-                x=df['trade_date'], 
+                x=dates, 
                 y=df['macd_dif'], 
                 name='DIF',
                 line=dict(color='blue'),
                 showlegend=True
             ),
-            row=2, col=1
-        )
-        fig.add_trace(
             go.Scatter(
-                x=df['trade_date'], 
+                x=dates, 
                 y=df['macd_dea'], 
                 name='DEA',
                 line=dict(color='orange'),
                 showlegend=True
             ),
-            row=2, col=1
-        )
-
-        # 分别创建正值和负值的MACD柱状图
-        positive_macd = df['macd'].copy()
-        negative_macd = df['macd'].copy()
-        positive_macd[positive_macd <= 0] = None
-        negative_macd[negative_macd > 0] = None
-
-        # 添加红色的正值MACD柱
-        fig.add_trace(
             go.Bar(
-                x=df['trade_date'],
+                x=dates,
                 y=positive_macd,
                 name='MACD',
                 marker_color='red',
+                width=1,  # 调整柱状图宽度为最大，确保MACD柱状图显示完整
+                opacity=0.8,  # 设置透明度
                 showlegend=True
             ),
-            row=2, col=1
-        )
-
-        # 添加绿色的负值MACD柱
-        fig.add_trace(
             go.Bar(
-                x=df['trade_date'],
+                x=dates,
                 y=negative_macd,
                 name='MACD',
                 marker_color='green',
+                width=1,
+                opacity=0.8,
                 showlegend=False  # 不显示第二个MACD图例
-            ),
-            row=2, col=1
-        )
+            )
+        ]
 
-        # 添加KDJ
-        fig.add_trace(
-            go.Scatter(x=df['trade_date'], y=df['kdj_k'], name='K值',
+        # 第3行：KDJ
+        kdj_traces = [
+            go.Scatter(x=dates, y=df['kdj_k'], name='K值',
                       line=dict(color='blue')),
-            row=3, col=1
-        )
-        fig.add_trace(
-            go.Scatter(x=df['trade_date'], y=df['kdj_d'], name='D值',
+            go.Scatter(x=dates, y=df['kdj_d'], name='D值',
                       line=dict(color='orange')),
-            row=3, col=1
-        )
-        fig.add_trace(
-            go.Scatter(x=df['trade_date'], y=df['kdj_j'], name='J值',
-                      line=dict(color='purple')),
-            row=3, col=1
-        )
+            go.Scatter(x=dates, y=df['kdj_j'], name='J值',
+                      line=dict(color='purple'))
+        ]
 
-        # 添加RSI
-        fig.add_trace(
-            go.Scatter(x=df['trade_date'], y=df['rsi_6'], name='RSI6',
+        # 第4行：RSI
+        rsi_traces = [
+            go.Scatter(x=dates, y=df['rsi_6'], name='RSI6',
                       line=dict(color='blue')),
-            row=4, col=1
-        )
-        fig.add_trace(
-            go.Scatter(x=df['trade_date'], y=df['rsi_12'], name='RSI12',
+            go.Scatter(x=dates, y=df['rsi_12'], name='RSI12',
                       line=dict(color='orange')),
-            row=4, col=1
-        )
-        fig.add_trace(
-            go.Scatter(x=df['trade_date'], y=df['rsi_24'], name='RSI24',
-                      line=dict(color='purple')),
-            row=4, col=1
-        )
+            go.Scatter(x=dates, y=df['rsi_24'], name='RSI24',
+                      line=dict(color='purple'))
+        ]
 
-        # 更新布局
-        fig.update_layout(
-            title=f'{stock_name} 技术指标分析',
-            xaxis_title='日期',
-            height=1200,
-            showlegend=True,
-            template='plotly_white',
-            barmode='overlay',  # 确保柱状图可以叠加
-            bargap=0,  # 移除柱状图间距
-            legend=dict(
-                orientation="h",
-                yanchor="bottom",
-                y=1.02,
-                xanchor="right",
-                x=1
-            )
+        # 所有曲线一次添加到图表，只做一次校验与子图定位
+        row_traces = (price_traces, macd_traces, kdj_traces, rsi_traces)
+        fig.add_traces(
+            [trace for traces in row_traces for trace in traces],
+            rows=[row for row, traces in enumerate(row_traces, start=1) for _ in traces],
+            cols=1
         )
 
         # 调整MACD子图的y轴范围
-        y_max = max(df['macd'].max(), df['macd_dif'].max(), df['macd_dea'].max())
-        y_min = min(df['macd'].min(), df['macd_dif'].min(), df['macd_dea'].min())
+        macd_values = df[['macd', 'macd_dif', 'macd_dea']].to_numpy()
+        y_max = np.nanmax(macd_values)
+        y_min = np.nanmin(macd_values)
         margin = (y_max - y_min) * 0.1
         fig.update_yaxes(range=[y_min - margin, y_max + margin], row=2, col=1)
 
-        # 确保MACD柱状图显示完整
-        fig.update_traces(
-            selector=dict(type='bar'),
-            width=1,  # 调整柱状图宽度为最大
-            opacity=0.8,  # 设置透明度
-            row=2, col=1
-        )
-
-        # 添加RSI参考线
-        fig.add_hline(y=80, line_dash="dash", line_color="red", row=4, col=1)
-        fig.add_hline(y=20, line_dash="dash", line_color="green", row=4, col=1)
-
         return fig 
\ No newline at end of file
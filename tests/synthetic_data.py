@@ -0,0 +1,61 @@
+"""
+测试用的合成行情数据
+按随机游走生成收盘价，并按常见公式计算各分析器需要的MACD、KDJ、RSI、BOLL与均线列
+"""
+import numpy as np
+import pandas as pd
+
+# 均线列对应的周期
+_MA_PERIODS = (5, 10, 20, 30, 60, 90, 250)
+
+
+def make_stock_frame(seed: int, n: int = 60) -> pd.DataFrame:
+    """
+    生成一只股票最近n个交易日的技术指标数据，列名与TushareDataFetcher的输出一致
+
+    参数:
+        seed (int): 随机种子，相同的种子生成相同的数据
+        n (int): 交易日数
+
+    返回:
+        pd.DataFrame: 按交易日升序排列的数据
+    """
+    rng = np.random.default_rng(seed)
+    # 多生成一段历史，使均线与指标在返回的窗口内已经稳定
+    total = n + 260
+    close = 10 + np.cumsum(rng.normal(0, 0.2, total))
+    s = pd.Series(close)
+    open_ = close + rng.normal(0, 0.1, total)
+    high = np.maximum(open_, close) + np.abs(rng.normal(0, 0.1, total))
+    low = np.minimum(open_, close) - np.abs(rng.normal(0, 0.1, total))
+
+    dif = s.ewm(span=12).mean() - s.ewm(span=26).mean()
+    dea = dif.ewm(span=9).mean()
+    low9 = pd.Series(low).rolling(9, min_periods=1).min()
+    high9 = pd.Series(high).rolling(9, min_periods=1).max()
+    rsv = (s - low9) / (high9 - low9 + 1e-9) * 100
+    k = rsv.ewm(com=2).mean()
+    d = k.ewm(com=2).mean()
+    mid = s.rolling(20, min_periods=1).mean()
+    std = s.rolling(20, min_periods=1).std().fillna(0.1)
+
+    def rsi(period):
+        diff = s.diff()
+        up = diff.clip(lower=0).ewm(com=period - 1).mean()
+        down = (-diff.clip(upper=0)).ewm(com=period - 1).mean()
+        return 100 - 100 / (1 + up / (down + 1e-9))
+
+    df = pd.DataFrame({
+        'ts_code': 'TEST.SZ',
+        'trade_date': pd.bdate_range('2020-01-01', periods=total).strftime('%Y%m%d'),
+        'open': open_, 'high': high, 'low': low, 'close': close,
+        'vol': rng.uniform(1e5, 5e5, total),
+        'pct_change': s.pct_change().fillna(0) * 100,
+        'macd_dif': dif, 'macd_dea': dea, 'macd': (dif - dea) * 2,
+        'kdj_k': k, 'kdj_d': d, 'kdj_j': 3 * k - 2 * d,
+        'rsi_6': rsi(6), 'rsi_12': rsi(12), 'rsi_24': rsi(24),
+        'boll_upper': mid + 2 * std, 'boll_mid': mid, 'boll_lower': mid - 2 * std,
+    })
+    for period in _MA_PERIODS:
+        df[f'ma_qfq_{period}'] = s.rolling(period, min_periods=1).mean()
+    return df.tail(n).reset_index(drop=True)
@@ -0,0 +1,33 @@
+"""
+多进程批量分析的退出测试
+父进程已启动numba线程池时，analyze_indicators_batch的子进程不能使解释器在退出时阻塞
+"""
+import os
+import subprocess
+import sys
+
+PROJECT_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+_SCRIPT = '''
+import sys
+sys.path.insert(0, {tests_dir!r})
+import numpy as np
+from synthetic_data import make_stock_frame
+from src.analyzers import analyze_indicators_batch
+from src.analyzers.indicators.boll_analyzer import analyze_boll_batch_parallel
+
+frames = {{f'T{{i}}': make_stock_frame(i) for i in range(8)}}
+# 先在父进程中运行prange并行内核，启动numba的线程池
+prices = np.stack([df[['close', 'boll_upper', 'boll_mid', 'boll_lower']].to_numpy() for df in frames.values()])
+analyze_boll_batch_parallel(prices)
+results = analyze_indicators_batch(frames, max_workers=2)
+print(len(results))
+'''
+
+
+def test_batch_with_process_pool_exits():
+    script = _SCRIPT.format(tests_dir=os.path.join(PROJECT_ROOT, 'tests'))
+    completed = subprocess.run([sys.executable, '-c', script], cwd=PROJECT_ROOT,
+                               capture_output=True, text=True, timeout=120)
+    assert completed.returncode == 0, completed.stderr
+    assert completed.stdout.strip() == '8'
@@ -0,0 +1,91 @@
+"""
+批量接口与逐只股票接口的一致性测试
+screen_indicators、analyze_boll_batch、analyze_candlestick_patterns_batch、analyze_indicators_batch
+的结果应与逐只调用对应分析器相同，_screen_codes应与其NumPy实现_screen_codes_numpy相同
+"""
+import numpy as np
+import pandas as pd
+import pytest
+
+from synthetic_data import make_stock_frame
+from src.analyzers import analyze_indicators, analyze_indicators_batch, screen_indicators
+from src.analyzers.technical_indicators import _SCREEN_COLUMNS, _screen_codes, _screen_codes_numpy
+from src.analyzers.indicators.boll_analyzer import analyze_boll, analyze_boll_batch
+from src.analyzers.indicators.candlestick_analyzer import (analyze_candlestick_patterns,
+                                                            analyze_candlestick_patterns_batch)
+
+# 取整后的列：相邻两天或两条线取值相同，覆盖金叉死叉、突破等判断中的相等边界
+_ROUNDED_COLUMNS = ('macd_dif', 'macd_dea', 'macd', 'kdj_k', 'kdj_d', 'rsi_6', 'rsi_12',
+                    'close', 'boll_mid', 'boll_upper', 'open', 'high', 'low')
+
+
+def _frames(count: int = 60, n: int = 60) -> dict:
+    """
+    生成count只股票的数据，每3只中有1只按整数取整以制造相等的边界情况
+    """
+    frames = {}
+    for seed in range(count):
+        df = make_stock_frame(seed, n)
+        if seed % 3 == 0:
+            df[list(_ROUNDED_COLUMNS)] = df[list(_ROUNDED_COLUMNS)].round(0)
+        code = f'{seed:06d}.SZ'
+        df['ts_code'] = code
+        frames[code] = df
+    return frames
+
+
+def test_screen_indicators_matches_analyze_indicators():
+    frames = _frames()
+    latest = pd.DataFrame([df.iloc[-1] for df in frames.values()])
+    prev = pd.DataFrame([df.iloc[-2] for df in frames.values()])
+    screened = screen_indicators(latest, prev, index=list(frames))
+
+    for code, df in frames.items():
+        analysis = analyze_indicators(df)
+        expected = (analysis['MACD']['short_term_signal'], analysis['KDJ']['cross_pattern'],
+                    analysis['RSI']['short_term_signal'], analysis['BOLL']['short_term_signal'])
+        assert tuple(screened.loc[code]) == expected, code
+
+
+def test_screen_codes_matches_numpy():
+    rng = np.random.default_rng(0)
+    n = 2000
+    # 取值在小范围整数内，大量出现相等；少量NaN覆盖缺失值
+    pairs = []
+    for _ in _SCREEN_COLUMNS:
+        values = rng.integers(0, 6, size=(n, 2)).astype(np.float64)
+        values[rng.random((n, 2)) < 0.02] = np.nan
+        pairs.append(values)
+    np.testing.assert_array_equal(_screen_codes(*pairs), _screen_codes_numpy(*pairs))
+
+
+def test_analyze_boll_batch_matches_analyze_boll():
+    frames = _frames()
+    # 部分股票的历史短于长期窗口
+    for code in list(frames)[::7]:
+        frames[code] = frames[code].tail(15)
+    batch = analyze_boll_batch(pd.concat(frames.values(), ignore_index=True))
+
+    for code, df in frames.items():
+        expected = analyze_boll(df, df.tail(40), df.tail(20), df.tail(10))
+        assert batch.loc[code].to_dict() == expected, code
+
+
+def test_analyze_candlestick_patterns_batch_matches_per_ticker():
+    frames = _frames()
+    ohlc = np.stack([df[['open', 'high', 'low', 'close']].to_numpy() for df in frames.values()])
+    results = analyze_candlestick_patterns_batch(ohlc)
+
+    assert len(results) == len(frames)
+    for result, (code, df) in zip(results, frames.items()):
+        assert result.to_dict() == analyze_candlestick_patterns(df), code
+
+
+@pytest.mark.parametrize('max_workers', [1, 2])
+def test_analyze_indicators_batch_matches_analyze_indicators(max_workers):
+    frames = _frames(count=8)
+    results = analyze_indicators_batch(frames, max_workers=max_workers)
+
+    assert list(results) == list(frames)
+    for code, df in frames.items():
+        assert results[code] == analyze_indicators(df), code
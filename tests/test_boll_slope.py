@@ -0,0 +1,78 @@
+"""
+布林带趋势斜率测试
+平盘（常数）序列的斜率应恰好为0，安装与未安装numba时的布林带分析结果应一致
+"""
+import json
+import os
+import subprocess
+import sys
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from synthetic_data import make_stock_frame
+from src.analyzers.indicators._indicators_numba import trend_slope
+from src.analyzers.indicators.boll_analyzer import analyze_boll, analyze_boll_batch
+
+PROJECT_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+def _flat_band_frame(seed: int, n: int) -> pd.DataFrame:
+    """
+    轨道水平不变的股票（停牌、长期一字板等），收盘价贴近上轨；中轨取值随seed变化
+    """
+    df = make_stock_frame(seed, n)
+    mid = 1234.56 + seed * 0.37
+    df['boll_upper'] = mid * 1.05
+    df['boll_mid'] = mid
+    df['boll_lower'] = mid * 0.95
+    df['close'] = mid * 1.045
+    return df
+
+
+def _boll_results() -> list:
+    """
+    一组合成数据（半数为水平轨道）逐只调用analyze_boll的结果
+    """
+    results = []
+    for seed in range(120):
+        n = (60, 25, 15, 3)[seed % 4]
+        df = _flat_band_frame(seed, n) if seed % 2 else make_stock_frame(seed, n)
+        results.append(analyze_boll(df, df.tail(40), df.tail(20), df.tail(10)))
+    return results
+
+
+@pytest.mark.parametrize('value', [10.37, 1234.56, 0.1, 3e5])
+@pytest.mark.parametrize('n', [2, 3, 10, 20, 40])
+def test_trend_slope_of_constant_series_is_zero(n, value):
+    assert trend_slope(np.full(n, value)) == 0.0
+
+
+def test_flat_band_has_no_trend():
+    df = _flat_band_frame(12, 25)
+    result = analyze_boll(df, df.tail(40), df.tail(20), df.tail(10))
+    # 轨道斜率为0：收盘价位于上轨附近时为高位震荡，带宽不变时不判为扩张或收敛
+    assert result['long_term_trend'] == '高位震荡（40天）'
+    assert result['medium_term_trend'] == '窄幅震荡'
+    assert result['pattern'] == '常态运行'
+
+    df['ts_code'] = 'FLAT.SZ'
+    batch = analyze_boll_batch(df)
+    assert batch.loc['FLAT.SZ'].to_dict() == result
+
+
+def test_numba_and_fallback_results_match():
+    # 在子进程中屏蔽numba，按未安装numba的实现重新计算
+    script = (
+        "import json, sys\n"
+        "sys.modules['numba'] = None\n"
+        "sys.path.insert(0, 'tests')\n"
+        "from test_boll_slope import _boll_results\n"
+        "print(json.dumps(_boll_results()))\n"
+    )
+    completed = subprocess.run([sys.executable, '-c', script], cwd=PROJECT_ROOT,
+                               capture_output=True, text=True, timeout=300)
+    assert completed.returncode == 0, completed.stderr
+
+    assert json.loads(completed.stdout) == json.loads(json.dumps(_boll_results()))
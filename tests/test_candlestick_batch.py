@@ -0,0 +1,47 @@
+"""
+批量K线形态判断与逐只形态内核的一致性测试
+_batch_hits按股票维度向量化的命中矩阵应与逐行调用scan_all_patterns的位掩码相同
+"""
+import numpy as np
+
+from src.analyzers.indicators._candlestick_numba import N_PATTERNS, scan_all_patterns
+from src.analyzers.indicators.candlestick_analyzer import _batch_hits
+
+
+def _random_windows(seed: int, n: int = 20000):
+    """
+    随机生成n个5天的OHLC窗口，约0.5%的价格为NaN：
+    前一半价格取小范围整数，大量出现相等的边界情况；后一半为连续取值，覆盖按振幅比例设定的阈值
+    """
+    rng = np.random.default_rng(seed)
+    half = n // 2
+    o = rng.integers(8, 13, (n, 5)).astype(np.float64)
+    c = rng.integers(8, 13, (n, 5)).astype(np.float64)
+    h = np.maximum(o, c) + rng.integers(0, 3, (n, 5))
+    l = np.minimum(o, c) - rng.integers(0, 3, (n, 5))
+    o[half:] = 10 + rng.normal(0, 1, (n - half, 5))
+    c[half:] = 10 + rng.normal(0, 1, (n - half, 5))
+    h[half:] = np.maximum(o[half:], c[half:]) + np.abs(rng.normal(0, 0.5, (n - half, 5)))
+    l[half:] = np.minimum(o[half:], c[half:]) - np.abs(rng.normal(0, 0.5, (n - half, 5)))
+    windows = [o, h, l, c]
+    for values in windows:
+        values[rng.random((n, 5)) < 0.005] = np.nan
+    return windows
+
+
+def _expected_hits(o, h, l, c) -> np.ndarray:
+    """
+    逐行调用scan_all_patterns，把位掩码展开为命中矩阵
+    """
+    masks = np.array([scan_all_patterns(o[i], h[i], l[i], c[i]) for i in range(len(o))], dtype=np.int64)
+    return (masks[:, None] >> np.arange(N_PATTERNS) & 1).astype(bool)
+
+
+def test_batch_hits_match_scan_all_patterns():
+    windows = _random_windows(0)
+    expected = _expected_hits(*windows)
+    # 每个形态都要在样本中出现，NaN窗口也要在样本中
+    assert expected.any(axis=0).all()
+    assert np.isnan(np.stack(windows)).any(axis=(0, 2)).any()
+
+    np.testing.assert_array_equal(_batch_hits(*windows), expected)
@@ -0,0 +1,74 @@
+"""
+背离判断与DataFrame索引顺序无关的测试
+get_stock_data把Tushare按日期降序返回的数据排成升序，索引随之变为降序（如59..0）；
+背离应按时间顺序（位置）查找局部极值，而不是按索引标签
+"""
+import numpy as np
+import pandas as pd
+
+from synthetic_data import make_stock_frame
+from src.analyzers import analyze_indicators
+
+_SEEDS = range(150)
+
+
+def _production_frame(seed: int) -> pd.DataFrame:
+    """
+    与get_stock_data相同的数据形态：先按日期降序排列并重置索引，再按日期升序排序，索引为降序
+    """
+    newest_first = make_stock_frame(seed, 60).iloc[::-1].reset_index(drop=True)
+    return newest_first.sort_values('trade_date')
+
+
+def _local_extremes(values: np.ndarray, is_high: bool) -> list:
+    """
+    按时间顺序逐点查找严格高于（低于）左右相邻点的局部极值
+    """
+    extremes = []
+    for i in range(1, len(values) - 1):
+        if is_high and values[i] > values[i - 1] and values[i] > values[i + 1]:
+            extremes.append(values[i])
+        elif not is_high and values[i] < values[i - 1] and values[i] < values[i + 1]:
+            extremes.append(values[i])
+    return extremes
+
+
+def _expected_divergence(close: np.ndarray, indicator: np.ndarray) -> int:
+    """
+    背离编码的参照实现：0顶背离、1底背离、2无背离
+    """
+    price_highs, indicator_highs = _local_extremes(close, True), _local_extremes(indicator, True)
+    if len(price_highs) >= 2 and len(indicator_highs) >= 2:
+        if price_highs[-1] > price_highs[-2] and indicator_highs[-1] < indicator_highs[-2]:
+            return 0
+    price_lows, indicator_lows = _local_extremes(close, False), _local_extremes(indicator, False)
+    if len(price_lows) >= 2 and len(indicator_lows) >= 2:
+        if price_lows[-1] < price_lows[-2] and indicator_lows[-1] > indicator_lows[-2]:
+            return 1
+    return 2
+
+
+def _check_divergence(indicator_key: str, column: str, labels: tuple) -> None:
+    seen = set()
+    for seed in _SEEDS:
+        df = _production_frame(seed)
+        assert df.index[0] > df.index[-1]
+        result = analyze_indicators(df)[indicator_key]
+
+        # 结果与索引无关
+        assert result == analyze_indicators(df.reset_index(drop=True))[indicator_key], seed
+
+        long_term = df.tail(40)
+        expected = _expected_divergence(long_term['close'].to_numpy(), long_term[column].to_numpy())
+        assert result['divergence'] == labels[expected], seed
+        seen.add(expected)
+    # 样本中顶背离、底背离都要出现，避免全部为无背离时测试失去意义
+    assert seen == {0, 1, 2}
+
+
+def test_macd_divergence_uses_time_order_with_descending_index():
+    _check_divergence('MACD', 'macd', ("顶背离", "底背离", "无背离"))
+
+
+def test_rsi_divergence_uses_time_order_with_descending_index():
+    _check_divergence('RSI', 'rsi_6', ("顶背离（卖出信号）", "底背离（买入信号）", "无背离"))
@@ -0,0 +1,28 @@
+"""
+导入路径测试
+分析器包先后通过src.analyzers与analyzers（src加入sys.path）两种路径导入时，numba磁盘缓存不能使后一次导入失败
+"""
+import os
+import subprocess
+import sys
+
+import pytest
+
+PROJECT_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# (工作目录, 导入语句)：以脚本方式运行时工作目录即sys.path[0]
+_ROOTS = {
+    'src': (PROJECT_ROOT, 'import src.analyzers.technical_indicators'),
+    'analyzers': (os.path.join(PROJECT_ROOT, 'src'), 'import analyzers.technical_indicators'),
+}
+
+
+@pytest.mark.parametrize('order', [('analyzers', 'src'), ('src', 'analyzers')])
+def test_import_through_both_roots(order, tmp_path):
+    # 使用独立的缓存目录，保证从空缓存开始
+    env = dict(os.environ, NUMBA_CACHE_DIR=str(tmp_path))
+    for root in order:
+        cwd, statement = _ROOTS[root]
+        completed = subprocess.run([sys.executable, '-c', statement], cwd=cwd, env=env,
+                                   capture_output=True, text=True, timeout=300)
+        assert completed.returncode == 0, f'{root}: {completed.stderr}'